@@ -0,0 +1,8 @@
+"""
+Benchmarks of the project's hot views and write paths.
+
+Run `python -m benchmarks --help` from the project root. The suite runs
+against the project's database, or the one given with --database, which is
+migrated and seeded with synthetic history (inventory.seeding) first if it
+has no sales.
+"""
@@ -0,0 +1,211 @@
+"""
+The views and write paths timed by the benchmark runner.
+
+Each case performs one request with the logged-in test client (or, for the
+CSV import, one call of the import function) and fails if the response is
+not the one a successful request gets. Write cases are run inside a
+transaction that the runner rolls back, so every repetition sees the same
+data.
+"""
+
+import csv
+import io
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Callable
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from django.utils import timezone
+
+from inventory.models import InventoryAdjustment, Item
+from inventory.utils import ITEM_CSV_FIELDS, process_item_csv_upload
+from purchases.models import Supplier
+from sales.models import Customer
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class Case:
+    name: str
+    run: Callable
+    writes: bool = False
+
+
+def _check(response, status):
+    # Streamed responses are only produced while they are read
+    if response.streaming:
+        b"".join(response.streaming_content)
+    if response.status_code != status:
+        form = (response.context or {}).get("form")
+        errors = f" {form.errors.as_text()}" if form and form.errors else ""
+        raise BenchmarkError(
+            f"{response.request['PATH_INFO']} returned {response.status_code}, "
+            f"expected {status}.{errors}"
+        )
+
+
+def _get(url, params=None):
+    def run(client):
+        _check(client.get(url, params or {}), 200)
+
+    return run
+
+
+def _post(url, data, status=302):
+    def run(client):
+        _check(client.post(url, data), status)
+
+    return run
+
+
+def item_csv(rows, items):
+    """
+    An item import file of `rows` rows: updates of the first half of `items`
+    followed by new items.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(ITEM_CSV_FIELDS)
+    updates = list(items[: rows // 2])
+    template = items[0]
+    for n in range(rows):
+        item = updates[n] if n < len(updates) else None
+        writer.writerow(
+            [
+                item.name if item else f"Benchmark Item {n + 1}",
+                item.sku if item else f"BENCH-{n + 1:07d}",
+                template.unit.name,
+                template.category.name,
+                "120.00",
+                "80.00",
+                "50",
+                "10",
+                "50",
+            ]
+        )
+    return buffer.getvalue().encode("utf-8")
+
+
+def build_cases(csv_rows=1000):
+    """Every benchmark case, against the data currently in the database."""
+    # The best-stocked item can always be sold once more
+    item = (
+        Item.objects.select_related("unit", "category")
+        .order_by("-current_stock")
+        .first()
+    )
+    customer = Customer.objects.order_by("pk").first()
+    supplier = Supplier.objects.order_by("pk").first()
+    if not (item and customer and supplier):
+        raise BenchmarkError(
+            "The database has no items, customers or suppliers to benchmark; "
+            "seed it first (manage.py seed_stockflow)."
+        )
+
+    today = timezone.localdate()
+    month = {"start": str(today - timedelta(days=30)), "end": str(today)}
+    csv_items = list(
+        Item.objects.select_related("unit", "category").order_by("pk")[
+            : max(csv_rows // 2, 1)
+        ]
+    )
+    csv_content = item_csv(csv_rows, csv_items)
+
+    def import_csv(client):
+        process_item_csv_upload(SimpleUploadedFile("items.csv", csv_content))
+
+    def validate_csv(client):
+        upload = SimpleUploadedFile("items.csv", csv_content)
+        _check(
+            client.post(
+                reverse("import_items"), {"csv_file": upload, "validate_only": "1"}
+            ),
+            200,
+        )
+
+    sale = {
+        "item": item.pk,
+        "customer": customer.pk,
+        "quantity": 1,
+        "unit_price": "",
+        "description": "",
+        "date": str(today),
+    }
+    purchase = {
+        "item": item.pk,
+        "supplier": supplier.pk,
+        "quantity": 10,
+        "unit_cost": "",
+        "description": "",
+        "date": str(today),
+    }
+    # An order of one unit of each of the ten best-stocked items
+    order_items = list(
+        Item.objects.order_by("-current_stock").values_list("pk", flat=True)[:10]
+    )
+    sales_order = {
+        "customer": customer.pk,
+        "date": str(today),
+        "description": "",
+        "lines-TOTAL_FORMS": len(order_items),
+        "lines-INITIAL_FORMS": 0,
+    }
+    for n, item_id in enumerate(order_items):
+        sales_order.update({f"lines-{n}-item": item_id, f"lines-{n}-quantity": 1})
+    adjustment = {
+        "item": item.pk,
+        "adjustment_type": InventoryAdjustment.INCREASE,
+        "quantity_adjusted": 5,
+        "cost_price": "",
+        "reason": "STOCK_COUNT_INCREASE",
+        "description": "",
+    }
+
+    return [
+        Case("home", _get(reverse("home"))),
+        Case("items_view", _get(reverse("items"))),
+        Case("sales_view", _get(reverse("sales"))),
+        Case("purchases_view", _get(reverse("purchases"))),
+        Case("sales_report", _get(reverse("sales_report"), month)),
+        Case("purchases_report", _get(reverse("purchases_report"), month)),
+        Case("profit_report", _get(reverse("profit_report"), month)),
+        Case(
+            "profit_report_by_item",
+            _get(reverse("profit_report"), {**month, "group": "item"}),
+        ),
+        Case("sales_report_export", _get(reverse("sales_report_export"), month)),
+        Case(
+            "purchases_report_export",
+            _get(reverse("purchases_report_export"), month),
+        ),
+        Case("profit_report_export", _get(reverse("profit_report_export"), month)),
+        Case(
+            "search_results_view",
+            _get(reverse("search_results"), {"q": item.name.split()[0]}),
+        ),
+        Case(
+            "item_autocomplete",
+            _get(reverse("item_autocomplete"), {"q": item.name.split()[0]}),
+        ),
+        Case("add_sale_form", _get(reverse("add_sale"))),
+        Case("add_sale", _post(reverse("add_sale"), sale), writes=True),
+        Case(
+            "add_sales_order",
+            _post(reverse("add_sales_order"), sales_order),
+            writes=True,
+        ),
+        Case("add_purchase_form", _get(reverse("add_purchase"))),
+        Case("add_purchase", _post(reverse("add_purchase"), purchase), writes=True),
+        Case("add_adjustment_form", _get(reverse("add_adjustment"))),
+        Case(
+            "add_adjustment",
+            _post(reverse("add_adjustment"), adjustment),
+            writes=True,
+        ),
+        Case("import_items_validate", validate_csv),
+        Case("process_item_csv_upload", import_csv, writes=True),
+    ]
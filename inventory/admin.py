@@ -2,10 +2,15 @@ from django.contrib import admin
 
 from .models import (
     Category,
+    CostLayer,
+    DailyItemSummary,
+    DocumentSequence,
+    ImportJob,
     InventoryAdjustment,
     Item,
     ItemImage,
     StockAlert,
+    StockMovement,
     UnitOfMeasure,
 )
 
@@ -80,3 +85,80 @@ class StockAlertAdmin(admin.ModelAdmin):
     )
     list_filter = ("alert_type", "is_resolved", "notified_by_email")
     search_fields = ("item__name", "message")
+
+
+@admin.register(StockMovement)
+class StockMovementAdmin(admin.ModelAdmin):
+    list_display = ("item", "quantity", "source", "reference", "timestamp")
+    list_filter = ("source",)
+    search_fields = ("item__name", "item__sku", "reference")
+    date_hierarchy = "timestamp"
+    readonly_fields = ("item", "quantity", "source", "reference", "timestamp")
+    ordering = ("-timestamp",)
+
+
+@admin.register(CostLayer)
+class CostLayerAdmin(admin.ModelAdmin):
+    list_display = (
+        "day",
+        "item",
+        "source",
+        "reference",
+        "quantity",
+        "unit_cost",
+        "cumulative_quantity",
+    )
+    list_filter = ("source",)
+    search_fields = ("item__name", "item__sku", "reference")
+    date_hierarchy = "day"
+    ordering = ("-day", "-pk")
+
+
+@admin.register(DailyItemSummary)
+class DailyItemSummaryAdmin(admin.ModelAdmin):
+    list_display = (
+        "day",
+        "item",
+        "quantity_sold",
+        "quantity_bought",
+        "quantity_adjusted",
+        "revenue",
+        "cost",
+    )
+    search_fields = ("item__name", "item__sku")
+    date_hierarchy = "day"
+    ordering = ("-day",)
+
+
+@admin.register(DocumentSequence)
+class DocumentSequenceAdmin(admin.ModelAdmin):
+    list_display = ("prefix", "day", "last_value")
+    list_filter = ("prefix",)
+    date_hierarchy = "day"
+    ordering = ("-day", "prefix")
+
+
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    list_display = (
+        "pk",
+        "status",
+        "user",
+        "total_rows",
+        "rows_done",
+        "rows_failed",
+        "created_at",
+        "finished_at",
+    )
+    list_filter = ("status",)
+    readonly_fields = (
+        "status",
+        "total_rows",
+        "rows_done",
+        "rows_failed",
+        "error_report",
+        "error_message",
+        "created_at",
+        "started_at",
+        "finished_at",
+    )
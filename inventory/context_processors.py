@@ -1,10 +1,8 @@
-from django.db import models
+from django.utils.functional import SimpleLazyObject
 
-from .models import Item
+from .stock import get_low_stock_count
 
 
 def low_stock_alerts(request):
-    low_stock = Item.objects.filter(
-        current_stock__lte=models.F("reorder_point")
-    ).count()
-    return {"low_stock": low_stock}
+    # Lazy, so templates that never show the badge never look the count up
+    return {"low_stock": SimpleLazyObject(get_low_stock_count)}
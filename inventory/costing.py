@@ -0,0 +1,459 @@
+"""
+Cost of goods sold from inventory cost layers.
+
+Every receipt of stock (opening balance, CSV import, purchase, increase
+adjustment) becomes a CostLayer holding its quantity and unit cost. Sales,
+decrease adjustments and CSV imports that lower stock consume those layers,
+first in first out or at the moving weighted average cost
+(settings.INVENTORY_COSTING_METHOD), and the resulting cost is stored on the
+sale or adjustment as `cogs`.
+
+recost_item() rebuilds an item's layers and COGS from a given day onward.
+Each layer records the quantity issued before its day and the cost of it
+(consumed_quantity, consumed_cogs), so the rebuild starts at the last layer
+before that day and derives the state there from the layers before it:
+
+* FIFO always consumes a prefix of the layers in order, so with each layer
+  carrying the running total of quantity received (cumulative_quantity),
+  the layers still open are those whose running total exceeds the quantity
+  consumed so far.
+* The moving average needs only the quantity and value on hand, which are
+  the layers' totals less what was consumed and its cost.
+
+So a back-dated edit replays that item's transactions from its last
+receipt before the edit date only, never its whole history.
+"""
+
+from collections import deque
+from datetime import datetime
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import DecimalField, F, Max, Q, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+FIFO = "fifo"
+AVERAGE = "average"
+COSTING_METHODS = (FIFO, AVERAGE)
+
+CENT = Decimal("0.01")
+UNIT_COST_PLACES = Decimal("0.0001")
+
+# StockMovement sources that receive stock outside purchases and adjustments.
+# CostLayer uses the same source names for them.
+_LEDGER_SOURCES = ("OPENING", "IMPORT")
+
+# Reference of the OPENING movements migration 0028 seeded from each item's
+# stock when the ledger was introduced
+_BACKFILL_REFERENCE = "Ledger backfill"
+
+
+def costing_method():
+    method = getattr(settings, "INVENTORY_COSTING_METHOD", FIFO)
+    if method not in COSTING_METHODS:
+        raise ValueError(f"Unknown inventory costing method: {method}")
+    return method
+
+
+def _received_before(item_id, moment):
+    """
+    Net quantity the item's purchases, sales and adjustments entered before
+    `moment` added to its stock.
+    """
+    from purchases.models import Purchase
+    from sales.models import Sale
+
+    from .models import InventoryAdjustment
+
+    def total(queryset, field):
+        return queryset.aggregate(total=Coalesce(Sum(field), 0))["total"]
+
+    adjustments = InventoryAdjustment.objects.filter(item_id=item_id).filter(
+        Q(created_at__lt=moment) | Q(created_at__isnull=True, date__lt=moment)
+    )
+    return (
+        total(
+            Purchase.objects.filter(item_id=item_id, created_at__lt=moment), "quantity"
+        )
+        - total(Sale.objects.filter(item_id=item_id, created_at__lt=moment), "quantity")
+        + total(
+            adjustments.filter(adjustment_type=InventoryAdjustment.INCREASE),
+            "quantity_adjusted",
+        )
+        - total(
+            adjustments.filter(adjustment_type=InventoryAdjustment.DECREASE),
+            "quantity_adjusted",
+        )
+    )
+
+
+def _events(item_id, since, purchase_price):
+    """
+    The item's receipts and issues on or after `since`, in the order they are
+    costed: by day, receipts before issues, then by time of entry.
+
+    Returns:
+        tuple: (receipts, issues) as lists of dicts sharing a `key` for sorting.
+    """
+    from purchases.models import Purchase
+    from sales.models import Sale
+
+    from .models import CostLayer, InventoryAdjustment, StockMovement
+
+    movements = (
+        StockMovement.objects.filter(item_id=item_id, source__in=_LEDGER_SOURCES)
+        .exclude(quantity=0)
+        .annotate(day=TruncDate("timestamp"))
+    )
+    purchases = Purchase.objects.filter(item_id=item_id)
+    adjustments = InventoryAdjustment.objects.filter(item_id=item_id).annotate(
+        day=TruncDate("date")
+    )
+    sales = Sale.objects.filter(item_id=item_id)
+    if since:
+        movements = movements.filter(day__gte=since)
+        purchases = purchases.filter(date__gte=since)
+        adjustments = adjustments.filter(day__gte=since)
+        sales = sales.filter(date__gte=since)
+
+    receipts = []
+    issues = []
+    for movement in movements.values(
+        "pk", "day", "timestamp", "quantity", "source", "reference"
+    ):
+        if movement["quantity"] < 0:
+            # A CSV import that lowers stock; its cost is not recorded
+            issues.append(
+                {
+                    "key": (
+                        movement["day"],
+                        1,
+                        movement["timestamp"],
+                        0,
+                        movement["pk"],
+                    ),
+                    "model": None,
+                    "pk": movement["pk"],
+                    "quantity": -movement["quantity"],
+                }
+            )
+            continue
+        quantity = movement["quantity"]
+        if movement["reference"] == _BACKFILL_REFERENCE:
+            # The backfill holds the whole stock of the time, most of which
+            # the transactions entered before it already received; only the
+            # rest is an opening balance
+            quantity -= _received_before(item_id, movement["timestamp"])
+            if quantity <= 0:
+                continue
+        receipts.append(
+            {
+                "key": (movement["day"], 0, movement["timestamp"], 0, movement["pk"]),
+                "day": movement["day"],
+                "quantity": quantity,
+                # Stock entered directly is valued at the item's purchase price
+                "unit_cost": purchase_price,
+                "source": movement["source"],
+                "reference": movement["reference"],
+            }
+        )
+    for purchase in purchases.values(
+        "pk", "date", "created_at", "quantity", "unit_cost", "purchase_number"
+    ):
+        receipts.append(
+            {
+                "key": (purchase["date"], 0, purchase["created_at"], 1, purchase["pk"]),
+                "day": purchase["date"],
+                "quantity": purchase["quantity"],
+                "unit_cost": purchase["unit_cost"],
+                "source": CostLayer.PURCHASE,
+                "reference": purchase["purchase_number"],
+            }
+        )
+
+    for adjustment in adjustments.values(
+        "pk", "day", "date", "adjustment_type", "quantity_adjusted", "cost_price"
+    ):
+        if adjustment["adjustment_type"] == InventoryAdjustment.INCREASE:
+            receipts.append(
+                {
+                    "key": (
+                        adjustment["day"],
+                        0,
+                        adjustment["date"],
+                        2,
+                        adjustment["pk"],
+                    ),
+                    "day": adjustment["day"],
+                    "quantity": adjustment["quantity_adjusted"],
+                    "unit_cost": adjustment["cost_price"],
+                    "source": CostLayer.ADJUSTMENT,
+                    "reference": f"ADJ-{adjustment['pk']}",
+                }
+            )
+        elif adjustment["adjustment_type"] == InventoryAdjustment.DECREASE:
+            issues.append(
+                {
+                    "key": (
+                        adjustment["day"],
+                        1,
+                        adjustment["date"],
+                        2,
+                        adjustment["pk"],
+                    ),
+                    "model": InventoryAdjustment,
+                    "pk": adjustment["pk"],
+                    "quantity": adjustment["quantity_adjusted"],
+                }
+            )
+    for sale in sales.values("pk", "date", "created_at", "quantity"):
+        issues.append(
+            {
+                "key": (sale["date"], 1, sale["created_at"], 1, sale["pk"]),
+                "model": Sale,
+                "pk": sale["pk"],
+                "quantity": sale["quantity"],
+            }
+        )
+    return receipts, issues
+
+
+class _FifoState:
+    def __init__(self, open_layers, deficit, last_cost):
+        # [remaining quantity, unit cost] of each open layer, oldest first
+        self.layers = deque(open_layers)
+        # Units issued beyond what had been received; later receipts cover it
+        self.deficit = deficit
+        self.last_cost = last_cost
+
+    def receive(self, quantity, unit_cost):
+        self.last_cost = unit_cost
+        covered = min(self.deficit, quantity)
+        self.deficit -= covered
+        if quantity > covered:
+            self.layers.append([quantity - covered, unit_cost])
+
+    def issue(self, quantity):
+        cost = Decimal("0")
+        while quantity and self.layers:
+            layer = self.layers[0]
+            taken = min(quantity, layer[0])
+            cost += taken * layer[1]
+            layer[0] -= taken
+            quantity -= taken
+            if not layer[0]:
+                self.layers.popleft()
+        if quantity:
+            # Out of stock: charge the latest known cost
+            self.deficit += quantity
+            cost += quantity * self.last_cost
+        return cost
+
+
+class _AverageState:
+    def __init__(self, quantity, value, last_cost):
+        self.quantity = quantity
+        self.value = value
+        self.last_cost = last_cost
+
+    @property
+    def average_cost(self):
+        if self.quantity > 0:
+            return self.value / self.quantity
+        return self.last_cost
+
+    def receive(self, quantity, unit_cost):
+        self.last_cost = unit_cost
+        self.quantity += quantity
+        self.value += quantity * unit_cost
+
+    def issue(self, quantity):
+        cost = (quantity * self.average_cost).quantize(CENT, ROUND_HALF_UP)
+        self.quantity -= quantity
+        self.value -= cost
+        return cost
+
+
+def _opening_state(item, consumed, consumed_cost, method):
+    """
+    Costing state after the layers left (all those before the day recosting
+    starts) and the `consumed` quantity issued, at `consumed_cost`.
+
+    Returns:
+        tuple: (state, quantity received so far)
+    """
+    from .models import CostLayer
+
+    prior = CostLayer.objects.filter(item=item)
+    last = prior.order_by("-day", "-pk").first()
+    last_cost = last.unit_cost if last else item.purchase_price or Decimal("0")
+    received = last.cumulative_quantity if last else 0
+
+    if method == AVERAGE:
+        value = prior.aggregate(
+            value=Coalesce(
+                Sum(F("quantity") * F("unit_cost")),
+                Decimal("0"),
+                output_field=DecimalField(max_digits=18, decimal_places=4),
+            )
+        )["value"]
+        state = _AverageState(received - consumed, value - consumed_cost, last_cost)
+        return state, received
+
+    open_layers = [
+        [min(layer.quantity, layer.cumulative_quantity - consumed), layer.unit_cost]
+        for layer in prior.filter(cumulative_quantity__gt=consumed).order_by(
+            "day", "pk"
+        )
+    ]
+    return _FifoState(open_layers, max(consumed - received, 0), last_cost), received
+
+
+def recost_item(item_id, since=None, method=None):
+    """
+    Rebuilds the cost layers and COGS of one item from `since` (a date or
+    datetime) onward, or from the beginning when `since` is None.
+
+    Returns:
+        int: The number of sales and adjustments whose COGS changed.
+    """
+    from .models import CostLayer, Item
+
+    method = method or costing_method()
+    if isinstance(since, datetime):
+        since = timezone.localdate(since)
+
+    with transaction.atomic():
+        # Serializes recosting of the same item
+        item = Item.objects.select_for_update().filter(pk=item_id).first()
+        if item is None:
+            return 0
+
+        consumed, consumed_cost = 0, Decimal("0")
+        start = None
+        if since is not None:
+            # Start at the last layer before `since` that knows what was
+            # issued before its day, or from the beginning if none does
+            start = (
+                CostLayer.objects.filter(
+                    item=item, day__lt=since, consumed_quantity__isnull=False
+                )
+                .order_by("-day", "-pk")
+                .first()
+            )
+        stale = CostLayer.objects.filter(item=item)
+        if start is not None:
+            since = start.day
+            consumed, consumed_cost = start.consumed_quantity, start.consumed_cogs
+            stale = stale.filter(day__gte=since)
+        else:
+            since = None
+        stale.delete()
+
+        state, received = _opening_state(item, consumed, consumed_cost, method)
+        fallback = item.purchase_price or Decimal("0")
+        receipts, issues = _events(item.pk, since, fallback)
+
+        layers = []
+        costs = {}
+        for event in sorted(receipts + issues, key=lambda event: event["key"]):
+            if "model" in event:
+                cost = state.issue(event["quantity"]).quantize(CENT, ROUND_HALF_UP)
+                consumed += event["quantity"]
+                consumed_cost += cost
+                if event["model"]:
+                    costs[event["model"], event["pk"]] = cost
+                continue
+            unit_cost = event["unit_cost"]
+            if unit_cost is None:
+                unit_cost = state.last_cost or fallback
+            received += event["quantity"]
+            layers.append(
+                CostLayer(
+                    item=item,
+                    day=event["day"],
+                    quantity=event["quantity"],
+                    unit_cost=Decimal(unit_cost).quantize(UNIT_COST_PLACES),
+                    cumulative_quantity=received,
+                    consumed_quantity=consumed,
+                    consumed_cogs=consumed_cost,
+                    source=event["source"],
+                    reference=event["reference"],
+                )
+            )
+            state.receive(event["quantity"], unit_cost)
+
+        CostLayer.objects.bulk_create(layers)
+        return _save_costs(costs)
+
+
+def _save_costs(costs):
+    """Writes changed COGS with one UPDATE per model, bypassing save()."""
+    changed = 0
+    by_model = {}
+    for (model, pk), cost in costs.items():
+        by_model.setdefault(model, {})[pk] = cost
+    for model, model_costs in by_model.items():
+        rows = [
+            model(pk=pk, cogs=cost)
+            for pk, current in model.objects.filter(pk__in=model_costs).values_list(
+                "pk", "cogs"
+            )
+            if current != (cost := model_costs[pk])
+        ]
+        # bulk_update() skips save() and its stock side effects
+        model.objects.bulk_update(rows, ["cogs"], batch_size=500)
+        changed += len(rows)
+    return changed
+
+
+def recost_from(item_id, *days):
+    """Recosts `item_id` from the earliest of `days` (dates or datetimes)."""
+    to_date = models.DateField().to_python
+    recost_item(item_id, since=min(to_date(day) for day in days))
+
+
+def record_receipts(movements):
+    """
+    Appends cost layers for opening balances and CSV imports as their
+    StockMovement rows are written. They happen now, after every existing
+    layer, which is where recost_item() would place them too. What was issued
+    before them is left for recost_item() to fill in.
+    """
+    from .models import CostLayer
+
+    movements = [
+        movement
+        for movement in movements
+        if movement.quantity > 0 and movement.source in _LEDGER_SOURCES
+    ]
+    if not movements:
+        return
+
+    received = dict(
+        CostLayer.objects.filter(item_id__in={m.item_id for m in movements})
+        .values("item_id")
+        .annotate(total=Max("cumulative_quantity"))
+        .values_list("item_id", "total")
+    )
+    layers = []
+    for movement in movements:
+        received[movement.item_id] = (
+            received.get(movement.item_id, 0) + movement.quantity
+        )
+        layers.append(
+            CostLayer(
+                item_id=movement.item_id,
+                day=timezone.localdate(movement.timestamp),
+                quantity=movement.quantity,
+                unit_cost=Decimal(movement.item.purchase_price or 0).quantize(
+                    UNIT_COST_PLACES
+                ),
+                cumulative_quantity=received[movement.item_id],
+                source=movement.source,
+                reference=movement.reference,
+            )
+        )
+    CostLayer.objects.bulk_create(layers)
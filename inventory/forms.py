@@ -3,6 +3,8 @@ from crispy_forms.helper import FormHelper
 from crispy_forms.layout import HTML, Column, Field, Layout, Row
 from django import forms
 
+from stockflow.autocomplete import AutocompleteSelect
+
 from .models import Category, InventoryAdjustment, UnitOfMeasure
 
 
@@ -142,6 +144,7 @@ class InventoryAdjustmentForm(forms.ModelForm):
             "description",
         ]
         widgets = {
+            "item": AutocompleteSelect("item_autocomplete"),
             "adjustment_type": forms.Select(),
             "description": forms.Textarea(attrs={"style": "height: 100px"}),
         }
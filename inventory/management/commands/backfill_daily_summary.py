@@ -0,0 +1,28 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from inventory.rollups import rebuild_daily_summaries
+from main.dashboard import bump_dashboard_version
+
+
+class Command(BaseCommand):
+    help = "Rebuild the DailyItemSummary rollup from sales, purchases and adjustments"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--since",
+            type=date.fromisoformat,
+            default=None,
+            help="Only rebuild days from this date (YYYY-MM-DD) on.",
+        )
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        written = rebuild_daily_summaries(
+            since=options["since"], chunk_size=options["chunk_size"]
+        )
+        bump_dashboard_version()
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt daily summaries; {written} row(s) written.")
+        )
@@ -0,0 +1,96 @@
+import csv
+import random
+import time
+from io import StringIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from inventory.utils import ITEM_CSV_FIELDS, process_item_csv_upload
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Import a generated item CSV and report rows per second"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100_000)
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument(
+            "--keep",
+            action="store_true",
+            help="Keep the imported items instead of rolling the import back.",
+        )
+        parser.add_argument(
+            "--validate-only",
+            action="store_true",
+            help="Time the dry-run validation pass instead of the import.",
+        )
+
+    def generate_csv(self, rows, seed):
+        rng = random.Random(seed)
+        units = ["Pieces", "Boxes", "Kilograms", "Litres", "Packs"]
+        output = StringIO()
+        writer = csv.writer(output)
+        writer.writerow(ITEM_CSV_FIELDS)
+        for n in range(rows):
+            selling_price = round(rng.uniform(1, 5000), 2)
+            writer.writerow(
+                [
+                    f"Benchmark Item {n}",
+                    f"BENCH-{n:07d}",
+                    rng.choice(units),
+                    f"Benchmark Category {rng.randrange(200)}",
+                    selling_price,
+                    round(selling_price * rng.uniform(0.5, 0.9), 2),
+                    rng.randrange(500),
+                    rng.randrange(50),
+                    rng.randrange(500),
+                ]
+            )
+        return SimpleUploadedFile("benchmark.csv", output.getvalue().encode("utf-8"))
+
+    def handle(self, *args, **options):
+        csv_file = self.generate_csv(options["rows"], options["seed"])
+        self.stdout.write(
+            f"Generated {options['rows']} rows ({csv_file.size / 1_000_000:.1f} MB)."
+        )
+
+        started = time.perf_counter()
+        try:
+            with transaction.atomic():
+                result = process_item_csv_upload(
+                    csv_file,
+                    batch_size=options["batch_size"],
+                    validate_only=options["validate_only"],
+                )
+                elapsed = time.perf_counter() - started
+                if not options["keep"]:
+                    raise _Rollback
+        except _Rollback:
+            pass
+
+        if options["validate_only"]:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Validated {result['total_rows']} rows "
+                    f"({len(result['would_create'])} to create, "
+                    f"{len(result['would_update'])} to update, "
+                    f"{result['failed_imports']} rejected) in {elapsed:.2f}s: "
+                    f"{result['total_rows'] / elapsed:,.0f} rows/s"
+                )
+            )
+            return
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {result['successful_imports']} rows "
+                f"({result['failed_imports']} failed) in {elapsed:.2f}s: "
+                f"{result['total_rows'] / elapsed:,.0f} rows/s"
+            )
+        )
@@ -0,0 +1,171 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from inventory.models import (
+    Category,
+    InventoryAdjustment,
+    Item,
+    StockAlert,
+    UnitOfMeasure,
+)
+from inventory.seeding import SeedError, seed
+from purchases.models import Purchase, Supplier
+from sales.models import Customer, Sale
+
+# Models whose Meta.indexes are dropped for the "without indexes" run
+INDEXED_MODELS = (
+    Category,
+    UnitOfMeasure,
+    Item,
+    InventoryAdjustment,
+    StockAlert,
+    Sale,
+    Customer,
+    Purchase,
+    Supplier,
+)
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the main list and report queries on generated data, with and "
+        "without the model indexes, and print their query plans"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            type=int,
+            default=1_000_000,
+            help="Approximate number of transactions to generate.",
+        )
+        parser.add_argument("--items", type=int, default=10_000)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--repeat", type=int, default=3)
+        parser.add_argument(
+            "--keep",
+            action="store_true",
+            help="Keep the generated rows instead of rolling them back.",
+        )
+
+    def generate(self, rows, item_count, seed_value):
+        """Seeds the shop history and returns one of its busiest items."""
+        try:
+            seed(items=item_count, transactions=rows, seed=seed_value)
+        except SeedError as error:
+            raise CommandError(str(error))
+        return (
+            Sale.objects.values("item")
+            .annotate(sales=Count("pk"))
+            .order_by("-sales")
+            .values_list("item", flat=True)[0]
+        )
+
+    def queries(self, item_id, today):
+        month_start = today - timedelta(days=30)
+        return {
+            "Sales list": Sale.objects.order_by("-date", "-pk")[:25],
+            "Sales report (one month)": Sale.objects.filter(
+                date__range=(month_start, today)
+            ).order_by("-date"),
+            "Item sales history": Sale.objects.filter(item_id=item_id).order_by(
+                "-date", "-pk"
+            )[:20],
+            "Recent sales": Sale.objects.order_by("-date", "-created_at")[:5],
+            "Purchases list": Purchase.objects.order_by("-date", "-pk")[:25],
+            "Item adjustments": InventoryAdjustment.objects.filter(
+                item_id=item_id
+            ).order_by("-date", "-pk")[:20],
+            "Item list": Item.objects.order_by("-created_at")[:25],
+            "Low-stock items": Item.objects.filter(
+                current_stock__lte=F("reorder_point")
+            ).order_by("name"),
+            "Open alert for item": StockAlert.objects.filter(
+                item_id=item_id, alert_type="low_stock", is_resolved=False
+            ),
+            "Alerts to email": StockAlert.objects.filter(
+                alert_type="low_stock", is_resolved=False, notified_by_email=False
+            ),
+            "Category by name": Category.objects.filter(name__iexact="beverages"),
+            "Customer list": Customer.objects.order_by("-created_at")[:25],
+        }
+
+    def analyze(self):
+        if connection.vendor in ("sqlite", "postgresql"):
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+
+    def run_queries(self, queries, repeat):
+        results = {}
+        for name, queryset in queries.items():
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                rows = len(queryset.all())
+                timings.append(time.perf_counter() - started)
+            results[name] = (min(timings), rows, queryset.explain())
+        return results
+
+    def set_indexes(self, enabled):
+        # Plain DDL: the schema editor refuses to run inside the benchmark's
+        # transaction on SQLite
+        editor = connection.schema_editor()
+        qn = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            for model in INDEXED_MODELS:
+                for index in model._meta.indexes:
+                    if enabled:
+                        cursor.execute(str(index.create_sql(model, editor)))
+                    else:
+                        cursor.execute(f"DROP INDEX {qn(index.name)}")
+        self.analyze()
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            with transaction.atomic():
+                item_id = self.generate(
+                    options["rows"], options["items"], options["seed"]
+                )
+                self.stdout.write(
+                    f"Generated {options['rows']:,} transactions in "
+                    f"{time.perf_counter() - started:.1f}s."
+                )
+                queries = self.queries(item_id, timezone.localdate())
+
+                self.set_indexes(False)
+                before = self.run_queries(queries, options["repeat"])
+                self.set_indexes(True)
+                after = self.run_queries(queries, options["repeat"])
+
+                if not options["keep"]:
+                    raise _Rollback
+        except _Rollback:
+            pass
+
+        for name in queries:
+            old_time, rows, old_plan = before[name]
+            new_time, _, new_plan = after[name]
+            speedup = old_time / new_time if new_time else float("inf")
+            self.stdout.write(
+                self.style.MIGRATE_HEADING(
+                    f"\n{name}: {rows} row(s), {old_time * 1000:.1f} ms without "
+                    f"indexes, {new_time * 1000:.1f} ms with ({speedup:.1f}x)"
+                )
+            )
+            self.stdout.write("  Without indexes:")
+            self.stdout.write(self._indent(old_plan))
+            self.stdout.write("  With indexes:")
+            self.stdout.write(self._indent(new_plan))
+
+    def _indent(self, plan):
+        return "\n".join(f"    {line}" for line in plan.splitlines())
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from inventory.models import Item, StockMovement
+from main.dashboard import bump_dashboard_version
+
+
+class Command(BaseCommand):
+    help = "Recompute every item's current stock from the StockMovement ledger"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report how many items have drifted from the ledger.",
+        )
+
+    def handle(self, *args, **options):
+        # One grouped SUM per item, evaluated by the database via the
+        # (item, timestamp) index instead of a per-item loop in Python.
+        ledger_total = Coalesce(
+            Subquery(
+                StockMovement.objects.filter(item=OuterRef("pk"))
+                .values("item")
+                .annotate(total=Sum("quantity"))
+                .values("total"),
+                output_field=IntegerField(),
+            ),
+            Value(0),
+        )
+        drifted = Item.objects.exclude(current_stock=ledger_total)
+
+        if options["dry_run"]:
+            count = drifted.count()
+            self.stdout.write(f"{count} item(s) differ from the stock ledger.")
+            return
+
+        with transaction.atomic():
+            repaired = drifted.update(current_stock=ledger_total)
+        bump_dashboard_version()
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt stock levels; {repaired} item(s) corrected.")
+        )
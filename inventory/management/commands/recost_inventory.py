@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory.costing import COSTING_METHODS, costing_method, recost_item
+from inventory.models import Item
+
+
+class Command(BaseCommand):
+    help = "Rebuild cost layers and the cost of goods sold of sales and adjustments"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--item",
+            type=int,
+            action="append",
+            help="Only recost this item (may be repeated).",
+        )
+        parser.add_argument(
+            "--since",
+            help="Recost from this date (YYYY-MM-DD) instead of from the start.",
+        )
+        parser.add_argument(
+            "--method",
+            choices=COSTING_METHODS,
+            help="Costing method; defaults to INVENTORY_COSTING_METHOD.",
+        )
+
+    def handle(self, *args, **options):
+        since = None
+        if options["since"]:
+            from django.utils.dateparse import parse_date
+
+            since = parse_date(options["since"])
+            if since is None:
+                raise CommandError("--since must be a date in YYYY-MM-DD format.")
+
+        method = options["method"] or costing_method()
+        item_ids = Item.objects.order_by("pk").values_list("pk", flat=True)
+        if options["item"]:
+            item_ids = item_ids.filter(pk__in=options["item"])
+
+        items = changed = 0
+        # Each item is recosted in its own transaction
+        for item_id in item_ids.iterator():
+            changed += recost_item(item_id, since=since, method=method)
+            items += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Recosted {items} item(s) using {method}; "
+                f"{changed} cost(s) of goods sold changed."
+            )
+        )
@@ -0,0 +1,70 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory.seeding import SeedError, seed
+from main.dashboard import bump_dashboard_version
+
+
+class Command(BaseCommand):
+    help = "Fill an empty database with a generated shop history for load testing"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--items", type=int, default=1000)
+        parser.add_argument("--customers", type=int, default=500)
+        parser.add_argument("--suppliers", type=int, default=50)
+        parser.add_argument(
+            "--years", type=int, default=2, help="Years of history to generate."
+        )
+        parser.add_argument(
+            "--transactions",
+            type=int,
+            default=100_000,
+            help="Approximate number of sales, purchases and adjustments.",
+        )
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--chunk-size", type=int, default=10_000)
+        parser.add_argument(
+            "--backdated",
+            type=float,
+            default=0.05,
+            help="Share of records entered days after their date.",
+        )
+        parser.add_argument(
+            "--recost",
+            action="store_true",
+            help="Also rebuild cost layers and the cost of goods sold.",
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            written = seed(
+                items=options["items"],
+                customers=options["customers"],
+                suppliers=options["suppliers"],
+                years=options["years"],
+                transactions=options["transactions"],
+                seed=options["seed"],
+                chunk_size=options["chunk_size"],
+                backdated=options["backdated"],
+                recost=options["recost"],
+                log=self.stdout.write if options["verbosity"] > 1 else None,
+            )
+        except SeedError as error:
+            raise CommandError(str(error))
+        bump_dashboard_version()
+
+        elapsed = time.perf_counter() - started
+        rows = sum(
+            written[name]
+            for name in ("items", "sales", "purchases", "adjustments", "movements")
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Seeded {written['sales']:,} sales, {written['purchases']:,} "
+                f"purchases and {written['adjustments']:,} adjustments "
+                f"({rows:,} rows, {written['lost_sales']:,} sales lost to "
+                f"stock-outs) in {elapsed:.1f}s: {rows / elapsed:,.0f} rows/s"
+            )
+        )
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:35
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def seed_opening_balances(apps, schema_editor):
+    """Start the ledger from each item's current stock level."""
+    Item = apps.get_model('inventory', 'Item')
+    StockMovement = apps.get_model('inventory', 'StockMovement')
+
+    batch = []
+    for item_id, stock in Item.objects.exclude(current_stock=0).values_list('id', 'current_stock').iterator(chunk_size=2000):
+        batch.append(StockMovement(item_id=item_id, quantity=stock, source='OPENING', reference='Ledger backfill'))
+        if len(batch) >= 2000:
+            StockMovement.objects.bulk_create(batch)
+            batch = []
+    StockMovement.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0027_stockalert'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.IntegerField()),
+                ('source', models.CharField(choices=[('OPENING', 'Opening Stock'), ('SALE', 'Sale'), ('PURCHASE', 'Purchase'), ('ADJUSTMENT', 'Inventory Adjustment'), ('IMPORT', 'CSV Import')], max_length=20)),
+                ('reference', models.CharField(blank=True, default='', max_length=50)),
+                ('timestamp', models.DateTimeField(default=django.utils.timezone.now)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movements', to='inventory.item')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['item', 'timestamp'], name='stockmove_item_ts_idx')],
+            },
+        ),
+        migrations.RunPython(seed_opening_balances, migrations.RunPython.noop),
+    ]
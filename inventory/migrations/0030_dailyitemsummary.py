@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0029_importjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyItemSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('quantity_sold', models.IntegerField(default=0)),
+                ('quantity_bought', models.IntegerField(default=0)),
+                ('quantity_adjusted', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('cost', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_summaries', to='inventory.item')),
+            ],
+            options={
+                'verbose_name_plural': 'daily item summaries',
+                'constraints': [models.UniqueConstraint(fields=('day', 'item'), name='daily_summary_day_item')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0030_dailyitemsummary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inventoryadjustment',
+            index=models.Index(fields=['date', 'id'], name='adjustment_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventoryadjustment',
+            index=models.Index(fields=['item', 'date', 'id'], name='adjustment_item_date_id_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0031_inventoryadjustment_adjustment_date_id_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventoryadjustment',
+            name='cogs',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=14, null=True),
+        ),
+        migrations.CreateModel(
+            name='CostLayer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('quantity', models.PositiveIntegerField()),
+                ('unit_cost', models.DecimalField(decimal_places=4, max_digits=12)),
+                ('cumulative_quantity', models.PositiveBigIntegerField()),
+                ('source', models.CharField(choices=[('OPENING', 'Opening Stock'), ('IMPORT', 'CSV Import'), ('PURCHASE', 'Purchase'), ('ADJUSTMENT', 'Inventory Adjustment')], max_length=20)),
+                ('reference', models.CharField(blank=True, default='', max_length=50)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cost_layers', to='inventory.item')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['item', 'day'], name='costlayer_item_day_idx'), models.Index(fields=['item', 'cumulative_quantity'], name='costlayer_item_cum_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:22
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0032_inventoryadjustment_cogs_costlayer'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(django.db.models.functions.text.Upper('name'), name='category_name_upper_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['created_at'], name='item_created_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(condition=models.Q(('current_stock__lte', models.F('reorder_point'))), fields=['name'], name='item_low_stock_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockalert',
+            index=models.Index(condition=models.Q(('is_resolved', False)), fields=['item', 'alert_type'], name='stockalert_open_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockalert',
+            index=models.Index(condition=models.Q(('is_resolved', False), ('notified_by_email', False)), fields=['alert_type', 'created_at'], name='stockalert_unnotified_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='unitofmeasure',
+            index=models.Index(django.db.models.functions.text.Upper('name'), name='unit_name_upper_idx'),
+        ),
+    ]
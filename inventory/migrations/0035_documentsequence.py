@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:12
+
+import datetime
+
+from django.db import migrations, models
+
+
+def seed_sequences(apps, schema_editor):
+    """Continue each day's numbering after the highest number already used."""
+    DocumentSequence = apps.get_model('inventory', 'DocumentSequence')
+    last_values = {}
+    for model, field in (('sales.Sale', 'sales_number'), ('purchases.Purchase', 'purchase_number')):
+        numbers = apps.get_model(model).objects.values_list(field, flat=True)
+        for number in numbers.iterator(chunk_size=2000):
+            # PREFIX-YYYYMMDD-NNN; anything else cannot collide with new numbers
+            parts = number.split('-')
+            if len(parts) != 3 or not parts[2].isdigit():
+                continue
+            try:
+                day = datetime.datetime.strptime(parts[1], '%Y%m%d').date()
+            except ValueError:
+                continue
+            key = (parts[0], day)
+            last_values[key] = max(last_values.get(key, 0), int(parts[2]))
+    DocumentSequence.objects.bulk_create(
+        [
+            DocumentSequence(prefix=prefix, day=day, last_value=last_value)
+            for (prefix, day), last_value in last_values.items()
+        ],
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0034_item_item_name_idx'),
+        ('purchases', '0005_supplier_supplier_name_idx'),
+        ('sales', '0010_customer_customer_name_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('prefix', models.CharField(max_length=10)),
+                ('day', models.DateField()),
+                ('last_value', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('prefix', 'day'), name='document_sequence_prefix_day')],
+            },
+        ),
+        migrations.RunPython(seed_sequences, migrations.RunPython.noop),
+    ]
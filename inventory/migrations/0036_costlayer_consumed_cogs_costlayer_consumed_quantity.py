@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0035_documentsequence'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='costlayer',
+            name='consumed_cogs',
+            field=models.DecimalField(decimal_places=2, max_digits=14, null=True),
+        ),
+        migrations.AddField(
+            model_name='costlayer',
+            name='consumed_quantity',
+            field=models.PositiveBigIntegerField(null=True),
+        ),
+    ]
@@ -1,6 +1,6 @@
 from django.contrib.auth.models import User
-from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Upper
 from django.utils import timezone
 from django.utils.html import format_html
 
@@ -12,6 +12,12 @@ class UnitOfMeasure(models.Model):
     abbreviation = models.CharField(max_length=10, blank=True, null=True)
     description = models.TextField(blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            # Case-insensitive name lookups (name__iexact compiles to UPPER())
+            models.Index(Upper("name"), name="unit_name_upper_idx"),
+        ]
+
     def __str__(self):
         if self.abbreviation:
             return f"{self.name} ({self.abbreviation})"
@@ -23,6 +29,11 @@ class Category(models.Model):
     name = models.CharField(max_length=50, unique=True)
     description = models.TextField(blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(Upper("name"), name="category_name_upper_idx"),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -46,9 +57,69 @@ class Item(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, null=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Default ordering of the item list
+            models.Index(fields=["created_at"], name="item_created_at_idx"),
+            # Alphabetical listing of the item pickers
+            models.Index(fields=["name"], name="item_name_idx"),
+            # Low-stock filters; the query must use the same predicate
+            models.Index(
+                fields=["name"],
+                condition=models.Q(current_stock__lte=models.F("reorder_point")),
+                name="item_low_stock_idx",
+            ),
+        ]
+
     def save(self, *args, **kwargs):
+        from .costing import record_receipts
+        from .stock import adjust_low_stock_count, is_low_stock
+        from .utils import evaluate_low_stock_alerts
+
         self.full_clean()  # Call full_clean to run validation including clean() method
-        super().save(*args, **kwargs)
+
+        if self._state.adding:
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+                # Opening balance is the first entry in the item's stock ledger
+                if self.current_stock:
+                    movement = StockMovement.objects.create(
+                        item=self,
+                        quantity=self.current_stock,
+                        source=StockMovement.OPENING,
+                    )
+                    record_receipts([movement])
+                low = is_low_stock(self.current_stock, self.reorder_point)
+                adjust_low_stock_count(low)
+                if low:
+                    evaluate_low_stock_alerts([self.pk])
+            return
+
+        if kwargs.get("update_fields") is None:
+            # current_stock is a projection of the StockMovement ledger and is
+            # only written by inventory.stock.apply_stock_delta(), so a stale
+            # in-memory value must never overwrite it here.
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != "current_stock"
+            ]
+        if "reorder_point" not in kwargs["update_fields"]:
+            super().save(*args, **kwargs)
+            return
+
+        with transaction.atomic():
+            current_stock, previous_reorder_point = (
+                Item.objects.select_for_update()
+                .values_list("current_stock", "reorder_point")
+                .get(pk=self.pk)
+            )
+            super().save(*args, **kwargs)
+            adjust_low_stock_count(
+                is_low_stock(current_stock, self.reorder_point)
+                - is_low_stock(current_stock, previous_reorder_point)
+            )
+            evaluate_low_stock_alerts([self.pk])
 
     def __str__(self):
         return self.name
@@ -105,35 +176,103 @@ class InventoryAdjustment(models.Model):
     description = models.TextField(blank=True, null=True)
     date = models.DateTimeField(default=timezone.now)
     created_at = models.DateTimeField(auto_now_add=True, null=True)
+    # Cost of the stock written off by a decrease; see inventory.costing
+    cogs = models.DecimalField(
+        max_digits=14, decimal_places=2, null=True, blank=True, editable=False
+    )
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of all adjustments and of each item's
+            models.Index(fields=["date", "id"], name="adjustment_date_id_idx"),
+            models.Index(
+                fields=["item", "date", "id"], name="adjustment_item_date_id_idx"
+            ),
+        ]
+
+    @property
+    def stock_delta(self):
+        """Signed effect of this adjustment on the item's stock."""
+        if self.adjustment_type == self.INCREASE:
+            return self.quantity_adjusted
+        if self.adjustment_type == self.DECREASE:
+            return -self.quantity_adjusted
+        return 0
 
     def save(self, *args, **kwargs):
+        from .costing import recost_from
+        from .rollups import record_adjustment
+        from .stock import apply_stock_delta
+        from .utils import evaluate_low_stock_alerts
+
         is_new = self._state.adding
+        allow_negative = self.adjustment_type != self.DECREASE
 
-        # Reverse previous adjustment if updating
-        if not is_new:
-            previous = InventoryAdjustment.objects.get(pk=self.pk)
+        try:
+            with transaction.atomic():
+                previous = None
+                if not is_new:
+                    previous = InventoryAdjustment.objects.only(
+                        "item_id", "adjustment_type", "quantity_adjusted", "date"
+                    ).get(pk=self.pk)
 
-            if previous.adjustment_type == self.INCREASE:
-                self.item.current_stock -= previous.quantity_adjusted
-            elif previous.adjustment_type == self.DECREASE:
-                self.item.current_stock += previous.quantity_adjusted
+                # Saved first so the ledger entry can reference the adjustment
+                super().save(*args, **kwargs)
+                reference = f"ADJ-{self.pk}"
 
-        # Apply new adjustment
-        if self.adjustment_type == self.DECREASE:
-            if (
-                self.item.current_stock is not None
-                and self.item.current_stock < self.quantity_adjusted
-            ):
-                raise ValidationError(
-                    f"Cannot decrease stock by {self.quantity_adjusted}."
-                    f" Only {self.item.current_stock} in stock."
-                )
-            self.item.current_stock -= self.quantity_adjusted
-        elif self.adjustment_type == self.INCREASE:
-            self.item.current_stock += self.quantity_adjusted
+                if previous is None:
+                    apply_stock_delta(
+                        self.item,
+                        self.stock_delta,
+                        source=StockMovement.ADJUSTMENT,
+                        reference=reference,
+                        allow_negative=allow_negative,
+                    )
+                elif previous.item_id == self.item_id:  # type: ignore
+                    # Reverse previous adjustment and apply the new one
+                    apply_stock_delta(
+                        self.item,
+                        self.stock_delta - previous.stock_delta,
+                        source=StockMovement.ADJUSTMENT,
+                        reference=reference,
+                        allow_negative=allow_negative,
+                    )
+                else:
+                    apply_stock_delta(
+                        previous.item_id,  # type: ignore
+                        -previous.stock_delta,
+                        source=StockMovement.ADJUSTMENT,
+                        reference=reference,
+                        allow_negative=True,
+                    )
+                    apply_stock_delta(
+                        self.item,
+                        self.stock_delta,
+                        source=StockMovement.ADJUSTMENT,
+                        reference=reference,
+                        allow_negative=allow_negative,
+                    )
 
-        self.item.save()
-        super().save(*args, **kwargs)
+                if previous is not None:
+                    record_adjustment(previous, sign=-1)
+                record_adjustment(self)
+
+                days = [self.date]
+                if previous is not None:
+                    if previous.item_id == self.item_id:  # type: ignore
+                        days.append(previous.date)
+                    else:
+                        recost_from(previous.item_id, previous.date)  # type: ignore
+                recost_from(self.item_id, *days)  # type: ignore
+                evaluate_low_stock_alerts(
+                    {self.item_id, getattr(previous, "item_id", self.item_id)}
+                )
+        except Exception:
+            if is_new:
+                # The insert was rolled back along with the stock change
+                self.pk = None
+                self._state.adding = True
+            raise
 
     def __str__(self):
         return f"{self.adjustment_type} of {self.quantity_adjusted} for {self.item.name} on {self.date}"
@@ -147,5 +286,218 @@ class StockAlert(models.Model):
     is_resolved = models.BooleanField(default=False)
     notified_by_email = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            # Only unresolved alerts are ever looked up by item
+            models.Index(
+                fields=["item", "alert_type"],
+                condition=models.Q(is_resolved=False),
+                name="stockalert_open_idx",
+            ),
+            # Alerts still waiting for the summary email
+            models.Index(
+                fields=["alert_type", "created_at"],
+                condition=models.Q(is_resolved=False, notified_by_email=False),
+                name="stockalert_unnotified_idx",
+            ),
+        ]
+
     def __str__(self):
         return f"{self.alert_type.title()} - {self.item.name}"
+
+
+class StockMovement(models.Model):
+    """
+    Append-only ledger of every change to an item's stock.
+
+    Item.current_stock is a cached projection of SUM(quantity) per item; the
+    rebuild_stock command recomputes it from this table.
+    """
+
+    OPENING = "OPENING"
+    SALE = "SALE"
+    PURCHASE = "PURCHASE"
+    ADJUSTMENT = "ADJUSTMENT"
+    IMPORT = "IMPORT"
+    SOURCE_CHOICES = (
+        (OPENING, "Opening Stock"),
+        (SALE, "Sale"),
+        (PURCHASE, "Purchase"),
+        (ADJUSTMENT, "Inventory Adjustment"),
+        (IMPORT, "CSV Import"),
+    )
+
+    item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name="movements")
+    quantity = models.IntegerField()  # Signed: negative removes stock
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES)
+    reference = models.CharField(max_length=50, blank=True, default="")
+    timestamp = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["item", "timestamp"], name="stockmove_item_ts_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.get_source_display()} {self.quantity:+d} for {self.item.name}"  # type: ignore
+
+
+class CostLayer(models.Model):
+    """
+    A quantity of an item received at one unit cost, consumed by sales,
+    decrease adjustments and stock-lowering CSV imports first in first out or
+    at average cost.
+
+    Derived data: inventory.costing.recost_item() deletes and rebuilds an
+    item's layers from the day of any change to its transactions.
+    """
+
+    OPENING = "OPENING"
+    IMPORT = "IMPORT"
+    PURCHASE = "PURCHASE"
+    ADJUSTMENT = "ADJUSTMENT"
+    SOURCE_CHOICES = (
+        (OPENING, "Opening Stock"),
+        (IMPORT, "CSV Import"),
+        (PURCHASE, "Purchase"),
+        (ADJUSTMENT, "Inventory Adjustment"),
+    )
+
+    item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name="cost_layers")
+    day = models.DateField()
+    quantity = models.PositiveIntegerField()
+    unit_cost = models.DecimalField(max_digits=12, decimal_places=4)
+    # Total quantity received by the item up to and including this layer
+    cumulative_quantity = models.PositiveBigIntegerField()
+    # Quantity issued on days before this layer's and its cost; null until
+    # recost_item() replays the layer
+    consumed_quantity = models.PositiveBigIntegerField(null=True)
+    consumed_cogs = models.DecimalField(max_digits=14, decimal_places=2, null=True)
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES)
+    reference = models.CharField(max_length=50, blank=True, default="")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["item", "day"], name="costlayer_item_day_idx"),
+            models.Index(
+                fields=["item", "cumulative_quantity"], name="costlayer_item_cum_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.quantity} x {self.item.name} @ {self.unit_cost}"  # type: ignore
+
+
+class DailyItemSummary(models.Model):
+    """
+    Per-day, per-item rollup of sales, purchases and adjustments.
+
+    Kept up to date incrementally by the sale, purchase and adjustment write
+    paths (see inventory.rollups) so the dashboard never has to aggregate the
+    raw transaction tables. The backfill_daily_summary command rebuilds it.
+    """
+
+    day = models.DateField()
+    item = models.ForeignKey(
+        Item, on_delete=models.CASCADE, related_name="daily_summaries"
+    )
+    quantity_sold = models.IntegerField(default=0)
+    quantity_bought = models.IntegerField(default=0)
+    quantity_adjusted = models.IntegerField(default=0)  # Signed net adjustment
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    cost = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["day", "item"], name="daily_summary_day_item"
+            )
+        ]
+        verbose_name_plural = "daily item summaries"
+
+    def __str__(self):
+        return f"{self.item.name} on {self.day}"
+
+
+class ImportJob(models.Model):
+    """A CSV item import processed in the background by a Celery task."""
+
+    PENDING = "PENDING"
+    RUNNING = "RUNNING"
+    COMPLETED = "COMPLETED"
+    FAILED = "FAILED"
+    STATUS_CHOICES = (
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (COMPLETED, "Completed"),
+        (FAILED, "Failed"),
+    )
+
+    file = models.FileField(upload_to="imports/")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+
+    total_rows = models.PositiveIntegerField(default=0)
+    rows_done = models.PositiveIntegerField(default=0)
+    rows_failed = models.PositiveIntegerField(default=0)
+    error_report = models.FileField(upload_to="imports/errors/", blank=True)
+    error_message = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    @property
+    def is_finished(self):
+        return self.status in (self.COMPLETED, self.FAILED)
+
+    @property
+    def rows_imported(self):
+        return self.rows_done - self.rows_failed
+
+    @property
+    def rows_per_second(self):
+        if not self.started_at:
+            return 0
+        elapsed = (
+            (self.finished_at or timezone.now()) - self.started_at
+        ).total_seconds()
+        return round(self.rows_done / elapsed, 1) if elapsed > 0 else 0
+
+    def __str__(self):
+        return f"Import #{self.pk} ({self.get_status_display()})"  # type: ignore
+
+
+class DocumentSequence(models.Model):
+    """
+    The last number handed out for one document prefix on one day, e.g. the
+    "SALE" numbers of 2025-01-01. Incremented by inventory.sequences.
+    """
+
+    prefix = models.CharField(max_length=10)
+    day = models.DateField()
+    last_value = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["prefix", "day"], name="document_sequence_prefix_day"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.prefix} {self.day}: {self.last_value}"
+
+
+class Counter(models.Model):
+    """
+    A named running total kept in the database, so that every web and Celery
+    process reads and updates the same value, e.g. the low-stock count of
+    inventory.stock. Changed with F() updates.
+    """
+
+    name = models.CharField(max_length=50, primary_key=True)
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name}: {self.value}"
@@ -0,0 +1,138 @@
+"""
+Incremental maintenance of the DailyItemSummary rollup.
+
+Sales, purchases and inventory adjustments call the record_* helpers in the
+same transaction as their stock change, with sign=-1 to take back what an
+edited or deleted record contributed. rebuild_daily_summaries() recomputes
+the table from the raw transactions.
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, models, transaction
+from django.db.models import F, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+SUMMARY_FIELDS = (
+    "quantity_sold",
+    "quantity_bought",
+    "quantity_adjusted",
+    "revenue",
+    "cost",
+)
+
+
+def _to_day(value):
+    """Converts a date or datetime to the local date it is reported under."""
+    return models.DateField().to_python(value)
+
+
+def record_item_activity(item_id, day, **amounts):
+    """
+    Adds `amounts` (keyword arguments named after SUMMARY_FIELDS) to the
+    summary row of `item_id` on `day`, creating the row if needed.
+    """
+    from .models import DailyItemSummary
+
+    amounts = {field: value for field, value in amounts.items() if value}
+    if not amounts:
+        return
+
+    day = _to_day(day)
+    increments = {field: F(field) + value for field, value in amounts.items()}
+    rows = DailyItemSummary.objects.filter(day=day, item_id=item_id)
+    if rows.update(**increments):
+        return
+    try:
+        with transaction.atomic():
+            DailyItemSummary.objects.create(day=day, item_id=item_id, **amounts)
+    except IntegrityError:
+        # Another writer created the row first
+        rows.update(**increments)
+
+
+def record_sale(sale, sign=1):
+    record_item_activity(
+        sale.item_id,
+        sale.date,
+        quantity_sold=sign * sale.quantity,
+        revenue=sign * sale.quantity * sale.unit_price,
+    )
+
+
+def record_purchase(purchase, sign=1):
+    record_item_activity(
+        purchase.item_id,
+        purchase.date,
+        quantity_bought=sign * purchase.quantity,
+        cost=sign * purchase.quantity * (purchase.unit_cost or 0),
+    )
+
+
+def record_adjustment(adjustment, sign=1):
+    record_item_activity(
+        adjustment.item_id,
+        timezone.localdate(adjustment.date),
+        quantity_adjusted=sign * adjustment.stock_delta,
+    )
+
+
+def rebuild_daily_summaries(since=None, chunk_size=2000):
+    """
+    Recomputes the rollup from sales, purchases and adjustments, replacing
+    existing rows. With `since`, only days from that date on are rebuilt.
+
+    Returns:
+        int: The number of summary rows written.
+    """
+    from purchases.models import Purchase
+    from sales.models import Sale
+
+    from .models import DailyItemSummary, InventoryAdjustment
+
+    sales = Sale.objects.all()
+    purchases = Purchase.objects.all()
+    adjustments = InventoryAdjustment.objects.annotate(day=TruncDate("date"))
+    summaries = DailyItemSummary.objects.all()
+    if since:
+        sales = sales.filter(date__gte=since)
+        purchases = purchases.filter(date__gte=since)
+        adjustments = adjustments.filter(day__gte=since)
+        summaries = summaries.filter(day__gte=since)
+
+    totals = defaultdict(lambda: dict.fromkeys(SUMMARY_FIELDS, 0))
+    for row in sales.values("date", "item_id").annotate(
+        sold=Sum("quantity"), amount=Sum(F("quantity") * F("unit_price"))
+    ):
+        entry = totals[row["date"], row["item_id"]]
+        entry["quantity_sold"] = row["sold"]
+        entry["revenue"] = row["amount"]
+    for row in purchases.values("date", "item_id").annotate(
+        bought=Sum("quantity"),
+        amount=Sum(F("quantity") * Coalesce("unit_cost", Value(Decimal("0")))),
+    ):
+        entry = totals[row["date"], row["item_id"]]
+        entry["quantity_bought"] = row["bought"]
+        entry["cost"] = row["amount"]
+    for row in adjustments.values("day", "item_id", "adjustment_type").annotate(
+        adjusted=Sum("quantity_adjusted")
+    ):
+        sign = {InventoryAdjustment.INCREASE: 1, InventoryAdjustment.DECREASE: -1}.get(
+            row["adjustment_type"], 0
+        )
+        totals[row["day"], row["item_id"]]["quantity_adjusted"] += (
+            sign * row["adjusted"]
+        )
+
+    with transaction.atomic():
+        summaries.delete()
+        DailyItemSummary.objects.bulk_create(
+            (
+                DailyItemSummary(day=day, item_id=item_id, **amounts)
+                for (day, item_id), amounts in totals.items()
+            ),
+            batch_size=chunk_size,
+        )
+    return len(totals)
@@ -0,0 +1,546 @@
+"""
+Synthetic data for load and scale testing.
+
+seed() fills an empty database with items, customers, suppliers and years of
+sales, purchases and adjustments that look like a real shop's history:
+
+* Item popularity follows a Zipf distribution, so a few items make most of
+  the sales and most items sell rarely.
+* Daily volume rises towards December, dips in mid-year and varies by
+  weekday.
+* Stock is simulated day by day: sales never exceed what is on hand, items
+  are restocked by a purchase a few days after they fall to their reorder
+  point, and some sales are lost to stock-outs.
+* A share of records is entered days after the date they carry, as
+  back-dated entries are in practice.
+
+Rows are written with bulk_create() in chunks, together with their
+StockMovement ledger entries, and the same seed always produces the same
+data. The DailyItemSummary rollup and the search index are rebuilt at the
+end; cost layers are only rebuilt on request since that replays every item.
+"""
+
+import math
+import random
+from bisect import bisect
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from itertools import accumulate
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+CATEGORY_NAMES = (
+    "Beverages",
+    "Snacks",
+    "Dairy",
+    "Bakery",
+    "Household",
+    "Personal Care",
+    "Stationery",
+    "Hardware",
+    "Electrical",
+    "Baby Care",
+    "Frozen Foods",
+    "Fresh Produce",
+)
+UNIT_NAMES = (
+    ("Pieces", "pcs"),
+    ("Boxes", "box"),
+    ("Kilograms", "kg"),
+    ("Litres", "l"),
+    ("Packs", "pk"),
+    ("Cartons", "ctn"),
+)
+# Relative sales volume from Monday to Sunday
+WEEKDAY_FACTORS = (0.9, 0.9, 0.95, 1.0, 1.15, 1.3, 0.8)
+ZIPF_EXPONENT = 1.1
+# Mean of 1 + floor(expovariate(0.6)), the quantity of one sale
+MEAN_SALE_QUANTITY = 2.2
+MAX_LEAD_TIME = 7
+SKU_PREFIX = "SEED-"
+CENT = Decimal("0.01")
+
+
+class SeedError(Exception):
+    pass
+
+
+def _bulk_create_dated(model, objs, fields, batch_size=None):
+    """
+    bulk_create() that keeps the generated values of `fields`.
+
+    bulk_create() stamps auto_now/auto_now_add fields with the current time,
+    so the intended values are written back with bulk_update() afterwards.
+    """
+    objs = list(objs)
+    values = [[getattr(obj, name) for name in fields] for obj in objs]
+    objs = model.objects.bulk_create(objs, batch_size=batch_size)
+    for obj, row in zip(objs, values):
+        for name, value in zip(fields, row):
+            setattr(obj, name, value)
+    model.objects.bulk_update(objs, fields, batch_size=batch_size)
+    return objs
+
+
+class _TableWriter:
+    """
+    Buffers rows for one model's table and inserts them chunk_size at a time
+    with executemany(). At this volume, building model instances for
+    bulk_create() costs more than the inserts, so values are passed ready
+    for the database.
+    """
+
+    def __init__(self, model, fields, chunk_size):
+        qn = connection.ops.quote_name
+        columns = [qn(model._meta.get_field(name).column) for name in fields]
+        self.sql = (
+            f"INSERT INTO {qn(model._meta.db_table)} ({', '.join(columns)}) "
+            f"VALUES ({', '.join(['%s'] * len(columns))})"
+        )
+        self.chunk_size = chunk_size
+        self.rows = []
+        self.written = 0
+
+    def add(self, *values):
+        self.rows.append(values)
+        if len(self.rows) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if self.rows:
+            with connection.cursor() as cursor:
+                cursor.executemany(self.sql, self.rows)
+            self.written += len(self.rows)
+            self.rows = []
+
+
+class _Shop:
+    """Generates one day after another, keeping every item's stock level."""
+
+    def __init__(
+        self, rng, chunk_size, items, popularity, customers, suppliers, backdated
+    ):
+        from purchases.models import Purchase
+        from sales.models import Sale
+
+        from .models import StockMovement
+
+        self.rng = rng
+        self.items = items
+        self.customers = [customer.pk for customer in customers]
+        self.suppliers = [supplier.pk for supplier in suppliers]
+        self.backdated = backdated
+        self.stock = [item.current_stock for item in items]
+        self.index = {item.pk: n for n, item in enumerate(items)}
+        self.restocks = {}  # day -> [(item index, quantity)]
+        self.on_order = set()
+        self.popularity = list(accumulate(popularity))
+        # Most sales at list price, some discounted
+        self.prices = [
+            [
+                (item.selling_price * discount).quantize(CENT)
+                for discount in (1, 1, 1, 1, Decimal("0.95"), Decimal("0.9"))
+            ]
+            for item in items
+        ]
+        self.lost_sales = 0
+        self.adjustments = 0
+        self.sequences = {}  # (prefix, day) -> last document number used
+
+        self.sales = _TableWriter(
+            Sale,
+            (
+                "sales_number",
+                "item",
+                "customer",
+                "quantity",
+                "unit_price",
+                "date",
+                "created_at",
+            ),
+            chunk_size,
+        )
+        self.purchases = _TableWriter(
+            Purchase,
+            (
+                "purchase_number",
+                "item",
+                "supplier",
+                "quantity",
+                "unit_cost",
+                "date",
+                "created_at",
+            ),
+            chunk_size,
+        )
+        self.movements = _TableWriter(
+            StockMovement,
+            ("item", "quantity", "source", "reference", "timestamp"),
+            chunk_size,
+        )
+        self.StockMovement = StockMovement
+        # Looked up once: every access through the connection proxy costs
+        self.db_datetime = connection.ops.adapt_datetimefield_value
+
+    def start_day(self, day, end):
+        self.day = day
+        self.day_value = connection.ops.adapt_datefield_value(day)
+        self.day_tag = f"{day:%Y%m%d}"
+        self.opening_time = timezone.make_aware(datetime.combine(day, time(8)))
+        self.end = end
+        self.sale_count = self.purchase_count = 0
+
+    def _entered(self):
+        """When a record dated the current day was typed in."""
+        moment = self.opening_time + timedelta(seconds=self.rng.randrange(36000))
+        if self.rng.random() < self.backdated:
+            moment += timedelta(days=self.rng.randint(1, 14))
+        return min(moment, self.end)
+
+    def _ledger(self, index, quantity, source, reference, timestamp):
+        self.movements.add(
+            self.items[index].pk,
+            quantity,
+            source,
+            reference,
+            self.db_datetime(timestamp),
+        )
+
+    def flush(self):
+        for writer in (self.sales, self.purchases, self.movements):
+            writer.flush()
+
+    @property
+    def rows_written(self):
+        return (
+            self.sales.written
+            + self.purchases.written
+            + self.movements.written
+            + self.adjustments
+        )
+
+    def _pick_item(self):
+        return bisect(self.popularity, self.rng.random() * self.popularity[-1])
+
+    def receive(self):
+        for index, quantity in self.restocks.pop(self.day, ()):
+            item = self.items[index]
+            self.on_order.discard(index)
+            self.purchase_count += 1
+            number = f"PUR-{self.day_tag}-{self.purchase_count:03d}"
+            self.sequences["PUR", self.day] = self.purchase_count
+            entered = self._entered()
+            unit_cost = (
+                item.purchase_price * Decimal(self.rng.uniform(0.9, 1.1))
+            ).quantize(CENT)
+            self.purchases.add(
+                number,
+                item.pk,
+                self.rng.choice(self.suppliers),
+                quantity,
+                unit_cost,
+                self.day_value,
+                self.db_datetime(entered),
+            )
+            self.stock[index] += quantity
+            self._ledger(index, quantity, self.StockMovement.PURCHASE, number, entered)
+
+    def sell(self, count):
+        for _ in range(count):
+            index = self._pick_item()
+            quantity = min(1 + int(self.rng.expovariate(0.6)), self.stock[index])
+            if quantity <= 0:
+                self.lost_sales += 1
+            else:
+                self.sale_count += 1
+                number = f"SALE-{self.day_tag}-{self.sale_count:03d}"
+                self.sequences["SALE", self.day] = self.sale_count
+                entered = self._entered()
+                self.sales.add(
+                    number,
+                    self.items[index].pk,
+                    self.rng.choice(self.customers),
+                    quantity,
+                    self.rng.choice(self.prices[index]),
+                    self.day_value,
+                    self.db_datetime(entered),
+                )
+                self.stock[index] -= quantity
+                self._ledger(index, -quantity, self.StockMovement.SALE, number, entered)
+            self._reorder(index, self.day)
+
+    def _reorder(self, index, day):
+        item = self.items[index]
+        if self.stock[index] > item.reorder_point or index in self.on_order:
+            return
+        lead_time = timedelta(days=self.rng.randint(1, MAX_LEAD_TIME))
+        # Enough for a few weeks of the item's usual demand
+        quantity = item.reorder_point * self.rng.randint(2, 4) + self.rng.randint(5, 20)
+        self.restocks.setdefault(day + lead_time, []).append((index, quantity))
+        self.on_order.add(index)
+
+    def adjust(self, count):
+        from .models import InventoryAdjustment
+
+        adjustments = []
+        for _ in range(count):
+            index = self._pick_item()
+            if self.rng.random() < 0.7:
+                quantity = min(self.rng.randint(1, 3), self.stock[index])
+                if quantity <= 0:
+                    continue
+                kind = InventoryAdjustment.DECREASE
+                reason = self.rng.choice(("DAMAGED", "STOLEN", "STOCK_COUNT_DECREASE"))
+            else:
+                quantity = self.rng.randint(1, 5)
+                kind = InventoryAdjustment.INCREASE
+                reason = "STOCK_COUNT_INCREASE"
+            # Stock counts happen at closing time
+            counted = self.opening_time + timedelta(hours=10)
+            adjustments.append(
+                InventoryAdjustment(
+                    item_id=self.items[index].pk,
+                    adjustment_type=kind,
+                    quantity_adjusted=quantity,
+                    cost_price=self.items[index].purchase_price,
+                    reason=reason,
+                    date=counted,
+                    created_at=max(self._entered(), min(counted, self.end)),
+                )
+            )
+            # Applied now so later picks today see it; the ledger entry
+            # follows once the adjustment has a primary key
+            self.stock[index] += adjustments[-1].stock_delta
+            self._reorder(index, self.day)
+        if adjustments:
+            # Written at once: their ledger references need the primary keys
+            _bulk_create_dated(InventoryAdjustment, adjustments, ["created_at"])
+            self.adjustments += len(adjustments)
+            for adjustment in adjustments:
+                self._ledger(
+                    self.index[adjustment.item_id],
+                    adjustment.stock_delta,
+                    self.StockMovement.ADJUSTMENT,
+                    f"ADJ-{adjustment.pk}",
+                    adjustment.created_at,
+                )
+
+
+def _daily_volume(day):
+    """Relative sales volume of `day`: peaks in December, dips mid-year."""
+    season = 1 + 0.35 * math.cos(2 * math.pi * (day.timetuple().tm_yday - 350) / 365)
+    return season * WEEKDAY_FACTORS[day.weekday()]
+
+
+def seed(
+    *,
+    items=1000,
+    customers=500,
+    suppliers=50,
+    years=2,
+    transactions=100_000,
+    seed=42,
+    chunk_size=10_000,
+    backdated=0.05,
+    recost=False,
+    end=None,
+    log=None,
+):
+    """
+    Generates a shop history ending on `end` (default today).
+
+    `transactions` is the approximate number of sales, purchases and
+    adjustments together. Returns the number of items, sales, purchases,
+    adjustments and ledger movements written, and of sales lost to
+    stock-outs.
+    """
+    from main import search
+    from purchases.models import Purchase, Supplier
+    from sales.models import Customer, Sale
+
+    from .costing import recost_item
+    from .models import (
+        Category,
+        DocumentSequence,
+        InventoryAdjustment,
+        Item,
+        StockAlert,
+        StockMovement,
+        UnitOfMeasure,
+    )
+    from .rollups import rebuild_daily_summaries
+    from .stock import reconcile_low_stock_count
+
+    log = log or (lambda message: None)
+    if Item.objects.filter(sku__startswith=SKU_PREFIX).exists():
+        raise SeedError("The database has already been seeded.")
+    if Sale.objects.exists() or Purchase.objects.exists():
+        raise SeedError("Seeding needs a database without sales or purchases.")
+
+    rng = random.Random(seed)
+    end = end or timezone.localdate()
+    start = end - timedelta(days=365 * years)
+    opened = timezone.make_aware(datetime.combine(start, time(7)))
+    closing = timezone.make_aware(datetime.combine(end, time(23, 59)))
+
+    with transaction.atomic():
+        units = [
+            UnitOfMeasure.objects.get_or_create(
+                name=name, defaults={"abbreviation": abbreviation}
+            )[0]
+            for name, abbreviation in UNIT_NAMES
+        ]
+        categories = [
+            Category.objects.get_or_create(name=name)[0] for name in CATEGORY_NAMES
+        ]
+        days = [start + timedelta(days=n) for n in range((end - start).days + 1)]
+        volumes = [_daily_volume(day) for day in days]
+        # Purchases and adjustments add roughly a sixth on top of sales
+        per_volume = transactions / 1.17 / sum(volumes)
+
+        # Zipf popularity over a random ordering of the items; reorder
+        # points cover the busiest weeks' demand over the lead time
+        ranks = list(range(items))
+        rng.shuffle(ranks)
+        popularity = [1 / (rank + 1) ** ZIPF_EXPONENT for rank in ranks]
+        units_per_day = (
+            transactions / 1.17 / len(days) * MEAN_SALE_QUANTITY / sum(popularity)
+        )
+
+        new_items = []
+        for n in range(items):
+            daily_units = popularity[n] * units_per_day
+            selling_price = Decimal(
+                min(math.exp(rng.gauss(5.5, 1.2)), 250_000)
+            ).quantize(Decimal("0.01")) + Decimal("1")
+            reorder_point = max(
+                rng.randint(5, 15), math.ceil(daily_units * 2 * MAX_LEAD_TIME)
+            )
+            opening_stock = reorder_point * rng.randint(2, 6)
+            category = rng.choice(categories)
+            new_items.append(
+                Item(
+                    name=f"{category.name} Item {n + 1}",
+                    sku=f"{SKU_PREFIX}{n + 1:07d}",
+                    unit=rng.choice(units),
+                    category=category,
+                    selling_price=selling_price,
+                    purchase_price=(
+                        selling_price * Decimal(rng.uniform(0.55, 0.85))
+                    ).quantize(Decimal("0.01")),
+                    opening_stock=opening_stock,
+                    reorder_point=reorder_point,
+                    current_stock=opening_stock,
+                    created_at=opened,
+                    updated_at=opened,
+                )
+            )
+        new_items = Item.objects.bulk_create(new_items, batch_size=chunk_size)
+        # bulk_create() stamped them with the current time
+        Item.objects.filter(sku__startswith=SKU_PREFIX).update(
+            created_at=opened, updated_at=opened
+        )
+        StockMovement.objects.bulk_create(
+            (
+                StockMovement(
+                    item=item,
+                    quantity=item.current_stock,
+                    source=StockMovement.OPENING,
+                    timestamp=opened,
+                )
+                for item in new_items
+            ),
+            batch_size=chunk_size,
+        )
+        new_customers = _bulk_create_dated(
+            Customer,
+            (
+                Customer(name=f"Customer {n + 1}", created_at=opened)
+                for n in range(customers)
+            ),
+            ["created_at"],
+            chunk_size,
+        )
+        new_suppliers = _bulk_create_dated(
+            Supplier,
+            (
+                Supplier(name=f"Supplier {n + 1}", created_at=opened)
+                for n in range(suppliers)
+            ),
+            ["created_at"],
+            chunk_size,
+        )
+        log(f"Created {items} items, {customers} customers, {suppliers} suppliers.")
+
+        shop = _Shop(
+            rng,
+            chunk_size,
+            new_items,
+            popularity,
+            new_customers,
+            new_suppliers,
+            backdated,
+        )
+        for n, (day, volume) in enumerate(zip(days, volumes)):
+            shop.start_day(day, closing)
+            shop.receive()
+            expected = volume * per_volume
+            count = int(expected) + (rng.random() < expected % 1)
+            shop.sell(count)
+            shop.adjust(int(count * 0.02) + (rng.random() < 0.3))
+            if n % 30 == 0:
+                log(f"{day}: {shop.rows_written:,} rows written")
+        shop.flush()
+        # Numbers taken from now on follow the seeded ones
+        DocumentSequence.objects.bulk_create(
+            (
+                DocumentSequence(prefix=prefix, day=day, last_value=last_value)
+                for (prefix, day), last_value in shop.sequences.items()
+            ),
+            batch_size=chunk_size,
+            update_conflicts=True,
+            unique_fields=["prefix", "day"],
+            update_fields=["last_value"],
+        )
+
+        # Final stock levels, and an open alert for every low item
+        for item, stock in zip(new_items, shop.stock):
+            item.current_stock = stock
+        Item.objects.bulk_update(new_items, ["current_stock"], batch_size=chunk_size)
+        StockAlert.objects.bulk_create(
+            (
+                StockAlert(
+                    item=item,
+                    alert_type="low_stock",
+                    message=(
+                        f"Stock for '{item.name}' is low (Current: "
+                        f"{item.current_stock}, Reorder Point: "
+                        f"{item.reorder_point})"
+                    ),
+                    created_at=closing,
+                )
+                for item in new_items
+                if item.current_stock <= item.reorder_point
+            ),
+            batch_size=chunk_size,
+        )
+
+    log("Rebuilding daily summaries...")
+    rebuild_daily_summaries(since=start)
+    log("Rebuilding the search index...")
+    search.rebuild_index()
+    if recost:
+        log("Rebuilding cost layers...")
+        for item in new_items:
+            recost_item(item.pk)
+    reconcile_low_stock_count()
+
+    return {
+        "items": len(new_items),
+        "sales": shop.sales.written,
+        "purchases": shop.purchases.written,
+        "adjustments": shop.adjustments,
+        "movements": shop.movements.written + len(new_items),
+        "lost_sales": shop.lost_sales,
+    }
@@ -0,0 +1,120 @@
+"""
+Document numbers such as SALE-20250101-001 and PUR-20250101-001.
+
+Each document prefix has one DocumentSequence counter per day. Numbers are
+taken by incrementing that counter in a single UPDATE ... RETURNING (under
+select_for_update on backends without RETURNING), so concurrent writers
+never search for a free number or collide on the unique document number.
+
+With DOCUMENT_NUMBER_BLOCK_SIZE above 1 each process reserves that many
+numbers per increment and hands them out from memory, so most numbers cost
+no query at all. Numbers then follow the order of reservation rather than
+of saving, and the unused rest of a block is lost when the process exits.
+Blocks are only reserved outside transactions: a reservation rolled back
+with its transaction would be handed out again to another process.
+
+Numbers taken for a document that then fails to save are not given back,
+in either mode, unless the transaction that took them is rolled back.
+"""
+
+import threading
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .stock import _supports_update_returning
+
+_blocks = {}  # (database, prefix, day) -> [next value, last value]
+_blocks_lock = threading.Lock()
+
+
+def format_number(prefix, day, value):
+    return f"{prefix}-{day:%Y%m%d}-{value:03d}"
+
+
+def _increment_returning(connection, prefix, day, count):
+    from .models import DocumentSequence
+
+    qn = connection.ops.quote_name
+    table = qn(DocumentSequence._meta.db_table)
+    last, prefix_col, day_col = (qn(n) for n in ("last_value", "prefix", "day"))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {table} SET {last} = {last} + %s "
+            f"WHERE {prefix_col} = %s AND {day_col} = %s RETURNING {last}",
+            [count, prefix, connection.ops.adapt_datefield_value(day)],
+        )
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def _increment_locked(using, prefix, day, count):
+    from .models import DocumentSequence
+
+    sequences = DocumentSequence.objects.using(using).filter(prefix=prefix, day=day)
+    last = sequences.select_for_update().values_list("last_value", flat=True).first()
+    if last is None:
+        return None
+    sequences.update(last_value=F("last_value") + count)
+    return last + count
+
+
+def _increment(using, prefix, day, count):
+    """The counter's value after adding `count`, or None if it does not exist."""
+    connection = connections[using]
+    if _supports_update_returning(connection):
+        return _increment_returning(connection, prefix, day, count)
+    return _increment_locked(using, prefix, day, count)
+
+
+def reserve(prefix, count=1, day=None, using=DEFAULT_DB_ALIAS):
+    """
+    Takes `count` consecutive values off the counter of `prefix` for `day`
+    (default today) and returns them as a range.
+    """
+    from .models import DocumentSequence
+
+    day = day or timezone.localdate()
+    with transaction.atomic(using=using, savepoint=False):
+        last = _increment(using, prefix, day, count)
+        if last is None:
+            # First number of the day: create the counter, then increment it
+            # like everyone else in case another process got there first
+            DocumentSequence.objects.using(using).bulk_create(
+                [DocumentSequence(prefix=prefix, day=day)], ignore_conflicts=True
+            )
+            last = _increment(using, prefix, day, count)
+    return range(last - count + 1, last + 1)
+
+
+def _from_block(prefix, count, day, using, block_size):
+    key = (using, prefix, day)
+    with _blocks_lock:
+        block = _blocks.get(key)
+        if block is None or block[1] - block[0] + 1 < count:
+            values = reserve(prefix, max(count, block_size), day, using)
+            block = _blocks[key] = [values.start, values.stop - 1]
+            # Blocks of earlier days are never used again
+            for stale in [k for k in _blocks if k[:2] == key[:2] and k[2] != day]:
+                del _blocks[stale]
+        first = block[0]
+        block[0] += count
+    return range(first, first + count)
+
+
+def next_numbers(prefix, count=1, day=None, using=DEFAULT_DB_ALIAS):
+    """The next `count` document numbers of `prefix` for `day` (default today)."""
+    day = day or timezone.localdate()
+    block_size = getattr(settings, "DOCUMENT_NUMBER_BLOCK_SIZE", 1)
+    if block_size > 1 and not connections[using].in_atomic_block:
+        values = _from_block(prefix, count, day, using, block_size)
+    else:
+        values = reserve(prefix, count, day, using)
+    return [format_number(prefix, day, value) for value in values]
+
+
+def next_number(prefix, day=None, using=DEFAULT_DB_ALIAS):
+    """The next document number of `prefix` for `day` (default today)."""
+    return next_numbers(prefix, 1, day, using)[0]
@@ -0,0 +1,24 @@
+from django.db.models.signals import post_delete
+from django.dispatch import Signal, receiver
+
+from .costing import recost_from
+from .models import InventoryAdjustment, Item
+from .stock import adjust_low_stock_count, deleted_with_item, is_low_stock
+
+# Sent with sender=Sale or Purchase once an order's lines are written. The
+# lines are bulk-created, so no post_save is sent for them.
+order_lines_created = Signal()
+
+
+@receiver(post_delete, sender=Item)
+def update_low_stock_count_on_item_delete(sender, instance, **kwargs):
+    adjust_low_stock_count(
+        -is_low_stock(instance.current_stock, instance.reorder_point)
+    )
+
+
+@receiver(post_delete, sender=InventoryAdjustment)
+def recost_on_adjustment_delete(sender, instance, origin=None, **kwargs):
+    if deleted_with_item(origin):
+        return
+    recost_from(instance.item_id, instance.date)
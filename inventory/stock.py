@@ -0,0 +1,393 @@
+"""
+Atomic stock mutations for Item.current_stock.
+
+Every code path that changes an item's stock level (sales, purchases,
+inventory adjustments and their delete signals) goes through
+apply_stock_delta() so the database applies the change in a single
+conditional UPDATE instead of a read-modify-write in Python, and records
+the change in the StockMovement ledger in the same transaction.
+apply_stock_deltas() does the same for a batch of items in one statement.
+
+It also maintains the count of items at or below their reorder point, a
+Counter row shared by every process, adjusting it whenever a change makes an
+item cross that threshold.
+"""
+
+from django.core.exceptions import ValidationError
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Case, F, QuerySet, Value, When
+from django.utils import timezone
+
+LOW_STOCK_COUNT_KEY = "inventory:low_stock_count"
+
+
+class InsufficientStockError(ValidationError):
+    """
+    Raised when a decrease would take an item's stock below zero.
+
+    Subclasses ValidationError so existing form/model error handling keeps working.
+    """
+
+    def __init__(self, item_id, requested, available):
+        self.item_id = item_id
+        self.requested = requested
+        self.available = available
+        super().__init__(
+            f"Cannot decrease stock by {requested}. Only {available} in stock."
+        )
+
+
+def _supports_update_returning(connection):
+    if connection.vendor == "postgresql":
+        return True
+    if connection.vendor == "sqlite":
+        return connection.Database.sqlite_version_info >= (3, 35)
+    return False
+
+
+def _update_returning(connection, item_id, delta, allow_negative):
+    """
+    Applies the delta with `UPDATE ... RETURNING` so the new level and the
+    reorder point come back in the same round trip. Returns None if no row
+    matched.
+    """
+    from .models import Item
+
+    qn = connection.ops.quote_name
+    table = qn(Item._meta.db_table)
+    stock_col = qn(Item._meta.get_field("current_stock").column)
+    updated_col = qn(Item._meta.get_field("updated_at").column)
+    reorder_col = qn(Item._meta.get_field("reorder_point").column)
+    pk_col = qn(Item._meta.pk.column)  # type: ignore
+
+    sql = (
+        f"UPDATE {table} SET {stock_col} = {stock_col} + %s, {updated_col} = %s "
+        f"WHERE {pk_col} = %s"
+    )
+    params = [
+        delta,
+        connection.ops.adapt_datetimefield_value(timezone.now()),
+        item_id,
+    ]
+    if not allow_negative and delta < 0:
+        sql += f" AND {stock_col} >= %s"
+        params.append(-delta)
+    sql += f" RETURNING {stock_col}, {reorder_col}"
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchone()
+
+
+def _update_locked(using, item_id, delta, allow_negative):
+    """
+    Fallback for backends without UPDATE ... RETURNING: lock the row, check
+    the level and apply the delta. Runs inside the caller's transaction.
+    """
+    from .models import Item
+
+    row = (
+        Item.objects.using(using)
+        .select_for_update()
+        .filter(pk=item_id)
+        .values_list("current_stock", "reorder_point")
+        .first()
+    )
+    if row is None:
+        return None
+    current, reorder_point = row
+    if not allow_negative and current + delta < 0:
+        return None
+    Item.objects.using(using).filter(pk=item_id).update(
+        current_stock=F("current_stock") + delta, updated_at=timezone.now()
+    )
+    return current + delta, reorder_point
+
+
+def apply_stock_delta(
+    item,
+    delta,
+    *,
+    source,
+    reference="",
+    allow_negative=False,
+    using=DEFAULT_DB_ALIAS,
+):
+    """
+    Atomically adds `delta` to an item's current stock and appends the
+    matching StockMovement ledger entry.
+
+    Args:
+        item: An Item instance or primary key. When an instance is given its
+              in-memory current_stock is refreshed with the new level.
+        delta (int): Signed quantity to add (negative to remove stock).
+        source (str): One of the StockMovement source constants.
+        reference (str): Document number or id the movement belongs to.
+        allow_negative (bool): Skip the `current_stock >= needed` guard. Used by
+              paths that historically allowed stock to dip below zero, such as
+              reversing a purchase.
+        using (str): Database alias.
+
+    Returns:
+        int: The item's stock level after the change.
+
+    Raises:
+        InsufficientStockError: If the decrease would take stock below zero.
+        Item.DoesNotExist: If the item no longer exists.
+    """
+    from .models import Item, StockMovement
+
+    item_id = getattr(item, "pk", item)
+    if delta == 0 and isinstance(item, Item):
+        return item.current_stock
+
+    connection = connections[using]
+    with transaction.atomic(using=using, savepoint=False):
+        if _supports_update_returning(connection):
+            row = _update_returning(connection, item_id, delta, allow_negative)
+        else:
+            row = _update_locked(using, item_id, delta, allow_negative)
+
+        if row is not None and delta:
+            StockMovement.objects.using(using).create(
+                item_id=item_id, quantity=delta, source=source, reference=reference
+            )
+            new_level, reorder_point = row
+            # Only items crossing the reorder point change the count
+            adjust_low_stock_count(
+                is_low_stock(new_level, reorder_point)
+                - is_low_stock(new_level - delta, reorder_point),
+                using=using,
+            )
+
+    # Raised outside the atomic block so callers that catch it can carry on
+    # with their own transaction.
+    if row is None:
+        available = (
+            Item.objects.using(using)
+            .filter(pk=item_id)
+            .values_list("current_stock", flat=True)
+            .first()
+        )
+        if available is None:
+            raise Item.DoesNotExist(f"Item {item_id} does not exist.")
+        raise InsufficientStockError(item_id, -delta, available)
+
+    new_level = row[0]
+    if isinstance(item, Item):
+        item.current_stock = new_level
+    return new_level
+
+
+def _bulk_update_returning(connection, totals, allow_negative):
+    """
+    Applies every item's delta in one `UPDATE ... RETURNING`. Items whose
+    decrease would take them below zero are left out of the result.
+    """
+    from .models import Item
+
+    qn = connection.ops.quote_name
+    table = qn(Item._meta.db_table)
+    stock_col = qn(Item._meta.get_field("current_stock").column)
+    updated_col = qn(Item._meta.get_field("updated_at").column)
+    reorder_col = qn(Item._meta.get_field("reorder_point").column)
+    pk_col = qn(Item._meta.pk.column)  # type: ignore
+
+    def case(values, default):
+        whens = " ".join([f"WHEN {pk_col} = %s THEN %s"] * len(values))
+        params = [value for pair in values.items() for value in pair]
+        return f"CASE {whens} ELSE {default} END", params
+
+    delta_sql, delta_params = case(totals, "0")
+    placeholders = ", ".join(["%s"] * len(totals))
+    sql = (
+        f"UPDATE {table} SET {stock_col} = {stock_col} + {delta_sql}, "
+        f"{updated_col} = %s WHERE {pk_col} IN ({placeholders})"
+    )
+    params = [
+        *delta_params,
+        connection.ops.adapt_datetimefield_value(timezone.now()),
+        *totals,
+    ]
+    needed = {pk: -delta for pk, delta in totals.items() if delta < 0}
+    if needed and not allow_negative:
+        guard_sql, guard_params = case(needed, stock_col)
+        sql += f" AND {stock_col} >= {guard_sql}"
+        params += guard_params
+    sql += f" RETURNING {pk_col}, {stock_col}, {reorder_col}"
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return {pk: (level, reorder) for pk, level, reorder in cursor.fetchall()}
+
+
+def _bulk_update_locked(using, totals, allow_negative):
+    """Fallback for backends without UPDATE ... RETURNING."""
+    from .models import Item
+
+    rows = {
+        pk: (current + totals[pk], reorder)
+        for pk, current, reorder in Item.objects.using(using)
+        .select_for_update()
+        .filter(pk__in=totals)
+        .values_list("pk", "current_stock", "reorder_point")
+        if allow_negative or current + totals[pk] >= 0
+    }
+    Item.objects.using(using).filter(pk__in=rows).update(
+        current_stock=F("current_stock")
+        + Case(*(When(pk=pk, then=Value(totals[pk])) for pk in rows), default=0),
+        updated_at=timezone.now(),
+    )
+    return rows
+
+
+def apply_stock_deltas(
+    changes, *, source, allow_negative=False, using=DEFAULT_DB_ALIAS
+):
+    """
+    The batch form of apply_stock_delta(): applies the stock changes of many
+    items with one UPDATE and appends their ledger entries with one
+    bulk_create. Either every change is applied or none is.
+
+    Args:
+        changes: (item id, signed quantity, reference) tuples, one per ledger
+              entry; an item may appear more than once.
+        source (str): One of the StockMovement source constants.
+        allow_negative (bool): Skip the `current_stock >= needed` guard.
+        using (str): Database alias.
+
+    Returns:
+        dict: The stock level of each item after the changes, by item id.
+
+    Raises:
+        InsufficientStockError: For the first item whose stock would go
+              below zero.
+        Item.DoesNotExist: If an item no longer exists.
+    """
+    from .models import Item, StockMovement
+
+    changes = [change for change in changes if change[1]]
+    totals = {}
+    for item_id, delta, _reference in changes:
+        totals[item_id] = totals.get(item_id, 0) + delta
+    totals = {item_id: delta for item_id, delta in totals.items() if delta}
+    if not totals:
+        return {}
+
+    connection = connections[using]
+    # A savepoint, so a refused batch takes back the rows already updated
+    with transaction.atomic(using=using):
+        if _supports_update_returning(connection):
+            rows = _bulk_update_returning(connection, totals, allow_negative)
+        else:
+            rows = _bulk_update_locked(using, totals, allow_negative)
+        refused = [item_id for item_id in totals if item_id not in rows]
+        if not refused:
+            StockMovement.objects.using(using).bulk_create(
+                StockMovement(
+                    item_id=item_id, quantity=delta, source=source, reference=reference
+                )
+                for item_id, delta, reference in changes
+            )
+            adjust_low_stock_count(
+                sum(
+                    is_low_stock(level, reorder)
+                    - is_low_stock(level - totals[item_id], reorder)
+                    for item_id, (level, reorder) in rows.items()
+                ),
+                using=using,
+            )
+        else:
+            transaction.set_rollback(True, using=using)
+
+    if refused:
+        item_id = refused[0]
+        available = (
+            Item.objects.using(using)
+            .filter(pk=item_id)
+            .values_list("current_stock", flat=True)
+            .first()
+        )
+        if available is None:
+            raise Item.DoesNotExist(f"Item {item_id} does not exist.")
+        raise InsufficientStockError(item_id, -totals[item_id], available)
+
+    return {item_id: level for item_id, (level, _reorder) in rows.items()}
+
+
+def is_low_stock(current_stock, reorder_point):
+    """Whether a stock level is at or below the item's reorder point."""
+    return reorder_point is not None and current_stock <= reorder_point
+
+
+def count_low_stock_items(using=DEFAULT_DB_ALIAS):
+    """Counts low-stock items from scratch (a full scan of the item table)."""
+    from .models import Item
+
+    return (
+        Item.objects.using(using).filter(current_stock__lte=F("reorder_point")).count()
+    )
+
+
+def get_low_stock_count():
+    """
+    Returns the maintained low-stock count, a single primary key lookup. The
+    count is only computed from the item table when its row is missing.
+    """
+    from .models import Counter
+
+    count = (
+        Counter.objects.filter(name=LOW_STOCK_COUNT_KEY)
+        .values_list("value", flat=True)
+        .first()
+    )
+    if count is None:
+        counter, _created = Counter.objects.get_or_create(
+            name=LOW_STOCK_COUNT_KEY, defaults={"value": count_low_stock_items()}
+        )
+        count = counter.value
+    return count
+
+
+def reconcile_low_stock_count():
+    """Recomputes the low-stock count and stores it. Returns the new count."""
+    from .models import Counter
+
+    count = count_low_stock_items()
+    Counter.objects.update_or_create(
+        name=LOW_STOCK_COUNT_KEY, defaults={"value": count}
+    )
+    return count
+
+
+def adjust_low_stock_count(delta, using=DEFAULT_DB_ALIAS):
+    """
+    Adds `delta` to the maintained low-stock count once the current
+    transaction commits, so rolled-back changes never reach the counter.
+    """
+    if not delta:
+        return
+
+    from .models import Counter
+
+    def apply():
+        # Without a row this does nothing; the next lookup counts the items
+        Counter.objects.using(using).filter(name=LOW_STOCK_COUNT_KEY).update(
+            value=F("value") + delta
+        )
+
+    # A failure to update it (e.g. a locked SQLite database) must not fail the
+    # committed write; the reconcile task corrects the count
+    transaction.on_commit(apply, using=using, robust=True)
+
+
+def deleted_with_item(origin):
+    """
+    True when a post_delete signal was triggered by deleting the item itself,
+    in which case there is no stock left to restore.
+    """
+    from .models import Item
+
+    return isinstance(origin, Item) or (
+        isinstance(origin, QuerySet) and origin.model is Item
+    )
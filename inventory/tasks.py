@@ -1,37 +1,103 @@
+import json
+import logging
+
 from celery import shared_task
-from django.conf import settings
-from django.core.mail import EmailMultiAlternatives
-from django.db import models
-from django.template.loader import render_to_string
+from django.core.cache import cache
+from django.core.files.base import ContentFile
 from django.utils.timezone import now
 
-from .models import Item
+from .models import ImportJob
+from .stock import reconcile_low_stock_count
+from .utils import (
+    count_csv_rows,
+    generate_import_error_csv,
+    process_item_csv_upload,
+    reconcile_low_stock_alerts,
+    send_low_stock_summary,
+)
+
+logger = logging.getLogger("stockflow.tasks")
+
+ALERT_SCAN_LOCK_KEY = "inventory:alert_scan_lock"
+ALERT_SCAN_STATS_KEY = "inventory:alert_scan_stats"
+# Longest a scan may hold the lock, in seconds
+ALERT_SCAN_LOCK_TIMEOUT = 15 * 60
 
 
 @shared_task
 def send_low_stock_summary_email():
-    low_stock_items = Item.objects.filter(current_stock__lt=models.F("reorder_point"))
-
-    if not low_stock_items.exists():
-        return  # Nothing to send
-
-    subject = "[Stockflow] Daily Low Stock Summary"
-    from_email = settings.DEFAULT_FROM_EMAIL
-    to = [settings.EMAIL_HOST_USER]
-
-    context = {
-        "items": low_stock_items,
-        "date": now(),
-    }
-
-    html_content = render_to_string("emails/low_stock_summary.html", context)
-    text_content = "Low stock items:\n\n" + "\n".join(
-        [
-            f"{item.name} (SKU: {item.sku}) — Stock: {item.current_stock}, Reorder point: {item.reorder_point}"
-            for item in low_stock_items
-        ]
-    )
-
-    msg = EmailMultiAlternatives(subject, text_content, from_email, to)
-    msg.attach_alternative(html_content, "text/html")
-    msg.send()
+    """Emails every item with an open low-stock alert."""
+    return send_low_stock_summary()
+
+
+@shared_task
+def reconcile_low_stock_count_task():
+    """
+    Periodically recomputes the maintained low-stock count from the item
+    table, correcting any drift from writes that bypassed the stock paths.
+    """
+    return reconcile_low_stock_count()
+
+
+@shared_task
+def reconcile_low_stock_alerts_task():
+    """
+    Repairs open low-stock alerts that have drifted from stock levels. Meant
+    to run every minute; a run that starts while another is still scanning
+    does nothing. The scan's figures are logged to "stockflow.tasks" and
+    kept under ALERT_SCAN_STATS_KEY.
+    """
+    # Expires on its own should a worker die mid-scan
+    if not cache.add(ALERT_SCAN_LOCK_KEY, True, timeout=ALERT_SCAN_LOCK_TIMEOUT):
+        return None
+    try:
+        stats = reconcile_low_stock_alerts()
+    finally:
+        cache.delete(ALERT_SCAN_LOCK_KEY)
+    stats["finished_at"] = now().isoformat()
+    cache.set(ALERT_SCAN_STATS_KEY, stats, timeout=None)
+    logger.info(json.dumps({"task": "reconcile_low_stock_alerts", **stats}))
+    return stats
+
+
+@shared_task
+def import_items_task(job_id):
+    """
+    Imports the CSV stored on an ImportJob in committed batches, recording
+    progress on the job after each batch so the import page can poll it.
+    """
+    job = ImportJob.objects.get(pk=job_id)
+    job.status = ImportJob.RUNNING
+    job.started_at = now()
+    job.save(update_fields=["status", "started_at"])
+
+    def record_progress(rows_done, rows_failed):
+        ImportJob.objects.filter(pk=job_id).update(
+            rows_done=rows_done, rows_failed=rows_failed
+        )
+
+    try:
+        with job.file.open("rb"):
+            job.total_rows = count_csv_rows(job.file)
+            job.save(update_fields=["total_rows"])
+            result = process_item_csv_upload(job.file, on_batch=record_progress)
+    except Exception as e:
+        job.status = ImportJob.FAILED
+        job.error_message = str(e)
+        job.finished_at = now()
+        job.save(update_fields=["status", "error_message", "finished_at"])
+        raise
+
+    job.total_rows = result["total_rows"]
+    job.rows_done = result["total_rows"]
+    job.rows_failed = result["failed_imports"]
+    if result["errors"]:
+        report = generate_import_error_csv(result["errors"])
+        job.error_report.save(
+            f"import_{job.pk}_errors.csv",
+            ContentFile(report.getvalue().encode("utf-8")),
+            save=False,
+        )
+    job.status = ImportJob.COMPLETED
+    job.finished_at = now()
+    job.save()
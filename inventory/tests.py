@@ -1,3 +1,1377 @@
-from django.test import TestCase
+import codecs
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from decimal import Decimal
+from io import BytesIO, StringIO
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, connection
+from django.db.models import F, Sum
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from main import search
+from main.dashboard import get_dashboard_version
+from purchases.models import Purchase, Supplier
+from sales.models import Customer, Sale
+
+from . import sequences
+from .context_processors import low_stock_alerts
+from .forms import InventoryAdjustmentForm
+from .models import (
+    CostLayer,
+    Counter,
+    DailyItemSummary,
+    DocumentSequence,
+    ImportJob,
+    InventoryAdjustment,
+    Item,
+    StockAlert,
+    StockMovement,
+    UnitOfMeasure,
+)
+from .sequences import next_number, reserve
+from .stock import (
+    LOW_STOCK_COUNT_KEY,
+    InsufficientStockError,
+    apply_stock_delta,
+    apply_stock_deltas,
+    count_low_stock_items,
+    get_low_stock_count,
+)
+from .tasks import (
+    ALERT_SCAN_LOCK_KEY,
+    ALERT_SCAN_STATS_KEY,
+    reconcile_low_stock_alerts_task,
+    reconcile_low_stock_count_task,
+    send_low_stock_summary_email,
+)
+from .utils import (
+    evaluate_low_stock_alerts,
+    process_item_csv_upload,
+    reconcile_low_stock_alerts,
+)
+
+
+def make_item(**kwargs):
+    unit = UnitOfMeasure.objects.get_or_create(name="Pieces")[0]
+    defaults = {
+        "name": "Widget",
+        "sku": "SKU-001",
+        "unit": unit,
+        "selling_price": 10,
+        "purchase_price": 6,
+        "current_stock": 0,
+    }
+    defaults.update(kwargs)
+    return Item.objects.create(**defaults)
+
+
+class ApplyStockDeltaTests(TestCase):
+    def setUp(self):
+        self.item = make_item(current_stock=10)
+
+    def test_returns_new_level_and_refreshes_instance(self):
+        self.assertEqual(apply_stock_delta(self.item, -4, source=StockMovement.SALE), 6)
+        self.assertEqual(self.item.current_stock, 6)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.current_stock, 6)
+
+    def test_rejects_decrease_below_zero(self):
+        with self.assertRaises(InsufficientStockError) as ctx:
+            apply_stock_delta(self.item.pk, -11, source=StockMovement.SALE)
+        self.assertEqual(ctx.exception.available, 10)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.current_stock, 10)
+
+    def test_allow_negative(self):
+        level = apply_stock_delta(
+            self.item.pk, -11, source=StockMovement.SALE, allow_negative=True
+        )
+        self.assertEqual(level, -1)
+
+    def test_missing_item(self):
+        with self.assertRaises(Item.DoesNotExist):
+            apply_stock_delta(self.item.pk + 1000, 1, source=StockMovement.PURCHASE)
+
+
+class ApplyStockDeltasTests(TestCase):
+    def setUp(self):
+        self.a = make_item(sku="SKU-A", current_stock=10, reorder_point=5)
+        self.b = make_item(sku="SKU-B", current_stock=3)
+        self.assertEqual(get_low_stock_count(), 0)
+
+    def test_applies_batch_in_one_update(self):
+        with (
+            self.captureOnCommitCallbacks(execute=True),
+            CaptureQueriesContext(connection) as ctx,
+        ):
+            levels = apply_stock_deltas(
+                [(self.a.pk, -4, "R1"), (self.b.pk, 2, "R2"), (self.a.pk, -2, "R3")],
+                source=StockMovement.SALE,
+            )
+        self.assertEqual(levels, {self.a.pk: 4, self.b.pk: 5})
+        updates = [q for q in ctx.captured_queries if q["sql"].startswith("UPDATE")]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(
+            list(
+                StockMovement.objects.filter(source=StockMovement.SALE)
+                .order_by("pk")
+                .values_list("quantity", "reference")
+            ),
+            [(-4, "R1"), (2, "R2"), (-2, "R3")],
+        )
+        self.assertEqual(get_low_stock_count(), 1)
+
+    def test_refuses_whole_batch_if_one_item_would_go_negative(self):
+        with self.assertRaises(InsufficientStockError) as ctx:
+            apply_stock_deltas(
+                [(self.a.pk, -1, "R1"), (self.b.pk, -4, "R2")],
+                source=StockMovement.SALE,
+            )
+        self.assertEqual(ctx.exception.available, 3)
+        self.assertEqual(
+            list(Item.objects.order_by("pk").values_list("current_stock", flat=True)),
+            [10, 3],
+        )
+        self.assertFalse(
+            StockMovement.objects.filter(source=StockMovement.SALE).exists()
+        )
+
+    def test_missing_item(self):
+        with self.assertRaises(Item.DoesNotExist):
+            apply_stock_deltas(
+                [(self.a.pk, 1, ""), (self.b.pk + 1000, 1, "")],
+                source=StockMovement.PURCHASE,
+            )
+        self.a.refresh_from_db()
+        self.assertEqual(self.a.current_stock, 10)
+
+
+class EvaluateLowStockAlertsTests(TestCase):
+    def test_opens_and_resolves_alerts_for_a_set_of_items(self):
+        low = make_item(sku="SKU-LOW", current_stock=50, reorder_point=5)
+        alerted = make_item(sku="SKU-ALERTED", current_stock=1, reorder_point=5)
+        recovered = make_item(sku="SKU-OK", current_stock=1, reorder_point=5)
+        # Changed behind the alerts' back
+        Item.objects.filter(pk=low.pk).update(current_stock=2)
+        Item.objects.filter(pk=recovered.pk).update(current_stock=50)
+
+        with self.assertNumQueries(3):
+            evaluate_low_stock_alerts({low.pk, alerted.pk, recovered.pk})
+
+        open_alerts = StockAlert.objects.filter(is_resolved=False)
+        self.assertEqual(
+            sorted(open_alerts.values_list("item", flat=True)), [low.pk, alerted.pk]
+        )
+        self.assertIn("Current: 2", open_alerts.get(item=low).message)
+
+    def assertAlerted(self, item, expected):
+        self.assertEqual(
+            StockAlert.objects.filter(item=item, is_resolved=False).count(),
+            int(expected),
+        )
+
+    def test_every_stock_change_updates_alerts(self):
+        item = make_item(current_stock=6, reorder_point=5)
+        customer = Customer.objects.create(name="Walk-in")
+        self.assertAlerted(item, False)
+
+        adjustment = InventoryAdjustment.objects.create(
+            item=item,
+            adjustment_type=InventoryAdjustment.DECREASE,
+            quantity_adjusted=2,
+            reason="DAMAGED",
+        )
+        self.assertAlerted(item, True)
+
+        adjustment.quantity_adjusted = 1
+        adjustment.save()
+        self.assertAlerted(item, True)
+
+        sale = Sale.objects.create(
+            item=item, customer=customer, quantity=1, unit_price=10
+        )
+        sale.delete()
+        self.assertAlerted(item, True)
+
+        item.reorder_point = 2
+        item.save()
+        self.assertAlerted(item, False)
+
+    def test_deleting_adjustments_updates_alerts(self):
+        self.client.force_login(User.objects.create_user("clerk", password="x"))
+        items = [
+            make_item(sku=f"SKU-{n}", current_stock=4, reorder_point=5)
+            for n in range(2)
+        ]
+        adjustments = [
+            InventoryAdjustment.objects.create(
+                item=item,
+                adjustment_type=InventoryAdjustment.INCREASE,
+                quantity_adjusted=3,
+                reason="OTHER_INCREASE",
+            )
+            for item in items
+        ]
+        for item in items:
+            self.assertAlerted(item, False)
+
+        self.client.post(reverse("delete_adjustment", args=[adjustments[0].pk]))
+        self.assertAlerted(items[0], True)
+
+        InventoryAdjustment.objects.create(
+            item=items[0],
+            adjustment_type=InventoryAdjustment.INCREASE,
+            quantity_adjusted=3,
+            reason="OTHER_INCREASE",
+        )
+        self.assertAlerted(items[0], False)
+        self.client.post(reverse("delete_all_adjustments"))
+        for item in items:
+            self.assertAlerted(item, True)
+
+    def test_new_item_below_reorder_point_is_alerted(self):
+        self.assertAlerted(make_item(current_stock=1, reorder_point=5), True)
+
+    def test_csv_import_updates_alerts(self):
+        recovered = make_item(sku="SKU-001", current_stock=1, reorder_point=5)
+        StockAlert.objects.create(item=recovered, alert_type="low_stock", message="")
+        header = ItemCsvImportTests.header
+        rows = "Widget,SKU-001,pcs,,10,6,,5,20\nGadget,SKU-002,pcs,,10,6,,5,3\n"
+        process_item_csv_upload(
+            SimpleUploadedFile("items.csv", (header + rows).encode("utf-8"))
+        )
+        self.assertAlerted(recovered, False)
+        self.assertAlerted(Item.objects.get(sku="SKU-002"), True)
+
+
+class ReconcileLowStockAlertsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.items = [
+            make_item(sku=f"SKU-{n}", current_stock=10, reorder_point=5)
+            for n in range(7)
+        ]
+
+    def drift(self, item, stock):
+        Item.objects.filter(pk=item.pk).update(current_stock=stock)
+
+    def open_alerts(self):
+        return sorted(
+            StockAlert.objects.filter(is_resolved=False).values_list("item", flat=True)
+        )
+
+    def test_repairs_drifted_alerts_chunk_by_chunk(self):
+        evaluate_low_stock_alerts([self.items[1].pk])
+        self.drift(self.items[1], 3)
+        evaluate_low_stock_alerts([self.items[1].pk])
+        self.drift(self.items[1], 30)
+        self.drift(self.items[4], 0)
+        self.drift(self.items[6], 5)
+
+        # One streamed read, one alert lookup per chunk of 3, then one
+        # bulk_create and one update() for the chunks that differ
+        with self.assertNumQueries(1 + 3 + 3):
+            stats = reconcile_low_stock_alerts(chunk_size=3)
+
+        self.assertEqual(self.open_alerts(), [self.items[4].pk, self.items[6].pk])
+        self.assertEqual(stats["items"], 7)
+        self.assertEqual(stats["opened"], 2)
+        self.assertEqual(stats["resolved"], 1)
+        self.assertGreater(stats["rows_per_second"], 0)
+
+        # A second scan finds nothing to do
+        stats = reconcile_low_stock_alerts(chunk_size=3)
+        self.assertEqual((stats["opened"], stats["resolved"]), (0, 0))
+
+    def test_task_records_its_stats(self):
+        self.drift(self.items[0], 1)
+        with self.assertLogs("stockflow.tasks") as logs:
+            stats = reconcile_low_stock_alerts_task()
+        self.assertEqual(stats["opened"], 1)
+        self.assertEqual(cache.get(ALERT_SCAN_STATS_KEY), stats)
+        self.assertIn('"rows_per_second"', logs.output[0])
+        self.assertIsNone(cache.get(ALERT_SCAN_LOCK_KEY))
+
+    def test_task_skips_while_another_scan_runs(self):
+        cache.add(ALERT_SCAN_LOCK_KEY, True)
+        self.drift(self.items[0], 1)
+        self.assertIsNone(reconcile_low_stock_alerts_task())
+        self.assertEqual(self.open_alerts(), [])
+
+    @override_settings(EMAIL_HOST_USER="owner@example.com")
+    def test_summary_emails_agree(self):
+        self.drift(self.items[2], 1)
+        self.drift(self.items[3], 5)
+        reconcile_low_stock_alerts()
+
+        self.assertEqual(send_low_stock_summary_email(), 2)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn("SKU-2", mail.outbox[0].body)
+        self.assertIn("SKU-3", mail.outbox[0].body)
+
+        # The command only sends alerts no email has covered yet
+        out = StringIO()
+        call_command("check_and_email_stock", stdout=out)
+        self.assertIn("No new low stock alerts", out.getvalue())
+        self.drift(self.items[5], 0)
+        reconcile_low_stock_alerts()
+        call_command("check_and_email_stock", stdout=out)
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertIn("SKU-5", mail.outbox[1].body)
+        self.assertNotIn("SKU-2", mail.outbox[1].body)
+
+
+class StockMutationPathTests(TestCase):
+    def setUp(self):
+        self.item = make_item(current_stock=10)
+        self.other = make_item(name="Gadget", sku="SKU-002", current_stock=5)
+        self.customer = Customer.objects.create(name="Walk-in")
+        self.supplier = Supplier.objects.create(name="Acme")
+
+    def assertStock(self, item, expected):
+        item.refresh_from_db()
+        self.assertEqual(item.current_stock, expected)
+
+    def test_sale_create_edit_delete(self):
+        sale = Sale.objects.create(
+            item=self.item, customer=self.customer, quantity=3, unit_price=10
+        )
+        self.assertStock(self.item, 7)
+
+        sale.quantity = 5
+        sale.save()
+        self.assertStock(self.item, 5)
+
+        sale.item = self.other
+        sale.save()
+        self.assertStock(self.item, 10)
+        self.assertStock(self.other, 0)
+
+        sale.delete()
+        self.assertStock(self.other, 5)
+
+    def test_purchase_create_edit_delete(self):
+        purchase = Purchase.objects.create(
+            item=self.item, supplier=self.supplier, quantity=4, unit_cost=6
+        )
+        self.assertStock(self.item, 14)
+
+        purchase.quantity = 1
+        purchase.save()
+        self.assertStock(self.item, 11)
+
+        purchase.delete()
+        self.assertStock(self.item, 10)
+
+    def test_adjustment_create_and_edit(self):
+        adjustment = InventoryAdjustment.objects.create(
+            item=self.item,
+            adjustment_type=InventoryAdjustment.DECREASE,
+            quantity_adjusted=4,
+            reason="DAMAGED",
+        )
+        self.assertStock(self.item, 6)
+
+        adjustment.adjustment_type = InventoryAdjustment.INCREASE
+        adjustment.save()
+        self.assertStock(self.item, 14)
+
+        with self.assertRaises(InsufficientStockError):
+            InventoryAdjustment.objects.create(
+                item=self.item,
+                adjustment_type=InventoryAdjustment.DECREASE,
+                quantity_adjusted=15,
+                reason="DAMAGED",
+            )
+        self.assertStock(self.item, 14)
+
+
+class StockLedgerTests(TestCase):
+    def setUp(self):
+        self.item = make_item(current_stock=10)
+        self.customer = Customer.objects.create(name="Walk-in")
+
+    def ledger_total(self, item):
+        return sum(item.movements.values_list("quantity", flat=True))
+
+    def test_every_write_is_recorded(self):
+        sale = Sale.objects.create(
+            item=self.item, customer=self.customer, quantity=3, unit_price=10
+        )
+        sale.quantity = 1
+        sale.save()
+        sale.delete()
+
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.current_stock, 10)
+        self.assertEqual(self.ledger_total(self.item), 10)
+        self.assertEqual(
+            list(self.item.movements.values_list("source", "quantity")),
+            [
+                (StockMovement.OPENING, 10),
+                (StockMovement.SALE, -3),
+                (StockMovement.SALE, 2),
+                (StockMovement.SALE, 1),
+            ],
+        )
+
+    def test_item_save_does_not_overwrite_stock(self):
+        stale = Item.objects.get(pk=self.item.pk)
+        apply_stock_delta(self.item, -4, source=StockMovement.SALE)
+        stale.name = "Renamed"
+        stale.save()
+
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.current_stock, 6)
+        self.assertEqual(self.item.name, "Renamed")
+
+    def test_deleting_item_with_sales(self):
+        Sale.objects.create(
+            item=self.item, customer=self.customer, quantity=3, unit_price=10
+        )
+        self.item.delete()
+        self.assertFalse(StockMovement.objects.exists())
+
+    def test_rebuild_stock_repairs_drift(self):
+        Item.objects.filter(pk=self.item.pk).update(current_stock=999)
+        make_item(name="Empty", sku="SKU-EMPTY")
+
+        call_command("rebuild_stock", stdout=StringIO())
+
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.current_stock, 10)
+        self.assertEqual(Item.objects.get(sku="SKU-EMPTY").current_stock, 0)
+
+
+class LowStockCounterTests(TestCase):
+    def setUp(self):
+        self.item = make_item(current_stock=10, reorder_point=5)
+        self.customer = Customer.objects.create(name="Walk-in")
+        self.supplier = Supplier.objects.create(name="Acme")
+        self.assertEqual(get_low_stock_count(), 0)
+
+    def assertCount(self, expected):
+        with self.assertNumQueries(1):
+            self.assertEqual(get_low_stock_count(), expected)
+
+    def test_stock_changes_crossing_reorder_point(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Sale.objects.create(
+                item=self.item, customer=self.customer, quantity=4, unit_price=10
+            )
+        self.assertCount(0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Sale.objects.create(
+                item=self.item, customer=self.customer, quantity=2, unit_price=10
+            )
+        self.assertCount(1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Purchase.objects.create(
+                item=self.item, supplier=self.supplier, quantity=1, unit_cost=6
+            )
+        self.assertCount(1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            InventoryAdjustment.objects.create(
+                item=self.item,
+                adjustment_type=InventoryAdjustment.INCREASE,
+                quantity_adjusted=5,
+                reason="OTHER_INCREASE",
+            )
+        self.assertCount(0)
+
+    def test_item_create_edit_delete_and_import(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            low = make_item(sku="SKU-LOW", current_stock=1, reorder_point=3)
+        self.assertCount(1)
+
+        self.item.reorder_point = 10
+        with self.captureOnCommitCallbacks(execute=True):
+            self.item.save()
+        self.assertCount(2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            low.delete()
+        self.assertCount(1)
+
+        upload = SimpleUploadedFile(
+            "items.csv",
+            (
+                ItemCsvImportTests.header
+                + "Widget,SKU-001,Pieces,,10,6,,5,10\n"
+                + "New,SKU-NEW,Pieces,,10,6,,5,0\n"
+            ).encode(),
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            process_item_csv_upload(upload)
+        self.assertCount(1)
+
+    def test_rolled_back_changes_are_not_counted(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(InsufficientStockError):
+                InventoryAdjustment.objects.create(
+                    item=self.item,
+                    adjustment_type=InventoryAdjustment.DECREASE,
+                    quantity_adjusted=11,
+                    reason="DAMAGED",
+                )
+        self.assertCount(0)
+
+    def test_reconciliation_task_repairs_drift(self):
+        Item.objects.filter(pk=self.item.pk).update(current_stock=0)
+        self.assertCount(0)
+
+        self.assertEqual(reconcile_low_stock_count_task(), 1)
+        self.assertCount(1)
+
+    def test_context_processor_is_lazy(self):
+        with self.assertNumQueries(0):
+            context = low_stock_alerts(None)
+        Counter.objects.filter(name=LOW_STOCK_COUNT_KEY).delete()
+        self.assertTrue(context["low_stock"] == 0)
+        self.assertEqual(Counter.objects.get(name=LOW_STOCK_COUNT_KEY).value, 0)
+
+
+class DailyItemSummaryTests(TestCase):
+    def setUp(self):
+        self.item = make_item(current_stock=50)
+        self.other = make_item(name="Gadget", sku="SKU-002", current_stock=50)
+        self.customer = Customer.objects.create(name="Walk-in")
+        self.supplier = Supplier.objects.create(name="Acme")
+
+    def rollup(self):
+        return sorted(
+            DailyItemSummary.objects.exclude(
+                quantity_sold=0, quantity_bought=0, quantity_adjusted=0
+            ).values_list(
+                "day",
+                "item_id",
+                "quantity_sold",
+                "quantity_bought",
+                "quantity_adjusted",
+                "revenue",
+                "cost",
+            )
+        )
+
+    def test_write_paths_match_rebuild(self):
+        sale = Sale.objects.create(
+            item=self.item, customer=self.customer, quantity=3, unit_price=10
+        )
+        Sale.objects.create(
+            item=self.item, customer=self.customer, quantity=2, unit_price="12.50"
+        )
+        summary = DailyItemSummary.objects.get(item=self.item)
+        self.assertEqual((summary.quantity_sold, summary.revenue), (5, 55))
+
+        sale.quantity = 4
+        sale.date = date(2024, 1, 15)
+        sale.save()
+        sale.item = self.other
+        sale.save()
+
+        purchase = Purchase.objects.create(
+            item=self.item, supplier=self.supplier, quantity=6, unit_cost=4
+        )
+        purchase.quantity = 8
+        purchase.save()
+        Purchase.objects.create(
+            item=self.other, supplier=self.supplier, quantity=1, unit_cost=3
+        ).delete()
+
+        adjustment = InventoryAdjustment.objects.create(
+            item=self.item,
+            adjustment_type=InventoryAdjustment.DECREASE,
+            quantity_adjusted=2,
+            reason="DAMAGED",
+        )
+        adjustment.adjustment_type = InventoryAdjustment.INCREASE
+        adjustment.save()
+        InventoryAdjustment.objects.create(
+            item=self.other,
+            adjustment_type=InventoryAdjustment.DECREASE,
+            quantity_adjusted=1,
+            reason="DAMAGED",
+        )
+
+        incremental = self.rollup()
+        call_command("backfill_daily_summary", stdout=StringIO())
+        self.assertEqual(incremental, self.rollup())
+        self.assertEqual(
+            DailyItemSummary.objects.get(
+                item=self.other, day=date(2024, 1, 15)
+            ).quantity_sold,
+            4,
+        )
+
+    def test_delete_adjustment_view_reverses_rollup(self):
+        user = User.objects.create_user("clerk", password="secret")
+        self.client.force_login(user)
+        adjustment = InventoryAdjustment.objects.create(
+            item=self.item,
+            adjustment_type=InventoryAdjustment.INCREASE,
+            quantity_adjusted=5,
+            reason="OTHER_INCREASE",
+        )
+
+        self.client.post(reverse("delete_adjustment", args=[adjustment.pk]))
+
+        self.assertEqual(self.rollup(), [])
+
+
+class CostingTests(TestCase):
+    def setUp(self):
+        self.item = make_item()
+        self.customer = Customer.objects.create(name="Walk-in")
+        self.supplier = Supplier.objects.create(name="Acme")
+
+    def purchase(self, day, quantity, unit_cost):
+        return Purchase.objects.create(
+            item=self.item,
+            supplier=self.supplier,
+            quantity=quantity,
+            unit_cost=unit_cost,
+            date=day,
+        )
+
+    def sell(self, day, quantity):
+        return Sale.objects.create(
+            item=self.item,
+            customer=self.customer,
+            quantity=quantity,
+            unit_price=20,
+            date=day,
+        )
+
+    def cogs(self, sale):
+        sale.refresh_from_db()
+        return sale.cogs
+
+    def test_fifo_consumes_oldest_layers_first(self):
+        first = self.purchase(date(2023, 12, 1), 1, 2)
+        self.purchase(date(2024, 1, 1), 10, 4)
+        second = self.purchase(date(2024, 1, 5), 10, 8)
+        sale = self.sell(date(2024, 1, 10), 12)
+        self.assertEqual(self.cogs(sale), Decimal("50.00"))
+
+        # A back-dated edit replays only from the edited day
+        untouched = CostLayer.objects.get(reference=first.purchase_number).pk
+        second.unit_cost = 10
+        second.save()
+        self.assertEqual(self.cogs(sale), Decimal("52.00"))
+        self.assertEqual(
+            CostLayer.objects.get(reference=first.purchase_number).pk, untouched
+        )
+
+        later = self.sell(date(2024, 1, 12), 5)
+        self.assertEqual(self.cogs(later), Decimal("50.00"))
+
+        first.delete()
+        self.assertEqual(self.cogs(sale), Decimal("60.00"))
+        self.assertEqual(self.cogs(later), Decimal("50.00"))
+
+    @override_settings(INVENTORY_COSTING_METHOD="average")
+    def test_average_cost_and_decrease_adjustments(self):
+        self.purchase(date(2024, 1, 1), 10, 4)
+        self.purchase(date(2024, 1, 5), 10, 8)
+        sale = self.sell(date(2024, 1, 10), 5)
+        adjustment = InventoryAdjustment.objects.create(
+            item=self.item,
+            adjustment_type=InventoryAdjustment.DECREASE,
+            quantity_adjusted=3,
+            reason="DAMAGED",
+            date=timezone.make_aware(datetime(2024, 1, 11, 9)),
+        )
+        self.assertEqual(self.cogs(sale), Decimal("30.00"))
+        adjustment.refresh_from_db()
+        self.assertEqual(adjustment.cogs, Decimal("18.00"))
+
+        # Recosting from scratch agrees with the incremental updates
+        Sale.objects.update(cogs=None)
+        call_command("recost_inventory", stdout=StringIO())
+        self.assertEqual(self.cogs(sale), Decimal("30.00"))
+
+    def test_layers_record_what_was_issued_before_them(self):
+        self.purchase(date(2024, 1, 1), 10, 4)
+        self.sell(date(2024, 1, 3), 4)
+        later = self.purchase(date(2024, 1, 5), 10, 8)
+        layer = CostLayer.objects.get(reference=later.purchase_number)
+        self.assertEqual(
+            (layer.consumed_quantity, layer.consumed_cogs), (4, Decimal("16.00"))
+        )
+
+        # The recost starts at that layer and needs no earlier sales
+        Sale.objects.filter(date=date(2024, 1, 3)).update(quantity=0)
+        sale = self.sell(date(2024, 1, 10), 8)
+        self.assertEqual(self.cogs(sale), Decimal("40.00"))
+
+    def test_csv_import_that_lowers_stock_consumes_layers(self):
+        item = make_item(name="Gadget", sku="SKU-002", current_stock=10)
+        process_item_csv_upload(
+            SimpleUploadedFile(
+                "items.csv",
+                ItemCsvImportTests.header.encode("utf-8")
+                + b"Gadget,SKU-002,Pieces,,10,6,,,4\n",
+            )
+        )
+        Purchase.objects.create(
+            item=item, supplier=self.supplier, quantity=10, unit_cost=8
+        )
+        sale = Sale.objects.create(
+            item=item, customer=self.customer, quantity=5, unit_price=10
+        )
+        # Four units left at 6 after the import took six, then one at 8
+        self.assertEqual(self.cogs(sale), Decimal("32.00"))
+
+    def test_ledger_backfill_counts_only_unexplained_stock(self):
+        item = make_item(name="Gadget", sku="SKU-002", current_stock=5)
+        Purchase.objects.create(
+            item=item,
+            supplier=self.supplier,
+            quantity=10,
+            unit_cost=4,
+            date=date(2024, 1, 1),
+        )
+        sale = Sale.objects.create(
+            item=item,
+            customer=self.customer,
+            quantity=3,
+            unit_price=10,
+            date=date(2024, 1, 2),
+        )
+        # The history as migration 0028 found it: no ledger but its backfill
+        StockMovement.objects.filter(item=item).delete()
+        StockMovement.objects.create(
+            item=item,
+            quantity=12,
+            source=StockMovement.OPENING,
+            reference="Ledger backfill",
+        )
+        Sale.objects.update(cogs=None)
+
+        call_command("recost_inventory", item=[item.pk], stdout=StringIO())
+
+        layers = CostLayer.objects.filter(item=item).order_by("day", "pk")
+        self.assertEqual(
+            [(layer.source, layer.quantity) for layer in layers],
+            [(CostLayer.PURCHASE, 10), (CostLayer.OPENING, 5)],
+        )
+        self.assertEqual(self.cogs(sale), Decimal("12.00"))
+
+    def test_opening_stock_is_a_layer_at_purchase_price(self):
+        item = make_item(name="Gadget", sku="SKU-002", current_stock=5)
+        layer = CostLayer.objects.get(item=item)
+        self.assertEqual(
+            (layer.source, layer.quantity, layer.unit_cost),
+            (CostLayer.OPENING, 5, Decimal("6")),
+        )
+
+        sale = Sale.objects.create(
+            item=item, customer=self.customer, quantity=2, unit_price=10
+        )
+        self.assertEqual(self.cogs(sale), Decimal("12.00"))
+
+
+class SeedStockflowTests(TestCase):
+    def seed(self):
+        return call_command(
+            "seed_stockflow",
+            items=30,
+            customers=10,
+            suppliers=3,
+            years=1,
+            transactions=2000,
+            seed=7,
+            stdout=StringIO(),
+        )
+
+    def snapshot(self):
+        return (
+            list(
+                Sale.objects.order_by("pk").values_list("item__sku", "quantity", "date")
+            ),
+            list(Item.objects.order_by("sku").values_list("sku", "current_stock")),
+        )
+
+    def test_history_is_consistent(self):
+        self.seed()
+
+        self.assertGreater(Sale.objects.count(), 1000)
+        self.assertTrue(Purchase.objects.exists())
+        self.assertFalse(Item.objects.filter(current_stock__lt=0).exists())
+        out = StringIO()
+        call_command("rebuild_stock", dry_run=True, stdout=out)
+        self.assertIn("0 item(s) differ", out.getvalue())
+        self.assertEqual(
+            DailyItemSummary.objects.aggregate(total=Sum("quantity_sold"))["total"],
+            Sale.objects.aggregate(total=Sum("quantity"))["total"],
+        )
+        self.assertEqual(get_low_stock_count(), count_low_stock_items())
+        # Some records were entered after the day they are dated
+        self.assertTrue(Sale.objects.filter(created_at__date__gt=F("date")).exists())
+
+    def test_keeps_generated_timestamps(self):
+        self.seed()
+
+        first_day = Sale.objects.order_by("date").values_list("date", flat=True)[0]
+        for model in (Item, Customer, Supplier):
+            self.assertFalse(
+                model.objects.filter(created_at__date__gt=first_day).exists()
+            )
+        self.assertFalse(Item.objects.filter(updated_at__date__gt=first_day).exists())
+        self.assertFalse(
+            InventoryAdjustment.objects.filter(created_at__lt=F("date")).exists()
+        )
+        # Seeding leaves the models' own timestamps alone
+        item = make_item(sku="AFTER-SEED")
+        self.assertEqual(item.created_at.date(), timezone.localdate())
+
+    def test_same_seed_same_data(self):
+        self.seed()
+        first = self.snapshot()
+        Sale.objects.all().delete()
+        Purchase.objects.all().delete()
+        Item.objects.all().delete()
+        self.seed()
+        self.assertEqual(first, self.snapshot())
+
+    def test_refuses_a_database_with_sales(self):
+        self.seed()
+        with self.assertRaisesMessage(CommandError, "already been seeded"):
+            self.seed()
+
+
+class ItemCsvImportTests(TestCase):
+    header = "name,sku,unit,category,selling_price,purchase_price,opening_stock,reorder_point,current_stock\n"
+
+    def upload(self, body):
+        return SimpleUploadedFile("items.csv", (self.header + body).encode("utf-8"))
+
+    def test_creates_and_updates_in_bulk(self):
+        make_item(sku="SKU-001", current_stock=4)
+        rows = "".join(
+            f"Item {n},SKU-{n:03d},pcs,Cat {n % 3},10,6,5,2,{n}\n" for n in range(1, 51)
+        )
+
+        get_dashboard_version()
+        # Includes one read and one bulk_create for the low-stock alerts and
+        # one update of the dashboard version
+        with self.assertNumQueries(17):
+            result = process_item_csv_upload(self.upload(rows), batch_size=100)
+
+        self.assertEqual(result["successful_imports"], 50)
+        self.assertEqual(result["failed_imports"], 0)
+        self.assertEqual(Item.objects.count(), 50)
+        self.assertEqual(UnitOfMeasure.objects.filter(name__iexact="pcs").count(), 1)
+        updated = Item.objects.get(sku="SKU-001")
+        self.assertEqual((updated.name, updated.current_stock), ("Item 1", 1))
+        self.assertEqual(
+            list(updated.movements.values_list("source", "quantity")),
+            [(StockMovement.OPENING, 4), (StockMovement.IMPORT, -3)],
+        )
+        self.assertEqual(Item.objects.get(sku="SKU-050").movements.get().quantity, 50)
+        # Imported items and categories are indexed for search
+        self.assertEqual(len(search.search("sku-05")[:10]), 1)
+        self.assertEqual(len(search.search("cat", ["category"])[:10]), 3)
+
+    def test_reports_row_errors_in_order(self):
+        rows = (
+            "Good,SKU-1,Pieces,,10,6,,,3\n"
+            ",SKU-2,Pieces,,abc,6,,,3\n"
+            "Also good,SKU-3,Pieces,,10,6,,,-1\n"
+        )
+        result = process_item_csv_upload(self.upload(rows), batch_size=2)
+
+        self.assertEqual(result["total_rows"], 3)
+        self.assertEqual(result["successful_imports"], 1)
+        self.assertEqual(
+            [(e["row_num"], e["messages"]) for e in result["errors"]],
+            [
+                (3, ["Name is required.", "Invalid selling price format."]),
+                (4, ["Current stock cannot be negative."]),
+            ],
+        )
+        self.assertEqual(result["errors"][0]["data"]["sku"], "SKU-2")
+
+    def test_streams_small_chunks(self):
+        upload = self.upload(
+            '"Café ☕ ""Deluxe""\nEdition",SKU-1,Pieces,Crème,10,6,,,3\r\n'
+            "Tea,SKU-2,Pieces,Crème,10,6,,,4"
+        )
+        upload.file = BytesIO(codecs.BOM_UTF8 + upload.read())
+        upload.DEFAULT_CHUNK_SIZE = 7  # Splits multi-byte characters and lines
+
+        result = process_item_csv_upload(upload)
+
+        self.assertEqual(result["total_rows"], 2)
+        self.assertEqual(result["successful_imports"], 2)
+        self.assertEqual(
+            Item.objects.get(sku="SKU-1").name, 'Café ☕ "Deluxe"\nEdition'
+        )
+        self.assertEqual(Item.objects.get(sku="SKU-2").category.name, "Crème")
+
+
+class ItemCsvValidateOnlyTests(TestCase):
+    header = ItemCsvImportTests.header
+
+    def upload(self, body):
+        return SimpleUploadedFile("items.csv", (self.header + body).encode("utf-8"))
+
+    def test_reports_outcome_without_writing(self):
+        make_item(sku="SKU-1", current_stock=4)
+        rows = (
+            "Existing,SKU-1,Pieces,,10,6,,,3\n"
+            "New,SKU-2,Boxes,Tools,10,6,,,3\n"
+            "Twice,SKU-2,Boxes,,10,6,,,3\n"
+            ",SKU-3,Pieces,,-1,6,,x,3\n"
+            "Fresh,SKU-4,boxes,tools,10.123,6,,,3\n"
+        )
+
+        # Existing SKUs, units and categories
+        with self.assertNumQueries(3):
+            result = process_item_csv_upload(
+                self.upload(rows), batch_size=2, validate_only=True
+            )
+
+        self.assertEqual(result["total_rows"], 5)
+        self.assertEqual(result["successful_imports"], 0)
+        self.assertEqual(result["would_update"], ["SKU-1"])
+        self.assertEqual(result["would_create"], ["SKU-2"])
+        self.assertEqual(result["new_units"], ["Boxes"])
+        self.assertEqual(result["new_categories"], ["Tools"])
+        self.assertEqual(
+            [(e["row_num"], e["messages"]) for e in result["errors"]],
+            [
+                (4, ["Duplicate SKU 'SKU-2' in file (already used on row 3)."]),
+                (
+                    5,
+                    [
+                        "Name is required.",
+                        "Selling price cannot be negative.",
+                        "Invalid reorder point format (must be a whole number).",
+                    ],
+                ),
+                (
+                    6,
+                    [
+                        "Selling Price: Ensure that there are no more than 2 decimal places."
+                    ],
+                ),
+            ],
+        )
+        self.assertEqual(Item.objects.count(), 1)
+        self.assertEqual(Item.objects.get().current_stock, 4)
+
+    def test_import_rejects_duplicate_skus_like_the_dry_run(self):
+        rows = "First,SKU-1,Pieces,,10,6,,,3\nSecond,SKU-1,Pieces,,10,6,,,5\n"
+
+        preview = process_item_csv_upload(self.upload(rows), validate_only=True)
+        result = process_item_csv_upload(self.upload(rows), batch_size=1)
+
+        self.assertEqual(preview["errors"], result["errors"])
+        self.assertEqual(result["successful_imports"], len(preview["would_create"]))
+        self.assertEqual(Item.objects.get(sku="SKU-1").name, "First")
+
+    def test_import_keeps_first_row_for_duplicate_sku_in_one_batch(self):
+        rows = "First,SKU-1,Pieces,,10,6,,,3\nSecond,SKU-1,Pieces,,10,6,,,5\n"
+
+        result = process_item_csv_upload(self.upload(rows))
+
+        self.assertEqual(result["successful_imports"], 1)
+        self.assertEqual(result["failed_imports"], 1)
+        self.assertEqual(result["errors"][0]["row_num"], 3)
+        self.assertEqual(
+            result["errors"][0]["messages"],
+            ["Duplicate SKU 'SKU-1' in file (already used on row 2)."],
+        )
+        item = Item.objects.get(sku="SKU-1")
+        self.assertEqual((item.name, item.current_stock), ("First", 3))
+
+
+class ImportJobTests(TestCase):
+    header = ItemCsvImportTests.header
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        # Run import_items_task inline instead of sending it to a broker
+        settings_override = override_settings(
+            MEDIA_ROOT=media_root, CELERY_TASK_ALWAYS_EAGER=True
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user("importer", password="secret")
+        self.client.force_login(self.user)
+
+    def test_upload_runs_job_and_reports_errors(self):
+        upload = SimpleUploadedFile(
+            "items.csv",
+            (
+                self.header + "Good,SKU-1,Pieces,,10,6,,,3\n"
+                "Bad,SKU-2,Pieces,,abc,6,,,3\n"
+                "Also good,SKU-3,Pieces,,10,6,,,4\n"
+            ).encode("utf-8"),
+        )
+        response = self.client.post(reverse("import_items"), {"csv_file": upload})
+
+        job = ImportJob.objects.get()
+        self.assertRedirects(
+            response,
+            f"{reverse('import_items')}?job={job.pk}",
+            fetch_redirect_response=False,
+        )
+        self.assertEqual(job.status, ImportJob.COMPLETED)
+        self.assertEqual(job.user, self.user)
+        self.assertEqual((job.total_rows, job.rows_done, job.rows_failed), (3, 3, 1))
+        self.assertEqual(Item.objects.count(), 2)
+
+        progress = self.client.get(reverse("import_job_progress", args=[job.pk]))
+        data = progress.json()
+        self.assertTrue(data["is_finished"])
+        self.assertEqual(data["rows_imported"], 2)
+        self.assertEqual(
+            data["error_report_url"],
+            reverse("download_import_errors", args=[job.pk]),
+        )
+
+        report = self.client.get(data["error_report_url"])
+        lines = b"".join(report.streaming_content).decode().splitlines()  # type: ignore
+        self.assertEqual(lines[0].split(",")[:2], ["row_num", "errors"])
+        self.assertTrue(lines[1].startswith("3,Invalid selling price format.,Bad"))
+
+    def test_job_without_errors_has_no_report(self):
+        upload = SimpleUploadedFile(
+            "items.csv", (self.header + "Good,SKU-1,Pieces,,10,6,,,3\n").encode()
+        )
+        self.client.post(reverse("import_items"), {"csv_file": upload})
+
+        job = ImportJob.objects.get()
+        self.assertEqual(job.status, ImportJob.COMPLETED)
+        self.assertFalse(job.error_report)
+        progress = self.client.get(reverse("import_job_progress", args=[job.pk]))
+        self.assertIsNone(progress.json()["error_report_url"])
+
+    def test_validate_only_renders_preview(self):
+        upload = SimpleUploadedFile(
+            "items.csv", (self.header + "Good,SKU-1,Pieces,,10,6,,,3\n").encode()
+        )
+        response = self.client.post(
+            reverse("import_items"), {"csv_file": upload, "validate_only": "1"}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["preview"]["would_create"], ["SKU-1"])
+        self.assertFalse(ImportJob.objects.exists())
+        self.assertFalse(Item.objects.exists())
+
+
+class ConcurrentSalesTests(TransactionTestCase):
+    def test_parallel_sales_never_lose_updates(self):
+        item = make_item(current_stock=250)
+        customer = Customer.objects.create(name="Walk-in")
+        attempts = 300
+
+        def sell(n):
+            try:
+                while True:
+                    try:
+                        Sale(
+                            item=Item.objects.get(pk=item.pk),
+                            customer=customer,
+                            quantity=1,
+                            unit_price=10,
+                            sales_number=f"SALE-TEST-{n:04d}",
+                        ).save()
+                        return True
+                    except ValidationError:
+                        # Either the stale clean() check or the atomic update refused it
+                        return False
+                    except OperationalError:
+                        # SQLite serialises writers; the whole sale rolled back, retry
+                        continue
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            results = list(pool.map(sell, range(attempts)))
+
+        item.refresh_from_db()
+        self.assertEqual(results.count(True), 250)
+        self.assertEqual(item.current_stock, 0)
+        self.assertEqual(Sale.objects.filter(item=item).count(), 250)
+
+
+class DocumentSequenceTests(TestCase):
+    def test_numbers_count_per_prefix_and_day(self):
+        day = date(2025, 3, 1)
+
+        self.assertEqual(next_number("SALE", day), "SALE-20250301-001")
+        self.assertEqual(next_number("SALE", day), "SALE-20250301-002")
+        self.assertEqual(next_number("PUR", day), "PUR-20250301-001")
+        self.assertEqual(next_number("SALE", date(2025, 3, 2)), "SALE-20250302-001")
+
+    def test_increment_is_one_query(self):
+        day = date(2025, 3, 1)
+        next_number("SALE", day)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(list(reserve("SALE", 5, day)), [2, 3, 4, 5, 6])
+        self.assertEqual(DocumentSequence.objects.get().last_value, 6)
+
+    def test_sales_and_purchases_take_todays_numbers(self):
+        item = make_item(current_stock=10)
+        tag = f"{timezone.localdate():%Y%m%d}"
+
+        sale = Sale.objects.create(
+            item=item, customer=Customer.objects.create(name="Walk-in"), quantity=1
+        )
+        purchase = Purchase.objects.create(
+            item=item,
+            supplier=Supplier.objects.create(name="Acme"),
+            quantity=1,
+            unit_cost=6,
+        )
+
+        self.assertEqual(sale.sales_number, f"SALE-{tag}-001")
+        self.assertEqual(purchase.purchase_number, f"PUR-{tag}-001")
+
+    def test_add_forms_do_not_take_numbers(self):
+        self.client.force_login(User.objects.create_user("owner"))
+
+        self.client.get(reverse("add_sale"))
+        self.client.get(reverse("add_purchase"))
+
+        self.assertFalse(DocumentSequence.objects.exists())
+
+
+class DocumentSequenceBlockTests(TransactionTestCase):
+    def setUp(self):
+        sequences._blocks.clear()
+        self.addCleanup(sequences._blocks.clear)
+
+    @override_settings(DOCUMENT_NUMBER_BLOCK_SIZE=10)
+    def test_blocks_are_reserved_once_per_block_size(self):
+        day = date(2025, 3, 1)
+
+        with CaptureQueriesContext(connection) as queries:
+            numbers = [next_number("SALE", day) for _ in range(12)]
+
+        self.assertEqual(numbers[0], "SALE-20250301-001")
+        self.assertEqual(numbers[-1], "SALE-20250301-012")
+        # Two reservations, the first of which also creates the counter
+        updates = [q for q in queries.captured_queries if "UPDATE" in q["sql"]]
+        self.assertEqual(len(updates), 3)
+        self.assertEqual(DocumentSequence.objects.get().last_value, 20)
+
+    def test_parallel_allocation_never_repeats_a_number(self):
+        day = date(2025, 3, 1)
+
+        def allocate(n):
+            try:
+                while True:
+                    try:
+                        return next_number("SALE", day)
+                    except OperationalError:
+                        # SQLite serialises writers; nothing was taken, retry
+                        continue
+            finally:
+                connection.close()
+
+        for block_size in (1, 10):
+            with (
+                self.subTest(block_size=block_size),
+                override_settings(DOCUMENT_NUMBER_BLOCK_SIZE=block_size),
+            ):
+                DocumentSequence.objects.all().delete()
+                sequences._blocks.clear()
+                with ThreadPoolExecutor(max_workers=8) as pool:
+                    numbers = list(pool.map(allocate, range(100)))
+                self.assertEqual(len(set(numbers)), 100)
+
+
+class ListDataEndpointTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("owner", password="secret")
+        self.client.force_login(self.user)
+        self.item = make_item(current_stock=20, reorder_point=5)
+
+    def test_endpoints_answer_datatables_requests(self):
+        Purchase.objects.create(
+            item=self.item,
+            supplier=Supplier.objects.create(name="Acme"),
+            quantity=1,
+            unit_cost=6,
+        )
+        InventoryAdjustment.objects.create(
+            item=self.item,
+            adjustment_type=InventoryAdjustment.DECREASE,
+            quantity_adjusted=2,
+            reason="DAMAGED",
+        )
+        Customer.objects.create(name="Walk-in")
+        for name in (
+            "items_data",
+            "inventory_adjustments_data",
+            "purchases_data",
+            "suppliers_data",
+            "customers_data",
+        ):
+            with self.subTest(name=name):
+                response = self.client.get(
+                    reverse(name), {"draw": 2, "start": 0, "length": 10}
+                )
+                payload = response.json()
+                self.assertEqual(payload["draw"], 2)
+                self.assertEqual(payload["recordsTotal"], 1)
+                self.assertEqual(len(payload["data"]), 1)
+
+    def test_item_search_matches_category_and_sku(self):
+        make_item(name="Gadget", sku="GAD-1")
+        response = self.client.get(reverse("items_data"), {"search[value]": "gad"})
+        payload = response.json()
+        self.assertEqual(payload["recordsFiltered"], 1)
+        self.assertEqual(payload["data"][0]["sku"], "GAD-1")
+
+
+class AutocompleteTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("owner", password="secret")
+        self.client.force_login(self.user)
+        self.item = make_item(name="Claw Hammer", sku="HAM-1", current_stock=12)
+
+    def test_item_results_carry_stock_and_prices(self):
+        make_item(name="Screwdriver", sku="SCR-1")
+
+        response = self.client.get(reverse("item_autocomplete"), {"q": "ham"})
+
+        self.assertEqual(
+            response.json(),
+            {
+                "results": [
+                    {
+                        "id": self.item.pk,
+                        "text": "Claw Hammer",
+                        "sku": "HAM-1",
+                        "current_stock": 12,
+                        "selling_price": "10.00",
+                        "purchase_price": "6.00",
+                    }
+                ],
+                "pagination": {"more": False},
+            },
+        )
+
+    def test_empty_query_pages_through_names(self):
+        for n in range(25):
+            make_item(name=f"Bolt {n:02d}", sku=f"BLT-{n}")
+        url = reverse("item_autocomplete")
+
+        first = self.client.get(url).json()
+        second = self.client.get(url, {"page": 2}).json()
+
+        self.assertTrue(first["pagination"]["more"])
+        self.assertEqual(first["results"][0]["text"], "Bolt 00")
+        self.assertFalse(second["pagination"]["more"])
+        self.assertEqual(
+            [r["text"] for r in second["results"]],
+            ["Bolt 20", "Bolt 21", "Bolt 22", "Bolt 23", "Bolt 24", "Claw Hammer"],
+        )
+
+    def test_customer_and_supplier_results(self):
+        customer = Customer.objects.create(name="Jane Doe")
+        supplier = Supplier.objects.create(name="Acme Tools")
+        for name, query, obj in (
+            ("customer_autocomplete", "jan", customer),
+            ("supplier_autocomplete", "acm", supplier),
+        ):
+            with self.subTest(name=name):
+                response = self.client.get(reverse(name), {"q": query})
+                self.assertEqual(
+                    response.json()["results"], [{"id": obj.pk, "text": obj.name}]
+                )
+
+    def test_form_pages_render_only_the_selected_option(self):
+        for n in range(30):
+            make_item(name=f"Bolt {n:02d}", sku=f"BLT-{n}")
+        adjustment = InventoryAdjustment.objects.create(
+            item=self.item,
+            adjustment_type=InventoryAdjustment.INCREASE,
+            quantity_adjusted=1,
+            reason="STOCK_COUNT_INCREASE",
+        )
+
+        add = self.client.get(reverse("add_adjustment")).content.decode()
+        edit = self.client.get(
+            reverse("edit_adjustment", args=[adjustment.pk])
+        ).content.decode()
+
+        self.assertIn(f'data-autocomplete-url="{reverse("item_autocomplete")}"', add)
+        self.assertNotIn("Bolt 00", add)
+        self.assertNotIn("Claw Hammer", add)
+        self.assertIn(f'<option value="{self.item.pk}" selected>Claw Hammer', edit)
+        self.assertNotIn("Bolt 00", edit)
+
+    def test_validation_fetches_only_the_chosen_item(self):
+        for n in range(30):
+            make_item(name=f"Bolt {n:02d}", sku=f"BLT-{n}")
+        form = InventoryAdjustmentForm(
+            {
+                "item": self.item.pk,
+                "adjustment_type": InventoryAdjustment.INCREASE,
+                "quantity_adjusted": 1,
+                "reason": "STOCK_COUNT_INCREASE",
+            }
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(form.cleaned_data["item"], self.item)
+        # The field's lookup and the model's foreign key check
+        for query in queries.captured_queries:
+            self.assertIn(f'"inventory_item"."id" = {self.item.pk}', query["sql"])
+
+
+class ViewItemHistoryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("owner", password="secret")
+        self.client.force_login(self.user)
+        self.item = make_item(current_stock=100)
+        customer = Customer.objects.create(name="Walk-in")
+        for day in range(1, 26):
+            Sale.objects.create(
+                item=self.item,
+                customer=customer,
+                quantity=1,
+                unit_price=10,
+                date=date(2024, 1, day),
+            )
+
+    def test_transaction_tables_page_by_cursor(self):
+        url = reverse("view_item", args=[self.item.pk])
+        response = self.client.get(url)
+        first = response.context["sales"]
+        self.assertEqual(len(first), 20)
+        self.assertEqual(response.context["sales_total"], 25)
+        self.assertNotIn("show_transactions", response.context)
+
+        response = self.client.get(url, {"sales_cursor": first.next_cursor})
+        second = response.context["sales"]
+        self.assertEqual([sale.date.day for sale in second], [5, 4, 3, 2, 1])
+        self.assertFalse(second.has_next())
+        self.assertTrue(response.context["show_transactions"])
+        self.assertContains(response, "sales_cursor=")
@@ -5,7 +5,20 @@ from . import views
 urlpatterns = [
     # Items
     path("items", views.items_view, name="items"),
+    path("items/data", views.items_data, name="items_data"),
+    path("items/autocomplete", views.item_autocomplete, name="item_autocomplete"),
+    path("items/export", views.export_items, name="export_items"),
     path("items/import", views.import_items_view, name="import_items"),
+    path(
+        "items/import/<int:pk>/progress",
+        views.import_job_progress,
+        name="import_job_progress",
+    ),
+    path(
+        "items/import/<int:pk>/errors",
+        views.download_import_errors,
+        name="download_import_errors",
+    ),
     path(
         "items/download-template",
         views.generate_csv_template_view,
@@ -56,6 +69,11 @@ urlpatterns = [
         views.inventory_adjustments,
         name="inventory_adjustments",
     ),
+    path(
+        "adjustments/data",
+        views.inventory_adjustments_data,
+        name="inventory_adjustments_data",
+    ),
     path(
         "adjustments/add-adjustment",
         views.add_adjustment,
@@ -1,16 +1,19 @@
+import codecs
 import csv
 import os
+import time
 import uuid
 from datetime import datetime
 from decimal import Decimal, InvalidOperation
 from io import StringIO
+from itertools import islice
 
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.core.mail import EmailMultiAlternatives
 from django.db import IntegrityError, transaction
-from django.db.models import Q
 from django.template.loader import render_to_string
+from django.utils import timezone
 
 
 def item_image_upload_path(instance, filename):
@@ -68,13 +71,462 @@ def generate_item_csv_template():
     return output
 
 
-def process_item_csv_upload(csv_file):
+# Expected column names for item CSV imports, in template order
+ITEM_CSV_FIELDS = [
+    "name",
+    "sku",
+    "unit",
+    "category",
+    "selling_price",
+    "purchase_price",
+    "opening_stock",
+    "reorder_point",
+    "current_stock",
+]
+
+# Rows written per bulk_create/bulk_update round trip and per transaction
+ITEM_IMPORT_BATCH_SIZE = getattr(settings, "ITEM_IMPORT_BATCH_SIZE", 1000)
+
+
+def _parse_decimal_column(raw_values, label, row_errors):
+    """
+    Parses one column of decimal strings, appending messages to the matching
+    entries of `row_errors`. Each distinct string is parsed once per column.
+    """
+    invalid = f"Invalid {label} format."
+    negative = f"{label.capitalize()} cannot be negative."
+    parsed_values = {"": (None, None)}
+    column = []
+    for raw, errors in zip(raw_values, row_errors):
+        if raw not in parsed_values:
+            try:
+                parsed = Decimal(raw)
+                parsed_values[raw] = (parsed, negative if parsed < 0 else None)
+            except InvalidOperation:
+                parsed_values[raw] = (None, invalid)
+        parsed, message = parsed_values[raw]
+        if message:
+            errors.append(message)
+        column.append(parsed)
+    return column
+
+
+def _parse_whole_number_column(raw_values, label, row_errors, default=None):
+    """Parses one column of whole numbers, like _parse_decimal_column()."""
+    invalid = f"Invalid {label} format (must be a whole number)."
+    negative = f"{label.capitalize()} cannot be negative."
+    column = []
+    for raw, errors in zip(raw_values, row_errors):
+        if not raw:
+            column.append(default)
+            continue
+        try:
+            parsed = int(raw)
+        except ValueError:
+            errors.append(invalid)
+            column.append(default)
+            continue
+        if parsed < 0:
+            errors.append(negative)
+        column.append(parsed)
+    return column
+
+
+def _build_import_lookups():
+    """
+    Loads every unit and category once into case-insensitive dicts so rows can
+    be resolved without a query each.
+
+    Units are keyed by both name and abbreviation; a key that matches more than
+    one unit maps to a list so the ambiguity can be reported per row.
+    """
+    from .models import Category, UnitOfMeasure
+
+    units = {}
+    for unit in UnitOfMeasure.objects.all():
+        keys = {unit.name.lower()}
+        if unit.abbreviation:
+            keys.add(unit.abbreviation.lower())
+        for key in keys:
+            units.setdefault(key, []).append(unit)
+
+    categories = {
+        category.name.lower(): category for category in Category.objects.all()
+    }
+    return units, categories
+
+
+def _validate_item_batch(batch, units, seen_skus):
+    """
+    Validates a batch of (row_num, row_data) pairs entirely in memory, one
+    column at a time rather than one row at a time.
+
+    Messages for a row keep the column order of the template. Model field
+    validation (lengths, decimal places) only runs for rows that parsed
+    cleanly. A SKU already used by an earlier valid row of the same file is
+    rejected; `seen_skus` maps SKUs to the row that claimed them and is shared
+    across batches.
+
+    Returns:
+        tuple: (list of valid (row_num, row_data, values) tuples,
+                list of error dicts)
+    """
+    from .models import Item
+
+    row_errors = [[] for _ in batch]
+    columns = {
+        field: [row_data[field] for _, row_data in batch] for field in ITEM_CSV_FIELDS
+    }
+
+    for field, message in (
+        ("name", "Name is required."),
+        ("sku", "SKU is required."),
+    ):
+        for value, errors in zip(columns[field], row_errors):
+            if not value:
+                errors.append(message)
+
+    for unit_value, errors in zip(columns["unit"], row_errors):
+        if not unit_value:
+            errors.append("Unit of Measure is required.")
+        elif len(units.get(unit_value.lower(), [])) > 1:
+            errors.append(
+                f"Multiple Units of Measure found for '{unit_value}'. Please ensure unit names/abbreviations are unique in your system or use a more specific value in the CSV (e.g., abbreviation)."
+            )
+
+    values = {"name": columns["name"], "sku": columns["sku"]}
+    for field in ("selling_price", "purchase_price"):
+        values[field] = _parse_decimal_column(
+            columns[field], field.replace("_", " "), row_errors
+        )
+    for field, default in (
+        ("opening_stock", None),
+        ("reorder_point", None),
+        ("current_stock", 0),
+    ):
+        values[field] = _parse_whole_number_column(
+            columns[field], field.replace("_", " "), row_errors, default=default
+        )
+
+    # Model field validation without touching the DB, once per distinct value
+    clean_rows = [i for i, errors in enumerate(row_errors) if not errors]
+    for field, column in values.items():
+        model_field = Item._meta.get_field(field)
+        label = field.replace("_", " ").title()
+        messages = {}
+        for i in clean_rows:
+            value = column[i]
+            if value not in messages:
+                try:
+                    model_field.clean(value, None)
+                    messages[value] = None
+                except ValidationError as e:
+                    messages[value] = f"{label}: {'; '.join(e.messages)}"
+            if messages[value]:
+                row_errors[i].append(messages[value])
+
+    valid_rows = []
+    errors = []
+    for i, (row_num, row_data) in enumerate(batch):
+        sku = columns["sku"][i]
+        if not row_errors[i]:
+            if sku in seen_skus:
+                row_errors[i].append(
+                    f"Duplicate SKU '{sku}' in file (already used on row {seen_skus[sku]})."
+                )
+            else:
+                seen_skus[sku] = row_num
+        if row_errors[i]:
+            errors.append(
+                {"row_num": row_num, "data": row_data, "messages": row_errors[i]}
+            )
+        else:
+            valid_rows.append(
+                (row_num, row_data, {field: values[field][i] for field in values})
+            )
+    return valid_rows, errors
+
+
+def _ensure_units_and_categories(valid_rows, units, categories):
+    """
+    Creates the units and categories referenced by a batch that do not exist
+    yet, one bulk_create per model. Returns the newly created lookup keys so
+    they can be dropped again if the batch is rolled back.
+    """
+    from main import search
+
+    from .models import Category, UnitOfMeasure
+
+    new_units = {}
+    new_categories = {}
+    for _, row_data, _ in valid_rows:
+        unit_key = row_data["unit"].lower()
+        if unit_key not in units and unit_key not in new_units:
+            new_units[unit_key] = UnitOfMeasure(name=row_data["unit"], abbreviation="")
+        category_key = row_data["category"].lower()
+        if (
+            category_key
+            and category_key not in categories
+            and category_key not in new_categories
+        ):
+            new_categories[category_key] = Category(name=row_data["category"])
+
+    for unit in UnitOfMeasure.objects.bulk_create(new_units.values()):
+        units[unit.name.lower()] = [unit]
+    for category in Category.objects.bulk_create(new_categories.values()):
+        categories[category.name.lower()] = category
+    search.index_objects(
+        category for key, category in categories.items() if key in new_categories
+    )
+
+    return list(new_units), list(new_categories)
+
+
+def _save_item_batch(valid_rows, units, categories):
+    """
+    Writes one batch of validated rows with bulk_create/bulk_update and records
+    the resulting stock changes in the ledger. Must run inside a transaction.
+    """
+    from main import search
+
+    from .costing import record_receipts
+    from .models import Item, StockMovement
+    from .stock import adjust_low_stock_count, is_low_stock
+
+    rows_by_sku = {}
+    for row_num, row_data, values in valid_rows:
+        values = dict(values)
+        values["unit"] = units[row_data["unit"].lower()][0]
+        values["category"] = categories.get(row_data["category"].lower())
+        rows_by_sku[values["sku"]] = (row_num, values)
+
+    existing = {
+        item.sku: item
+        for item in Item.objects.select_for_update().filter(sku__in=rows_by_sku)
+    }
+
+    to_create = []
+    to_update = []
+    movements = []
+    low_stock_delta = 0
+    now = timezone.now()
+    for sku, (row_num, values) in rows_by_sku.items():
+        low_stock_delta += is_low_stock(
+            values["current_stock"], values["reorder_point"]
+        )
+        item = existing.get(sku)
+        if item is None:
+            to_create.append(Item(**values))
+            continue
+
+        low_stock_delta -= is_low_stock(item.current_stock, item.reorder_point)
+
+        stock_delta = values["current_stock"] - item.current_stock
+        if stock_delta:
+            movements.append(
+                StockMovement(
+                    item=item,
+                    quantity=stock_delta,
+                    source=StockMovement.IMPORT,
+                    reference=f"CSV row {row_num}",
+                )
+            )
+        for field, value in values.items():
+            setattr(item, field, value)
+        item.updated_at = now
+        to_update.append(item)
+
+    created = Item.objects.bulk_create(to_create)
+    movements.extend(
+        StockMovement(
+            item=item, quantity=item.current_stock, source=StockMovement.OPENING
+        )
+        for item in created
+        if item.current_stock
+    )
+    Item.objects.bulk_update(
+        to_update,
+        [
+            "name",
+            "unit",
+            "category",
+            "selling_price",
+            "purchase_price",
+            "opening_stock",
+            "reorder_point",
+            "current_stock",
+            "updated_at",
+        ],
+    )
+    StockMovement.objects.bulk_create(movements)
+    record_receipts(movements)
+    adjust_low_stock_count(low_stock_delta)
+    evaluate_low_stock_alerts([item.pk for item in created + to_update])
+    search.index_objects(created + to_update)
+
+
+def _write_item_batch(valid_rows, units, categories):
+    """
+    Writes a batch of validated rows in a single transaction. If the batch
+    fails, it is retried one row at a time to isolate the failing rows.
+
+    Returns:
+        tuple: (number of rows imported, list of error dicts)
+    """
+    errors = []
+    new_unit_keys, new_category_keys = [], []
+    try:
+        with transaction.atomic():
+            new_unit_keys, new_category_keys = _ensure_units_and_categories(
+                valid_rows, units, categories
+            )
+            _save_item_batch(valid_rows, units, categories)
+        return len(valid_rows), errors
+    except (IntegrityError, ValidationError) as e:
+        # Forget lookups created by the rolled-back transaction
+        for key in new_unit_keys:
+            units.pop(key, None)
+        for key in new_category_keys:
+            categories.pop(key, None)
+
+        if len(valid_rows) == 1:
+            row_num, row_data, values = valid_rows[0]
+            if isinstance(e, IntegrityError):
+                message = f"SKU '{values['sku']}' already exists. Item not imported/updated to avoid duplication."
+            else:
+                message = f"An unexpected error occurred: {e}"
+            errors.append({"row_num": row_num, "data": row_data, "messages": [message]})
+            return 0, errors
+
+    # Isolate the failing row(s) by retrying the batch one row at a time
+    imported = 0
+    for valid_row in valid_rows:
+        row_imported, row_errors = _write_item_batch([valid_row], units, categories)
+        imported += row_imported
+        errors.extend(row_errors)
+    errors.sort(key=lambda error: error["row_num"])
+    return imported, errors
+
+
+def _iter_text_lines(csv_file, encoding="utf-8-sig"):
+    """
+    Decodes an uploaded file chunk by chunk and yields it line by line, so
+    the whole file is never held in memory as one string.
+
+    Lines are split on "\\n" only and keep their line endings, which lets
+    csv.reader handle quoted fields that span several lines.
+    """
+    if hasattr(csv_file, "chunks"):
+        chunks = csv_file.chunks()
+    else:
+        chunks = iter(lambda: csv_file.read(64 * 1024), b"")
+
+    decoder = codecs.getincrementaldecoder(encoding)()
+    pending = ""
+    for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line + "\n"
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+def _iter_row_batches(reader, header_to_index, batch_size):
+    """
+    Lazily maps CSV rows to field dicts and yields them in lists of at most
+    `batch_size` (row_num, row_data) pairs.
+    """
+    batch = []
+    for row_num, row in enumerate(reader, start=2):  # Row 1 is the header
+        # Populate row_data based on header mapping, defaulting missing columns
+        row_data = {
+            field_name: (row[col_index].strip() if col_index < len(row) else "")
+            for field_name, col_index in header_to_index.items()
+        }
+        batch.append((row_num, row_data))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def count_csv_rows(csv_file):
+    """Counts the data rows (excluding the header) of a CSV file as a stream."""
+    return max(sum(1 for _ in csv.reader(_iter_text_lines(csv_file))) - 1, 0)
+
+
+def generate_import_error_csv(errors):
+    """
+    Builds the downloadable error report for an item import.
+
+    Args:
+        errors (list): The 'errors' list returned by process_item_csv_upload.
+
+    Returns:
+        StringIO: A StringIO object containing the CSV data.
+    """
+    output = StringIO()
+    writer = csv.writer(output)
+    writer.writerow(["row_num", "errors", *ITEM_CSV_FIELDS])
+    for error in errors:
+        writer.writerow(
+            [
+                error["row_num"],
+                "; ".join(error["messages"]),
+                *(error["data"].get(field, "") for field in ITEM_CSV_FIELDS),
+            ]
+        )
+    output.seek(0)
+    return output
+
+
+def _preview_item_batch(valid_rows, existing_skus, units, categories, preview):
+    """
+    Records what importing a batch of validated rows would do, without
+    writing anything. New units and categories are added to the lookups so
+    they are only reported once.
+    """
+    for _, row_data, values in valid_rows:
+        if values["sku"] in existing_skus:
+            preview["would_update"].append(values["sku"])
+        else:
+            preview["would_create"].append(values["sku"])
+
+        unit_key = row_data["unit"].lower()
+        if unit_key not in units:
+            units[unit_key] = [None]
+            preview["new_units"].append(row_data["unit"])
+        category_key = row_data["category"].lower()
+        if category_key and category_key not in categories:
+            categories[category_key] = None
+            preview["new_categories"].append(row_data["category"])
+
+
+def process_item_csv_upload(
+    csv_file, batch_size=None, on_batch=None, validate_only=False
+):
     """
     Processes an uploaded CSV file to import or update Item records.
     Automatically creates UnitOfMeasure and Category objects if they do not exist.
 
+    The file is decoded and parsed as a stream. Units, categories and matching
+    SKUs are resolved from in-memory lookups and rows are written in batches of
+    `batch_size` with bulk_create/bulk_update, one transaction per batch. Only
+    failed rows are kept in memory. A SKU may appear only once per file: the
+    first valid row claims it and later rows with the same SKU are reported as
+    errors, both in the dry run and in the real import.
+
     Args:
         csv_file: A Django UploadedFile object.
+        batch_size (int): Rows per batch. Defaults to ITEM_IMPORT_BATCH_SIZE.
+        on_batch (callable): Optional progress hook, called after every committed
+              batch with (rows_done, rows_failed).
+        validate_only (bool): Dry run. Parses and validates the whole file and
+              reports what would happen without writing anything; the only
+              queries are one read each of existing SKUs, units and categories.
 
     Returns:
         dict: A dictionary containing import statistics and detailed errors.
@@ -87,23 +539,23 @@ def process_item_csv_upload(csv_file):
                       {'row_num': 5, 'data': {'name': 'Another Item'}, 'messages': ['Invalid selling price.']},
                   ]
               }
+              With validate_only, 'successful_imports' is 0 and the dict also
+              holds 'would_create' and 'would_update' (lists of SKUs) and
+              'new_units' and 'new_categories' (lists of names).
     """
-    from .models import Category, Item, UnitOfMeasure
+    from main.dashboard import bump_dashboard_version
+
+    from .models import Item
 
-    decoded_file = csv_file.read().decode("utf-8")
-    io_string = StringIO(decoded_file)
-    reader = csv.reader(io_string)
+    batch_size = batch_size or ITEM_IMPORT_BATCH_SIZE
 
-    headers = []
-    data_rows = []
+    reader = csv.reader(_iter_text_lines(csv_file))
 
-    # Read headers and data rows
+    # Read headers only; data rows are streamed in batches below
     try:
         headers = [
             h.strip().lower() for h in next(reader)
         ]  # Convert headers to lowercase for flexible matching
-        for row in reader:
-            data_rows.append(row)
     except StopIteration:
         return {
             "total_rows": 0,
@@ -127,26 +579,14 @@ def process_item_csv_upload(csv_file):
             ],
         }
 
-    # Expected column names from the template
-    expected_headers = [
-        "name",
-        "sku",
-        "unit",
-        "category",
-        "selling_price",
-        "purchase_price",
-        "opening_stock",
-        "reorder_point",
-        "current_stock",
-    ]
-
     # Validate headers
-    if not all(header in headers for header in expected_headers):
-        missing_headers = [h for h in expected_headers if h not in headers]
+    if not all(header in headers for header in ITEM_CSV_FIELDS):
+        missing_headers = [h for h in ITEM_CSV_FIELDS if h not in headers]
+        total_rows = sum(1 for _ in reader)
         return {
-            "total_rows": len(data_rows),
+            "total_rows": total_rows,
             "successful_imports": 0,
-            "failed_imports": len(data_rows),
+            "failed_imports": total_rows,
             "errors": [
                 {
                     "row_num": 0,
@@ -159,239 +599,206 @@ def process_item_csv_upload(csv_file):
         }
 
     # Create a mapping from header name to column index
-    header_to_index = {header: headers.index(header) for header in expected_headers}
+    header_to_index = {header: headers.index(header) for header in ITEM_CSV_FIELDS}
+
+    units, categories = _build_import_lookups()
+    if validate_only:
+        existing_skus = set(Item.objects.values_list("sku", flat=True))
+        preview = {
+            "would_create": [],
+            "would_update": [],
+            "new_units": [],
+            "new_categories": [],
+        }
 
+    total_rows = 0
     successful_imports = 0
-    failed_imports = 0
     errors = []
-
-    for i, row in enumerate(data_rows):
-        row_num = i + 2  # +1 for 0-indexed list, +1 for header row
-        row_data = {}
-        row_errors = []
-
-        # Populate row_data based on header mapping
-        for field_name in expected_headers:
-            col_index = header_to_index[field_name]
-            # Ensure row has enough columns
-            if col_index < len(row):
-                row_data[field_name] = row[col_index].strip()
-            else:
-                row_data[field_name] = ""  # Default to empty string if column missing
-
-        # --- Data Cleaning and Validation for each row ---
-        name = row_data.get("name")
-        sku = row_data.get("sku")
-        unit_value = row_data.get("unit")  # Renamed to avoid conflict with unit_obj
-        category_name = row_data.get("category")
-        selling_price_str = row_data.get("selling_price")
-        purchase_price_str = row_data.get("purchase_price")
-        opening_stock_str = row_data.get("opening_stock")
-        reorder_point_str = row_data.get("reorder_point")
-        current_stock_str = row_data.get("current_stock")
-
-        # 1. Name
-        if not name:
-            row_errors.append("Name is required.")
-
-        # 2. SKU
-        if not sku:
-            row_errors.append("SKU is required.")
-
-        # 3. UnitOfMeasure Lookup and Creation (UPDATED FOR OPTIONAL ABBREVIATION)
-        unit_obj = None
-        if not unit_value:
-            row_errors.append("Unit of Measure is required.")
-        else:
-            try:
-                # First, try to get the existing unit using the Q object
-                unit_obj = UnitOfMeasure.objects.get(
-                    Q(name__iexact=unit_value) | Q(abbreviation__iexact=unit_value)
-                )
-            except UnitOfMeasure.DoesNotExist:
-                # If not found, create a new one, setting only the name
-                # Abbreviation will be left blank, which requires blank=True in the model
-                try:
-                    unit_obj = UnitOfMeasure.objects.create(
-                        name=unit_value, abbreviation=""
-                    )  # Explicitly set to empty string
-                    # Optionally, add a message about new unit creation if desired for detailed logs
-                except IntegrityError:
-                    row_errors.append(
-                        f"Could not create Unit of Measure '{unit_value}'. A unit with this name or abbreviation might already exist."
-                    )
-                except (
-                    ValidationError
-                ) as e:  # Catch model validation errors during creation
-                    for field, field_errors in e.message_dict.items():
-                        row_errors.append(
-                            f"UnitOfMeasure {field.replace('_', ' ').title()}: {'; '.join(field_errors)}"
-                        )
-                except Exception as e:
-                    row_errors.append(
-                        f"Error creating Unit of Measure '{unit_value}': {e}"
-                    )
-            except UnitOfMeasure.MultipleObjectsReturned:
-                row_errors.append(
-                    f"Multiple Units of Measure found for '{unit_value}'. Please ensure unit names/abbreviations are unique in your system or use a more specific value in the CSV (e.g., abbreviation)."
-                )
-            except Exception as e:
-                row_errors.append(
-                    f"Error processing Unit of Measure '{unit_value}': {e}"
+    seen_skus = {}
+
+    for batch in _iter_row_batches(reader, header_to_index, batch_size):
+        total_rows += len(batch)
+        valid_rows, batch_errors = _validate_item_batch(batch, units, seen_skus)
+        if validate_only:
+            _preview_item_batch(valid_rows, existing_skus, units, categories, preview)
+        elif valid_rows:
+            imported, write_errors = _write_item_batch(valid_rows, units, categories)
+            successful_imports += imported
+            if imported:
+                # bulk_create/bulk_update send no signals to invalidate it
+                bump_dashboard_version()
+            if write_errors:
+                batch_errors = sorted(
+                    batch_errors + write_errors, key=lambda error: error["row_num"]
                 )
+        errors.extend(batch_errors)
+        if on_batch:
+            on_batch(total_rows, len(errors))
 
-        # 4. Category Lookup and Creation
-        category_obj = None
-        if category_name:
-            try:
-                # Automatically create category if it doesn't exist
-                category_obj, created = Category.objects.get_or_create(
-                    name__iexact=category_name,  # Case-insensitive lookup
-                    defaults={
-                        "name": category_name
-                    },  # Use the provided name for creation
-                )
-                if created:
-                    # You might want to log this or add a message, but not an error
-                    pass
-            except Exception as e:
-                row_errors.append(f"Error processing Category '{category_name}': {e}")
-
-        # 5. Selling Price
-        selling_price = None
-        if selling_price_str:
-            try:
-                selling_price = Decimal(selling_price_str)
-                if selling_price < 0:
-                    row_errors.append("Selling price cannot be negative.")
-            except InvalidOperation:
-                row_errors.append("Invalid selling price format.")
+    result = {
+        "total_rows": total_rows,
+        "successful_imports": successful_imports,
+        "failed_imports": len(errors),
+        "errors": errors,
+    }
+    if validate_only:
+        result.update(preview)
+    return result
 
-        # 6. Purchase Price
-        purchase_price = None
-        if purchase_price_str:
-            try:
-                purchase_price = Decimal(purchase_price_str)
-                if purchase_price < 0:
-                    row_errors.append("Purchase price cannot be negative.")
-            except InvalidOperation:
-                row_errors.append("Invalid purchase price format.")
 
-        # 7. Inventory fields (can be null/blank in model, but validate format if provided)
-        opening_stock = None
-        if opening_stock_str:
-            try:
-                opening_stock = int(opening_stock_str)
-                if opening_stock < 0:
-                    row_errors.append("Opening stock cannot be negative.")
-            except ValueError:
-                row_errors.append(
-                    "Invalid opening stock format (must be a whole number)."
-                )
+# Items read per chunk by reconcile_low_stock_alerts()
+ALERT_SCAN_CHUNK_SIZE = getattr(settings, "ALERT_SCAN_CHUNK_SIZE", 2000)
 
-        reorder_point = None
-        if reorder_point_str:
-            try:
-                reorder_point = int(reorder_point_str)
-                if reorder_point < 0:
-                    row_errors.append("Reorder point cannot be negative.")
-            except ValueError:
-                row_errors.append(
-                    "Invalid reorder point format (must be a whole number)."
-                )
 
-        current_stock = 0  # Default to 0 as per model
-        if current_stock_str:
-            try:
-                current_stock = int(current_stock_str)
-                if current_stock < 0:
-                    row_errors.append("Current stock cannot be negative.")
-            except ValueError:
-                row_errors.append(
-                    "Invalid current stock format (must be a whole number)."
-                )
+def _open_low_stock_alerts():
+    from .models import StockAlert
 
-        # If there are no row-specific validation errors, attempt to save/update
-        if not row_errors:
-            try:
-                with transaction.atomic():
-                    item_instance, created = Item.objects.get_or_create(
-                        sku=sku,  # Use SKU for lookup
-                        defaults={
-                            "name": name,
-                            "unit": unit_obj,
-                            "category": category_obj,
-                            "selling_price": selling_price,
-                            "purchase_price": purchase_price,
-                            "opening_stock": opening_stock,
-                            "reorder_point": reorder_point,
-                            "current_stock": current_stock,
-                        },
-                    )
-                    if not created:
-                        # Update existing item
-                        item_instance.name = name
-                        item_instance.unit = unit_obj
-                        item_instance.category = category_obj
-                        item_instance.selling_price = selling_price
-                        item_instance.purchase_price = purchase_price
-                        item_instance.opening_stock = opening_stock
-                        item_instance.reorder_point = reorder_point
-                        item_instance.current_stock = (
-                            current_stock  # Update current stock directly
-                        )
-
-                    # Call full_clean for model-level validation before saving
-                    item_instance.full_clean()
-                    item_instance.save()
-                    successful_imports += 1
-
-            except IntegrityError:
-                row_errors.append(
-                    f"SKU '{sku}' already exists. Item not imported/updated to avoid duplication."
+    return StockAlert.objects.filter(alert_type="low_stock", is_resolved=False)
+
+
+def _apply_low_stock_alerts(rows, alerted):
+    """
+    Opens and resolves alerts for `rows`, (id, name, current stock, reorder
+    point) tuples of items, given the ids of those with an open alert. One
+    bulk_create and one update() at most.
+
+    Returns:
+        tuple: (alerts opened, items whose alerts were resolved)
+    """
+    from .models import StockAlert
+    from .stock import is_low_stock
+
+    crossed = []
+    recovered = []
+    for item_id, name, current_stock, reorder_point in rows:
+        low = is_low_stock(current_stock, reorder_point)
+        if low and item_id not in alerted:
+            crossed.append(
+                StockAlert(
+                    item_id=item_id,
+                    alert_type="low_stock",
+                    message=(
+                        f"Stock for '{name}' is low (Current: "
+                        f"{current_stock}, Reorder Point: {reorder_point})"
+                    ),
                 )
-            except ValidationError as e:
-                # Catch model-level validation errors
-                for field, field_errors in e.message_dict.items():
-                    row_errors.append(
-                        f"{field.replace('_', ' ').title()}: {'; '.join(field_errors)}"
-                    )
-            except Exception as e:
-                row_errors.append(f"An unexpected error occurred: {e}")
-
-        if row_errors:
-            failed_imports += 1
-            errors.append(
-                {"row_num": row_num, "data": row_data, "messages": row_errors}
             )
+        elif not low and item_id in alerted:
+            recovered.append(item_id)
+    StockAlert.objects.bulk_create(crossed)
+    if recovered:
+        _open_low_stock_alerts().filter(item_id__in=recovered).update(is_resolved=True)
+    return len(crossed), len(recovered)
 
+
+def evaluate_low_stock_alerts(item_ids):
+    """
+    Brings the open low-stock alerts of a set of items in line with their
+    stock: opens one for each item at or below its reorder point that has
+    none, and resolves those of items back above it. One query reads the
+    items together with whether they have an open alert, then one
+    bulk_create and one update() apply the difference.
+
+    Every path that changes stock levels or reorder points calls this with
+    the items it touched, inside its transaction.
+    """
+    from django.db.models import Exists, OuterRef
+
+    from .models import Item
+
+    if not item_ids:
+        return
+    rows = list(
+        Item.objects.filter(pk__in=item_ids)
+        .annotate(
+            has_alert=Exists(_open_low_stock_alerts().filter(item=OuterRef("pk")))
+        )
+        .values_list("pk", "name", "current_stock", "reorder_point", "has_alert")
+    )
+    _apply_low_stock_alerts(
+        [row[:4] for row in rows], {row[0] for row in rows if row[4]}
+    )
+
+
+def reconcile_low_stock_alerts(chunk_size=ALERT_SCAN_CHUNK_SIZE):
+    """
+    Checks the open low-stock alerts of the whole catalogue against stock,
+    repairing any a write outside the stock paths left stale.
+
+    Items are streamed in primary-key order with iterator(), so memory stays
+    at one chunk however large the catalogue. Each chunk is compared with
+    the open alerts of its primary-key range (one indexed query) and fixed
+    with one bulk_create and one update() when anything differs.
+
+    Returns:
+        dict: Items scanned, alerts opened and resolved, the scan's duration
+              in seconds and the items scanned per second.
+    """
+    from .models import Item
+
+    started = time.monotonic()
+    rows = (
+        Item.objects.order_by("pk")
+        .values_list("pk", "name", "current_stock", "reorder_point")
+        .iterator(chunk_size=chunk_size)
+    )
+    scanned = opened = resolved = 0
+    while chunk := list(islice(rows, chunk_size)):
+        scanned += len(chunk)
+        alerted = set(
+            _open_low_stock_alerts()
+            .filter(item_id__gte=chunk[0][0], item_id__lte=chunk[-1][0])
+            .values_list("item_id", flat=True)
+        )
+        chunk_opened, chunk_resolved = _apply_low_stock_alerts(chunk, alerted)
+        opened += chunk_opened
+        resolved += chunk_resolved
+
+    duration = time.monotonic() - started
     return {
-        "total_rows": len(data_rows),
-        "successful_imports": successful_imports,
-        "failed_imports": failed_imports,
-        "errors": errors,
+        "items": scanned,
+        "opened": opened,
+        "resolved": resolved,
+        "duration": round(duration, 3),
+        "rows_per_second": round(scanned / duration) if duration else scanned,
     }
 
 
-def check_and_create_low_stock_alert(item):
-    from .models import StockAlert
-
-    if item.reorder_point is not None and item.current_stock <= item.reorder_point:
-        # Check for existing unresolved alert
-        existing = StockAlert.objects.filter(
-            item=item, alert_type="low_stock", is_resolved=False
-        ).first()
-
-        if not existing:
-            # Create alert
-            alert = StockAlert.objects.create(
-                item=item,
-                alert_type="low_stock",
-                message=f"Stock for '{item.name}' is low (Current: {item.current_stock}, Reorder Point: {item.reorder_point})",
-            )
+def send_low_stock_summary(only_new=False):
+    """
+    Emails the items with an open low-stock alert and marks the alerts as
+    emailed. With `only_new`, alerts already emailed are left out.
 
-    else:
-        # Resolve any unresolved low stock alerts
-        StockAlert.objects.filter(
-            item=item, alert_type="low_stock", is_resolved=False
-        ).update(is_resolved=True)
+    Returns:
+        int: The number of alerts emailed; nothing is sent when there are none.
+    """
+    alerts = _open_low_stock_alerts().select_related("item").order_by("item__name")
+    if only_new:
+        alerts = alerts.filter(notified_by_email=False)
+    alerts = list(alerts)
+    if not alerts:
+        return 0
+
+    items = [alert.item for alert in alerts]
+    context = {"items": items, "date": timezone.now()}
+    html_content = render_to_string("emails/low_stock_summary.html", context)
+    text_content = "Low stock items:\n\n" + "\n".join(
+        f"{item.name} (SKU: {item.sku}) — Stock: {item.current_stock}, "
+        f"Reorder point: {item.reorder_point}"
+        for item in items
+    )
+    msg = EmailMultiAlternatives(
+        "[Stockflow] Daily Low Stock Summary",
+        text_content,
+        settings.DEFAULT_FROM_EMAIL,
+        [settings.EMAIL_HOST_USER],
+    )
+    msg.attach_alternative(html_content, "text/html")
+    msg.send()
+
+    # Alerts opened since they were read have higher ids and wait for the
+    # next email
+    _open_low_stock_alerts().filter(pk__lte=max(alert.pk for alert in alerts)).update(
+        notified_by_email=True
+    )
+    return len(alerts)
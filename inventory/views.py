@@ -5,18 +5,38 @@ from django.contrib.auth.decorators import login_required
 from django.core.exceptions import ValidationError
 from django.db import IntegrityError, models, transaction
 from django.db.models import Count
-from django.http import HttpResponse
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.template.defaultfilters import date as date_filter
+from django.urls import reverse
+from django.utils.html import escape, format_html
 
 from authentication.models import UserProfile
 from inventory.models import Item  # or your actual app name
 from purchases.models import Purchase
 from sales.models import Sale
+from stockflow.autocomplete import autocomplete_response
+from stockflow.datatables import clickable_row, currency, datatable_response
+from stockflow.exports import csv_export_response, export_rows
+from stockflow.pagination import KeysetPaginator, approximate_count
 
 from .forms import CategoryForm, InventoryAdjustmentForm, UnitOfMeasureForm
-from .models import Category, InventoryAdjustment, ItemImage, UnitOfMeasure
-from .tasks import send_low_stock_summary_email
-from .utils import generate_item_csv_template, process_item_csv_upload
+from .models import (
+    Category,
+    ImportJob,
+    InventoryAdjustment,
+    ItemImage,
+    StockMovement,
+    UnitOfMeasure,
+)
+from .rollups import record_adjustment
+from .stock import apply_stock_delta
+from .tasks import import_items_task, send_low_stock_summary_email
+from .utils import (
+    evaluate_low_stock_alerts,
+    generate_item_csv_template,
+    process_item_csv_upload,
+)
 
 
 @login_required
@@ -25,12 +45,105 @@ def items_view(request):
     Displays a list of all items.
     Requires user to be logged in.
     """
-    items = Item.objects.all()
-    total_items = Item.objects.count()
-    context = {"items": items, "total_items": total_items}
+    # Rows are fetched page by page from items_data
+    context = {"total_items": Item.objects.count()}
     return render(request, "items.html", context)
 
 
+def _item_row(item):
+    current_stock = item.current_stock
+    if item.reorder_point is not None and current_stock <= item.reorder_point:
+        current_stock = format_html(
+            '<span class="text-danger fw-bold">{}</span>', current_stock
+        )
+    return clickable_row(
+        reverse("view_item", args=[item.pk]),
+        name=escape(item.name),
+        sku=escape(item.sku),
+        category=escape(item.category.name if item.category else "N/A"),
+        unit=escape(item.unit.name if item.unit else "N/A"),
+        purchase_price=currency(item.purchase_price),
+        selling_price=currency(item.selling_price),
+        opening_stock=item.opening_stock if item.opening_stock is not None else "",
+        current_stock=current_stock,
+        created_at=date_filter(item.created_at, "Y-m-d H:i"),
+    )
+
+
+@login_required
+def items_data(request):
+    """DataTables server-side endpoint for the items table."""
+    return datatable_response(
+        request,
+        Item.objects.select_related("category", "unit"),
+        columns=[
+            "name",
+            "sku",
+            "category__name",
+            "unit__name",
+            "purchase_price",
+            "selling_price",
+            "opening_stock",
+            "current_stock",
+            "created_at",
+        ],
+        render_row=_item_row,
+        search_fields=["name", "sku", "category__name", "unit__name"],
+        default_order=["-created_at"],
+    )
+
+
+def _item_result(item):
+    return {
+        "id": item.pk,
+        "text": str(item),
+        "sku": item.sku,
+        "current_stock": item.current_stock,
+        "selling_price": item.selling_price,
+        "purchase_price": item.purchase_price,
+    }
+
+
+@login_required
+def item_autocomplete(request):
+    """select2 options for the item pickers of the entry forms."""
+    return autocomplete_response(request, Item.objects.all(), "item", _item_result)
+
+
+@login_required
+def export_items(request):
+    """Streams the full item list as CSV."""
+    items = Item.objects.order_by("name", "pk")
+    return csv_export_response(
+        "items.csv",
+        [
+            "Name",
+            "SKU",
+            "Category",
+            "Unit",
+            "Purchase Price",
+            "Selling Price",
+            "Opening Stock",
+            "Current Stock",
+            "Reorder Point",
+            "Added",
+        ],
+        export_rows(
+            items,
+            "name",
+            "sku",
+            "category__name",
+            "unit__name",
+            "purchase_price",
+            "selling_price",
+            "opening_stock",
+            "current_stock",
+            "reorder_point",
+            "created_at",
+        ),
+    )
+
+
 @login_required
 def add_item(request):
     """
@@ -653,19 +766,30 @@ def edit_item(request, pk):
     return render(request, "forms/edit/edit_item.html", context)
 
 
+# Rows per page in each of the item page's transaction tables
+ITEM_HISTORY_PER_PAGE = 20
+
+
 @login_required
 def view_item(request, pk):
     item = get_object_or_404(Item, pk=pk)
-    sales = Sale.objects.filter(item=item).order_by("-date")
-    purchases = Purchase.objects.filter(item=item).order_by("-date")
-    adjustments = InventoryAdjustment.objects.filter(item=item).order_by("-date")
-
-    context = {
-        "item": item,
-        "sales": sales,
-        "purchases": purchases,
-        "adjustments": adjustments,
+    histories = {
+        "sales": Sale.objects.filter(item=item).select_related("customer"),
+        "purchases": Purchase.objects.filter(item=item).select_related("supplier"),
+        "adjustments": InventoryAdjustment.objects.filter(item=item).select_related(
+            "user"
+        ),
     }
+
+    context = {"item": item}
+    for name, queryset in histories.items():
+        # Each transaction table pages independently by its own cursor
+        cursor = request.GET.get(f"{name}_cursor")
+        paginator = KeysetPaginator(queryset, ("-date", "-pk"), ITEM_HISTORY_PER_PAGE)
+        context[name] = paginator.get_page(cursor)
+        context[f"{name}_total"] = approximate_count(queryset)
+        if cursor:
+            context["show_transactions"] = True
     return render(request, "view/view_item.html", context)
 
 
@@ -719,7 +843,8 @@ def generate_csv_template_view(request):
 @login_required
 def import_items_view(request):
     """
-    View to handle displaying the CSV import form and processing uploaded files.
+    View to handle displaying the CSV import form and queueing uploaded files.
+    The import itself runs in import_items_task; the page polls its progress.
     """
     if request.method == "POST":
         csv_file = request.FILES.get("csv_file")
@@ -733,52 +858,70 @@ def import_items_view(request):
             messages.error(request, "Invalid file type. Please upload a CSV file.")
             return redirect("import_items")
 
+        if "validate_only" in request.POST:
+            # The dry run is fast enough to run inline and writes nothing
+            preview = process_item_csv_upload(csv_file, validate_only=True)
+            return render(
+                request, "forms/import/import_items.html", {"preview": preview}
+            )
+
+        job = ImportJob.objects.create(file=csv_file, user=request.user)
         try:
-            # Call the utility function to process the CSV
-            import_results = process_item_csv_upload(csv_file)
+            import_items_task.delay(job.pk)  # type: ignore
+        except Exception as e:
+            job.status = ImportJob.FAILED
+            job.error_message = str(e)
+            job.save(update_fields=["status", "error_message"])
+            messages.error(request, f"Could not start the import: {e}")
+            return redirect("import_items")
 
-            total_rows = import_results["total_rows"]
-            successful_imports = import_results["successful_imports"]
-            failed_imports = import_results["failed_imports"]
-            errors = import_results["errors"]
+        messages.info(request, "Import started. Progress is shown below.")
+        return redirect(f"{reverse('import_items')}?job={job.pk}")
 
-            if successful_imports > 0:
-                messages.success(
-                    request,
-                    f"Successfully imported/updated {successful_imports} out of {total_rows} items.",
-                )
+    # For GET requests, render the form and the job being followed, if any
+    job = None
+    job_id = request.GET.get("job")
+    if job_id and job_id.isdigit():
+        job = ImportJob.objects.filter(pk=job_id).first()
+    return render(request, "forms/import/import_items.html", {"job": job})
 
-            if failed_imports > 0:
-                error_message = f"Failed to import/update {failed_imports} items. See details below:"
-                messages.error(request, error_message)
-                # Store detailed errors in session or pass directly to context if re-rendering
-                # For simplicity, we'll add them as individual messages here.
-                for error_detail in errors:
-                    row_num = error_detail["row_num"]
-                    error_data = error_detail["data"]
-                    error_messages = "; ".join(error_detail["messages"])
-                    messages.warning(
-                        request,
-                        f"Row {row_num}: {error_messages} (Data: {error_data.get('name', 'N/A')}, SKU: {error_data.get('sku', 'N/A')})",
-                    )
 
-            if successful_imports == 0 and failed_imports == 0 and total_rows > 0:
-                messages.info(
-                    request, "No items were processed. Check CSV format and content."
-                )
-            elif total_rows == 0:
-                messages.info(request, "The uploaded CSV file was empty.")
-
-            return redirect("import_items")  # Redirect back to show messages
+@login_required
+def import_job_progress(request, pk):
+    """Lightweight JSON progress endpoint polled by the import page."""
+    job = get_object_or_404(ImportJob, pk=pk)
+    return JsonResponse(
+        {
+            "status": job.status,
+            "status_display": job.get_status_display(),  # type: ignore
+            "is_finished": job.is_finished,
+            "total_rows": job.total_rows,
+            "rows_done": job.rows_done,
+            "rows_imported": job.rows_imported,
+            "rows_failed": job.rows_failed,
+            "rows_per_second": job.rows_per_second,
+            "error_message": job.error_message,
+            "error_report_url": (
+                reverse("download_import_errors", args=[job.pk])
+                if job.error_report
+                else None
+            ),
+        }
+    )
 
-        except Exception as e:
-            messages.error(
-                request, f"An unexpected error occurred during CSV processing: {e}"
-            )
-            return redirect("import_items")
 
-    # For GET requests, just render the form
-    return render(request, "forms/import/import_items.html")
+@login_required
+def download_import_errors(request, pk):
+    """Downloads the per-row error report of an import job as CSV."""
+    job = get_object_or_404(ImportJob, pk=pk)
+    if not job.error_report:
+        raise Http404("This import has no error report.")
+    return FileResponse(
+        job.error_report.open("rb"),
+        as_attachment=True,
+        filename=f"import_{job.pk}_errors.csv",
+        content_type="text/csv",
+    )
 
 
 ## CATEGORIES
@@ -1029,16 +1172,48 @@ def delete_all_units(request):
 ## INVENTORY ADJUSTMENTS
 @login_required
 def inventory_adjustments(request):
-    adjustments = InventoryAdjustment.objects.select_related(
-        "item", "item__unit", "user"
-    ).order_by("-date")
+    # Rows are fetched page by page from inventory_adjustments_data
+    context = {"total_adjustments": InventoryAdjustment.objects.count()}
+    return render(request, "inventory_adjustments.html", context)
 
-    context = {
-        "adjustments": adjustments,
-        "total_adjustments": adjustments.count(),
-    }
 
-    return render(request, "inventory_adjustments.html", context)
+def _adjustment_row(adjustment):
+    user = adjustment.user
+    return clickable_row(
+        reverse("view_adjustment", args=[adjustment.pk]),
+        item=escape(adjustment.item.name),
+        adjustment_type=format_html(
+            '<span class="badge bg-{}">{}</span>',
+            (
+                "success"
+                if adjustment.adjustment_type == InventoryAdjustment.INCREASE
+                else "danger"
+            ),
+            adjustment.get_adjustment_type_display(),
+        ),
+        quantity=escape(
+            f"{adjustment.quantity_adjusted} "
+            f"{adjustment.item.unit.name if adjustment.item.unit else ''}".strip()
+        ),
+        reason=escape(adjustment.get_reason_display()),
+        description=escape(adjustment.description or "—"),
+        user=escape((user.get_full_name() or user.username) if user else "—"),
+        date=date_filter(adjustment.date, "Y-m-d H:i"),
+    )
+
+
+@login_required
+def inventory_adjustments_data(request):
+    """DataTables server-side endpoint for the adjustments table."""
+    return datatable_response(
+        request,
+        InventoryAdjustment.objects.select_related("item", "item__unit", "user"),
+        columns=["item__name", None, None, None, None, None, "date"],
+        render_row=_adjustment_row,
+        search_fields=["item__name", "reason", "description", "user__username"],
+        default_order=["-date"],
+        keyset=True,
+    )
 
 
 @login_required
@@ -1059,7 +1234,6 @@ def add_adjustment(request):
         "forms/add/add_adjustment.html",
         {
             "form": form,
-            "items": Item.objects.all(),
             "reason_choices": InventoryAdjustment.REASON_CHOICES,
             "errors": form.errors,
             "form_data": form.data,
@@ -1112,14 +1286,18 @@ def view_adjustment(request, pk):
 def delete_adjustment(request, pk):
     adjustment = get_object_or_404(InventoryAdjustment, pk=pk)
 
-    # Reverse stock change
-    if adjustment.adjustment_type == "INCREASE":
-        adjustment.item.current_stock -= adjustment.quantity_adjusted
-    elif adjustment.adjustment_type == "DECREASE":
-        adjustment.item.current_stock += adjustment.quantity_adjusted
-    adjustment.item.save()
-
-    adjustment.delete()
+    with transaction.atomic():
+        # Reverse stock change
+        apply_stock_delta(
+            adjustment.item_id,  # type: ignore
+            -adjustment.stock_delta,
+            source=StockMovement.ADJUSTMENT,
+            reference=f"ADJ-{adjustment.pk}",
+            allow_negative=True,
+        )
+        record_adjustment(adjustment, sign=-1)
+        adjustment.delete()
+        evaluate_low_stock_alerts([adjustment.item_id])  # type: ignore
     messages.success(request, "Inventory adjustment deleted successfully.")
     return redirect("inventory_adjustments")
 
@@ -1127,19 +1305,23 @@ def delete_adjustment(request, pk):
 @login_required
 def delete_all_adjustments(request):
     if request.method == "POST":
-        adjustments = InventoryAdjustment.objects.select_related("item")
-
-        for adjustment in adjustments:
-            item = adjustment.item
-
-            # Reverse stock change
-            if adjustment.adjustment_type == "INCREASE":
-                item.current_stock -= adjustment.quantity_adjusted
-            elif adjustment.adjustment_type == "DECREASE":
-                item.current_stock += adjustment.quantity_adjusted
-
-            item.save()
-            adjustment.delete()
+        adjustments = InventoryAdjustment.objects.all()
+        item_ids = set()
+
+        with transaction.atomic():
+            for adjustment in adjustments:
+                # Reverse stock change
+                apply_stock_delta(
+                    adjustment.item_id,  # type: ignore
+                    -adjustment.stock_delta,
+                    source=StockMovement.ADJUSTMENT,
+                    reference=f"ADJ-{adjustment.pk}",
+                    allow_negative=True,
+                )
+                record_adjustment(adjustment, sign=-1)
+                adjustment.delete()
+                item_ids.add(adjustment.item_id)  # type: ignore
+            evaluate_low_stock_alerts(item_ids)
 
         messages.success(
             request, "All inventory adjustments deleted and stock levels updated."
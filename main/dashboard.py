@@ -0,0 +1,210 @@
+"""
+Cached KPI blocks for the home dashboard.
+
+Each block is stored in Django's cache under a key that embeds a global
+dashboard version. Writes to sales, purchases, items and adjustments bump the
+version (see main.signals), which makes every cached block stale at once
+without having to know or delete the individual keys.
+
+The version is a Counter row in the database rather than a cache key, so a
+bump from any web or Celery process reaches every other process even when
+each has its own cache.
+"""
+
+import json
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import CharField, ExpressionWrapper, F, FloatField, Sum, Value
+
+from inventory.models import Category, Counter, DailyItemSummary
+from purchases.models import Purchase
+from reports import analytics
+from sales.models import Sale
+
+VERSION_KEY = "dashboard:version"
+
+# Seconds a block stays cached if the version is never bumped
+DASHBOARD_CACHE_TIMEOUT = getattr(settings, "DASHBOARD_CACHE_TIMEOUT", 60 * 60)
+
+
+def get_dashboard_version():
+    version = (
+        Counter.objects.filter(name=VERSION_KEY).values_list("value", flat=True).first()
+    )
+    if version is None:
+        # A fresh, time-based start so blocks cached under the version of a
+        # deleted row are never served again.
+        counter, _created = Counter.objects.get_or_create(
+            name=VERSION_KEY, defaults={"value": time.time_ns()}
+        )
+        version = counter.value
+    return version
+
+
+def bump_dashboard_version():
+    """Invalidates every cached dashboard block."""
+    if not Counter.objects.filter(name=VERSION_KEY).update(value=F("value") + 1):
+        Counter.objects.get_or_create(
+            name=VERSION_KEY, defaults={"value": time.time_ns()}
+        )
+
+
+def get_block(name, compute):
+    """
+    Returns the cached value of a dashboard block, computing and storing it
+    under the current version on a miss. `compute` must return a picklable
+    value (evaluate querysets into lists).
+    """
+    key = f"dashboard:v{get_dashboard_version()}:{name}"
+    return cache.get_or_set(key, compute, DASHBOARD_CACHE_TIMEOUT)
+
+
+def stock_counts():
+    counts = analytics.item_counts()
+    return {
+        **counts,
+        "num_categories": Category.objects.count(),
+        "sufficient_stock_count": counts["num_items"] - counts["low_stock_count"],
+    }
+
+
+def transaction_totals():
+    # Sales and purchase figures come from the DailyItemSummary rollup, which
+    # stays small and indexed no matter how much transaction history exists.
+    return analytics.ledger_totals()
+
+
+def top_selling_items():
+    return list(
+        DailyItemSummary.objects.values("item__name", "item__unit__name")
+        .annotate(total_quantity=Sum("quantity_sold"), total_sales=Sum("revenue"))
+        .filter(total_quantity__gt=0)
+        .order_by("-total_quantity")[:5]
+    )
+
+
+def recent_transactions():
+    fields = (
+        "date",
+        "item__name",
+        "quantity",
+        "item__unit__name",
+        "total_amount",
+        "transaction_type",
+        "created_at",
+    )
+    recent_sales = (
+        Sale.objects.select_related("item", "item__unit")
+        .annotate(
+            transaction_type=Value("sale", output_field=CharField()),
+            total_amount=ExpressionWrapper(
+                F("quantity") * F("unit_price"), output_field=FloatField()
+            ),
+        )
+        .values(*fields)
+    )
+    recent_purchases = (
+        Purchase.objects.select_related("item", "item__unit")
+        .annotate(
+            transaction_type=Value("purchase", output_field=CharField()),
+            total_amount=ExpressionWrapper(
+                F("quantity") * F("unit_cost"), output_field=FloatField()
+            ),
+        )
+        .values(*fields)
+    )
+    return list(
+        recent_sales.union(recent_purchases).order_by("-date", "-created_at")[:5]
+    )
+
+
+def serialize_chart_data(sales_data, purchases_data, label_field):
+    labels = []
+    raw_dates = []
+    if label_field == "day":
+        labels = [str(entry[label_field].day) for entry in sales_data]
+        raw_dates = [entry[label_field].strftime("%Y-%m-%d") for entry in sales_data]
+    elif label_field == "month":
+        labels = [
+            entry[label_field].strftime("%b") for entry in sales_data
+        ]  # e.g., Jan, Feb
+        raw_dates = [
+            entry[label_field].strftime("%Y-%m-%d") for entry in sales_data
+        ]  # Still useful for tooltips
+
+    sales_dataset = {
+        "label": "Sales",
+        "data": [round(float(entry["total"]), 2) for entry in sales_data],
+    }
+
+    purchases_dataset = {
+        "label": "Purchases",
+        "data": [round(float(entry["total"]), 2) for entry in purchases_data],
+    }
+
+    return {
+        "labels": labels,
+        "rawDates": raw_dates,
+        "datasets": [sales_dataset, purchases_dataset],
+    }
+
+
+def monthly_chart_data(today):
+    """Chart JSON of daily sales and purchases for the month of `today`."""
+    start_of_month = today.replace(day=1)
+
+    end_of_month = (start_of_month + timedelta(days=32)).replace(day=1) - timedelta(
+        days=1
+    )
+    totals = analytics.daily_series(start_of_month, end_of_month)
+    sales_lookup = {day: float(sales) for day, (sales, _) in totals.items()}
+    purchase_lookup = {day: float(cost) for day, (_, cost) in totals.items()}
+
+    days_in_month = []
+    current = start_of_month
+    while current.month == start_of_month.month:
+        days_in_month.append(current)
+        current += timedelta(days=1)
+
+    monthly_sales_filled = [
+        {"day": day, "total": sales_lookup.get(day, 0.0)} for day in days_in_month
+    ]
+    monthly_purchases_filled = [
+        {"day": day, "total": purchase_lookup.get(day, 0.0)} for day in days_in_month
+    ]
+    return json.dumps(
+        serialize_chart_data(monthly_sales_filled, monthly_purchases_filled, "day")
+    )
+
+
+def yearly_chart_data(today):
+    """Chart JSON of monthly sales and purchases for the year of `today`."""
+    current_year = today.year
+    start_of_year = today.replace(month=1, day=1)
+
+    totals = analytics.monthly_series(start_of_year, today.replace(month=12, day=31))
+    sales_lookup_year = {month: float(sales) for month, (sales, _) in totals.items()}
+    purchase_lookup_year = {month: float(cost) for month, (_, cost) in totals.items()}
+
+    months_in_year = []
+    current_month = start_of_year
+    while current_month.year == current_year:
+        months_in_year.append(current_month)
+        current_month = (current_month.replace(day=1) + timedelta(days=32)).replace(
+            day=1
+        )  # Move to next month safely
+
+    yearly_sales_filled = [
+        {"month": month, "total": sales_lookup_year.get(month, 0.0)}
+        for month in months_in_year
+    ]
+    yearly_purchases_filled = [
+        {"month": month, "total": purchase_lookup_year.get(month, 0.0)}
+        for month in months_in_year
+    ]
+    return json.dumps(
+        serialize_chart_data(yearly_sales_filled, yearly_purchases_filled, "month")
+    )
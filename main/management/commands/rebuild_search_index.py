@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from main.search import KINDS, SEARCH_FTS_TABLE, rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search entries of items, customers, sales, etc."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--kind",
+            choices=list(KINDS),
+            action="append",
+            help="Only rebuild this kind of entry (may be repeated).",
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            written = rebuild_index(kinds=options["kind"])
+        if connection.vendor == "sqlite":
+            # Merges the index segments the rebuild left behind
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"INSERT INTO {SEARCH_FTS_TABLE}({SEARCH_FTS_TABLE}) "
+                    "VALUES ('optimize')"
+                )
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt the search index; {written} entries written.")
+        )
@@ -0,0 +1,122 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:55
+
+from django.db import migrations, models
+
+FTS_TABLE = 'main_searchentry_fts'
+
+# Must stay identical to main.search.POSTGRES_DOCUMENT for the index to apply
+POSTGRES_DOCUMENT = (
+    "setweight(to_tsvector('simple', title), 'A') || "
+    "setweight(to_tsvector('simple', body), 'B')"
+)
+
+# The searchable kinds as of this migration: model, title field, body fields
+KINDS = {
+    'item': ('inventory.Item', 'name', ('sku', 'category__name')),
+    'category': ('inventory.Category', 'name', ('description',)),
+    'customer': ('sales.Customer', 'name', ('email', 'phone')),
+    'supplier': ('purchases.Supplier', 'name', ('email', 'phone')),
+    'sale': ('sales.Sale', 'sales_number', ()),
+}
+
+
+def create_full_text_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+            "kind, title, body, content='main_searchentry', content_rowid='id', "
+            "prefix='2 3')"
+        )
+        insert = (
+            f"INSERT INTO {FTS_TABLE}(rowid, kind, title, body) "
+            "VALUES (new.id, new.kind, new.title, new.body);"
+        )
+        delete = (
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, kind, title, body) "
+            "VALUES ('delete', old.id, old.kind, old.title, old.body);"
+        )
+        for name, event, body in (
+            ('insert', 'INSERT', insert),
+            ('delete', 'DELETE', delete),
+            ('update', 'UPDATE', delete + insert),
+        ):
+            schema_editor.execute(
+                f"CREATE TRIGGER main_searchentry_fts_{name} AFTER {event} "
+                f"ON main_searchentry BEGIN {body} END"
+            )
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            "CREATE INDEX main_searchentry_document_idx ON main_searchentry "
+            f"USING gin (({POSTGRES_DOCUMENT}))"
+        )
+
+
+def drop_full_text_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        for name in ('insert', 'delete', 'update'):
+            schema_editor.execute(f"DROP TRIGGER main_searchentry_fts_{name}")
+        schema_editor.execute(f"DROP TABLE {FTS_TABLE}")
+    elif vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX main_searchentry_document_idx")
+
+
+def index_existing_objects(apps, schema_editor):
+    """One INSERT ... SELECT per kind, following one foreign key for bodies."""
+    qn = schema_editor.connection.ops.quote_name
+    entries = qn(apps.get_model('main', 'SearchEntry')._meta.db_table)
+
+    def column(opts, path):
+        name, _, related_name = path.partition('__')
+        field = opts.get_field(name)
+        if not related_name:
+            return f"{qn(opts.db_table)}.{qn(field.column)}"
+        related = field.related_model._meta
+        return (
+            f"(SELECT {qn(related.get_field(related_name).column)} "
+            f"FROM {qn(related.db_table)} "
+            f"WHERE {qn(related.pk.column)} = {qn(opts.db_table)}.{qn(field.column)})"
+        )
+
+    for kind, (model, title, body) in KINDS.items():
+        opts = apps.get_model(model)._meta
+        title = f"COALESCE({qn(opts.get_field(title).column)}, '')"
+        body = " || ' ' || ".join(
+            f"COALESCE({column(opts, path)}, '')" for path in body
+        ) or "''"
+        schema_editor.execute(
+            f"INSERT INTO {entries} (kind, object_id, title, body) "
+            f"SELECT %s, {qn(opts.pk.column)}, {title}, {body} "
+            f"FROM {qn(opts.db_table)}",
+            [kind],
+        )
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('inventory', '0033_category_category_name_upper_idx_and_more'),
+        ('purchases', '0004_purchase_purchase_date_created_idx_and_more'),
+        ('sales', '0009_customer_customer_created_at_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('title', models.TextField()),
+                ('body', models.TextField(blank=True, default='')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='searchentry_object_unique')],
+            },
+        ),
+        migrations.RunPython(create_full_text_index, drop_full_text_index),
+        migrations.RunPython(index_existing_objects, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,24 @@
 from django.db import models
 
-# Create your models here.
+
+class SearchEntry(models.Model):
+    """
+    The searchable text of one item, category, customer, supplier or sale.
+    main.search keeps these rows in step with the objects they describe; the
+    database's full-text index over them is created by the migrations.
+    """
+
+    kind = models.CharField(max_length=20)
+    object_id = models.BigIntegerField()
+    title = models.TextField()
+    body = models.TextField(blank=True, default="")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["kind", "object_id"], name="searchentry_object_unique"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id}: {self.title}"
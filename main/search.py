@@ -0,0 +1,377 @@
+"""
+Full-text search over items, categories, customers, suppliers and sales.
+
+Every searchable object has one SearchEntry row holding its kind, id and
+text. The save and delete signals in main.signals keep the rows in step one
+object at a time; bulk writes that skip signals call index_objects(), and
+rebuild_index() regenerates every row with one INSERT ... SELECT per kind.
+
+The entries are indexed by the database itself:
+
+- SQLite: an external-content FTS5 table (SEARCH_FTS_TABLE) kept in step
+  with the entries by triggers, with prefix indexes for two and three
+  characters. Results are ranked with bm25() through the table's rank column.
+- PostgreSQL: a GIN index on the weighted tsvector of title and body.
+  Results are ranked with ts_rank().
+
+Body fields may follow a foreign key ("category__name"), so items are found
+by the name of their category.
+
+Other databases fall back to unranked icontains matching. Every word of a
+query must match, as a prefix, the title or body of an entry.
+"""
+
+import re
+from dataclasses import dataclass
+
+from django.apps import apps as global_apps
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.urls import reverse
+
+SEARCH_FTS_TABLE = "main_searchentry_fts"
+
+# The weighted document the PostgreSQL index (created by migration
+# main.0001) is built on; queries must use the identical expression for the
+# index to apply
+POSTGRES_DOCUMENT = (
+    "setweight(to_tsvector('simple', title), 'A') || "
+    "setweight(to_tsvector('simple', body), 'B')"
+)
+
+# Weight of a match in the title relative to one in the body
+TITLE_WEIGHT = 10.0
+
+# Matches returned per query; broader queries return only their
+# MAX_RESULTS best ranked matches
+MAX_RESULTS = getattr(settings, "SEARCH_MAX_RESULTS", 1000)
+
+
+@dataclass(frozen=True)
+class Kind:
+    model: str
+    title: str
+    body: tuple
+    label: str
+    url_name: str
+    related: tuple = ()
+
+
+KINDS = {
+    "item": Kind(
+        "inventory.Item",
+        "name",
+        ("sku", "category__name"),
+        "Item",
+        "view_item",
+        ("category",),
+    ),
+    "category": Kind(
+        "inventory.Category", "name", ("description",), "Category", "view_category"
+    ),
+    "customer": Kind(
+        "sales.Customer", "name", ("email", "phone"), "Customer", "view_customer"
+    ),
+    "supplier": Kind(
+        "purchases.Supplier", "name", ("email", "phone"), "Supplier", "view_supplier"
+    ),
+    "sale": Kind(
+        "sales.Sale",
+        "sales_number",
+        (),
+        "Sale",
+        "view_sale",
+        ("item", "customer"),
+    ),
+}
+
+# Scopes offered by the search bar, with the kinds they search
+SCOPES = {
+    "all": None,
+    "items": ("item",),
+    "categories": ("category",),
+    "customers": ("customer",),
+    "suppliers": ("supplier",),
+    "sales": ("sale",),
+}
+
+_KIND_BY_MODEL = {kind.model: name for name, kind in KINDS.items()}
+
+
+def kind_of(model):
+    """The search kind of a model class, or None if it is not searchable."""
+    return _KIND_BY_MODEL.get(model._meta.label)
+
+
+def _text(value):
+    return "" if value is None else str(value)
+
+
+def _value(obj, path):
+    for name in path.split("__"):
+        if obj is None:
+            return None
+        obj = getattr(obj, name)
+    return obj
+
+
+def _entry(kind, obj):
+    from .models import SearchEntry
+
+    spec = KINDS[kind]
+    return SearchEntry(
+        kind=kind,
+        object_id=obj.pk,
+        title=_text(getattr(obj, spec.title)),
+        body=" ".join(
+            text for text in (_text(_value(obj, field)) for field in spec.body) if text
+        ),
+    )
+
+
+def index_objects(objects):
+    """Adds or refreshes the entries of saved objects of one searchable model."""
+    from .models import SearchEntry
+
+    objects = list(objects)
+    if not objects:
+        return
+    kind = kind_of(type(objects[0]))
+    SearchEntry.objects.bulk_create(
+        [_entry(kind, obj) for obj in objects],
+        update_conflicts=True,
+        unique_fields=["kind", "object_id"],
+        update_fields=["title", "body"],
+    )
+
+
+def remove_objects(model, pks):
+    """Drops the entries of the given objects of a searchable model."""
+    from .models import SearchEntry
+
+    SearchEntry.objects.filter(kind=kind_of(model), object_id__in=pks).delete()
+
+
+def _column(opts, path, qn):
+    """SQL for a body field of the rows of `opts`, following one foreign key."""
+    name, _, related_name = path.partition("__")
+    field = opts.get_field(name)
+    if not related_name:
+        return f"{qn(opts.db_table)}.{qn(field.column)}"
+    related = field.related_model._meta
+    return (
+        f"(SELECT {qn(related.get_field(related_name).column)} "
+        f"FROM {qn(related.db_table)} "
+        f"WHERE {qn(related.pk.column)} = {qn(opts.db_table)}.{qn(field.column)})"
+    )
+
+
+def rebuild_index(apps=global_apps, using=DEFAULT_DB_ALIAS, kinds=None):
+    """
+    Regenerates the entries of `kinds` (default: all) from their tables, one
+    INSERT ... SELECT per kind. Returns the number of entries written.
+    """
+    connection = connections[using]
+    qn = connection.ops.quote_name
+    entries = qn(apps.get_model("main", "SearchEntry")._meta.db_table)
+    written = 0
+    with connection.cursor() as cursor:
+        for kind in kinds or KINDS:
+            spec = KINDS[kind]
+            opts = apps.get_model(spec.model)._meta
+            title = f"COALESCE({qn(opts.get_field(spec.title).column)}, '')"
+            body = " || ' ' || ".join(
+                f"COALESCE({_column(opts, field, qn)}, '')" for field in spec.body
+            )
+            cursor.execute(f"DELETE FROM {entries} WHERE kind = %s", [kind])
+            cursor.execute(
+                f"INSERT INTO {entries} (kind, object_id, title, body) "
+                f"SELECT %s, {qn(opts.pk.column)}, {title}, {body or "''"} "
+                f"FROM {qn(opts.db_table)}",
+                [kind],
+            )
+            written += cursor.rowcount
+    return written
+
+
+def _terms(query):
+    """The words of each whitespace-separated term of `query`, lowercased."""
+    terms = (re.findall(r"\w+", term.lower()) for term in query.split())
+    return [words for words in terms if words]
+
+
+def _sqlite_match(terms, kinds):
+    # Each term is a phrase whose last word is a prefix, so "ham-12" finds
+    # the SKU HAM-123; the phrases hold only \w characters and need no escaping
+    match = "{title body}: (%s)" % " ".join(f'"{" ".join(words)}"*' for words in terms)
+    if kinds:
+        match = f"kind: ({' OR '.join(kinds)}) AND {match}"
+    return match
+
+
+def _postgres_query(terms):
+    return " & ".join(f"{word}:*" for words in terms for word in words)
+
+
+@dataclass
+class SearchHit:
+    kind: str
+    object: object
+    score: float
+
+    @property
+    def label(self):
+        return KINDS[self.kind].label
+
+    @property
+    def title(self):
+        return getattr(self.object, KINDS[self.kind].title)
+
+    @property
+    def url(self):
+        return reverse(KINDS[self.kind].url_name, args=[self.object.pk])
+
+
+class SearchResults:
+    """
+    The ranked results of a search, read one slice at a time so they can be
+    handed to a Paginator. Slices are lists of SearchHit.
+
+    Only the MAX_RESULTS best ranked matches are returned; `truncated` tells
+    whether the query matched more than that.
+    """
+
+    def __init__(self, query, kinds=None, using=DEFAULT_DB_ALIAS):
+        self.terms = _terms(query)
+        self.kinds = list(kinds) if kinds else None
+        self.using = using
+        self.vendor = connections[using].vendor
+        self.truncated = False
+        self._count = None
+
+    def _candidates(self, limit, score=True):
+        """
+        SQL and parameters selecting (id, score) of the `limit` best ranked
+        matches, or the id of any `limit` matches; scoring is most of the cost
+        of a query.
+        """
+        from .models import SearchEntry
+
+        if self.vendor == "sqlite":
+            match = _sqlite_match(self.terms, self.kinds)
+            if not score:
+                return (
+                    f"SELECT rowid AS id FROM {SEARCH_FTS_TABLE} "
+                    f"WHERE {SEARCH_FTS_TABLE} MATCH %s LIMIT {int(limit)}",
+                    [match],
+                )
+            return (
+                f"SELECT rowid AS id, -rank AS score FROM {SEARCH_FTS_TABLE} "
+                f"WHERE {SEARCH_FTS_TABLE} MATCH %s AND rank MATCH %s "
+                f"ORDER BY rank LIMIT {int(limit)}",
+                [match, f"bm25(0, {TITLE_WEIGHT}, 1.0)"],
+            )
+        entries = connections[self.using].ops.quote_name(SearchEntry._meta.db_table)
+        kinds = ""
+        params = [_postgres_query(self.terms)]
+        if self.kinds:
+            kinds = f"AND e.kind IN ({', '.join(['%s'] * len(self.kinds))})"
+            params += self.kinds
+        columns, order = "e.id", ""
+        if score:
+            columns += f", ts_rank({POSTGRES_DOCUMENT}, q) AS score"
+            order = "ORDER BY score DESC"
+        return (
+            f"SELECT {columns} "
+            f"FROM {entries} e, to_tsquery('simple', %s) q "
+            f"WHERE ({POSTGRES_DOCUMENT}) @@ q {kinds} "
+            f"{order} LIMIT {int(limit)}",
+            params,
+        )
+
+    def _fallback(self):
+        from django.db.models import Q
+
+        from .models import SearchEntry
+
+        entries = SearchEntry.objects.using(self.using).order_by("-pk")
+        if self.kinds:
+            entries = entries.filter(kind__in=self.kinds)
+        for words in self.terms:
+            for word in words:
+                entries = entries.filter(
+                    Q(title__icontains=word) | Q(body__icontains=word)
+                )
+        return entries
+
+    def _query(self, sql, params):
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    def count(self):
+        if self._count is None:
+            if not self.terms:
+                matches = 0
+            elif self.vendor not in ("sqlite", "postgresql"):
+                matches = self._fallback()[: MAX_RESULTS + 1].count()
+            else:
+                sql, params = self._candidates(MAX_RESULTS + 1, score=False)
+                matches = self._query(f"SELECT COUNT(*) FROM ({sql}) c", params)[0][0]
+            self.truncated = matches > MAX_RESULTS
+            self._count = min(matches, MAX_RESULTS)
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key : key + 1][0]
+        start = key.start or 0
+        stop = MAX_RESULTS if key.stop is None else min(key.stop, MAX_RESULTS)
+        if not self.terms or stop <= start:
+            return []
+
+        if self.vendor not in ("sqlite", "postgresql"):
+            rows = [
+                (entry.kind, entry.object_id, 0.0)
+                for entry in self._fallback().order_by("title", "pk")[start:stop]
+            ]
+            return self._hits(rows)
+
+        from .models import SearchEntry
+
+        entries = connections[self.using].ops.quote_name(SearchEntry._meta.db_table)
+        sql, params = self._candidates(MAX_RESULTS)
+        rows = self._query(
+            f"SELECT e.kind, e.object_id, c.score FROM ({sql}) c "
+            f"JOIN {entries} e ON e.id = c.id "
+            f"ORDER BY c.score DESC, e.title, e.id "
+            f"LIMIT {int(stop - start)} OFFSET {int(start)}",
+            params,
+        )
+        return self._hits(rows)
+
+    def _hits(self, rows):
+        ids_by_kind = {}
+        for kind, object_id, _score in rows:
+            ids_by_kind.setdefault(kind, []).append(object_id)
+        objects = {}
+        for kind, ids in ids_by_kind.items():
+            spec = KINDS[kind]
+            manager = global_apps.get_model(spec.model)._default_manager
+            objects[kind] = (
+                manager.using(self.using).select_related(*spec.related).in_bulk(ids)
+            )
+        # Entries whose object has gone are skipped
+        return [
+            SearchHit(kind, objects[kind][object_id], score)
+            for kind, object_id, score in rows
+            if object_id in objects[kind]
+        ]
+
+
+def search(query, kinds=None):
+    """Ranked results of `query` over the given kinds (default: all)."""
+    return SearchResults(query, kinds)
@@ -0,0 +1,72 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from inventory.models import Category, InventoryAdjustment, Item
+from inventory.signals import order_lines_created
+from purchases.models import Purchase, Supplier
+from sales.models import Customer, Sale
+
+from . import search
+from .dashboard import bump_dashboard_version
+
+
+@receiver(post_save, sender=Sale)
+@receiver(post_delete, sender=Sale)
+@receiver(post_save, sender=Purchase)
+@receiver(post_delete, sender=Purchase)
+@receiver(post_save, sender=Item)
+@receiver(post_delete, sender=Item)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=InventoryAdjustment)
+@receiver(post_delete, sender=InventoryAdjustment)
+@receiver(order_lines_created)
+def invalidate_dashboard_cache(sender, **kwargs):
+    # Bumped once the write is visible, so no request can cache the old
+    # figures under the new version; bumping inside the transaction would
+    # also hold the version row locked until it commits. A failed bump only
+    # leaves blocks to expire, it must not fail the committed write.
+    transaction.on_commit(bump_dashboard_version, robust=True)
+
+
+@receiver(post_save, sender=Item)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Customer)
+@receiver(post_save, sender=Supplier)
+@receiver(post_save, sender=Sale)
+def index_search_entry(sender, instance, **kwargs):
+    search.index_objects([instance])
+
+
+@receiver(post_save, sender=Category)
+def index_category_items(sender, instance, created, **kwargs):
+    # Item entries hold the name of their category
+    if not created:
+        search.index_objects(instance.item_set.select_related("category"))
+
+
+@receiver(pre_delete, sender=Category)
+def remember_category_items(sender, instance, **kwargs):
+    instance._search_item_ids = list(instance.item_set.values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=Category)
+def index_uncategorised_items(sender, instance, **kwargs):
+    search.index_objects(
+        Item.objects.filter(pk__in=getattr(instance, "_search_item_ids", ()))
+    )
+
+
+@receiver(order_lines_created, sender=Sale)
+def index_order_lines(sender, lines, **kwargs):
+    search.index_objects(lines)
+
+
+@receiver(post_delete, sender=Item)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Customer)
+@receiver(post_delete, sender=Supplier)
+@receiver(post_delete, sender=Sale)
+def remove_search_entry(sender, instance, **kwargs):
+    search.remove_objects(sender, [instance.pk])
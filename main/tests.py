@@ -1,3 +1,349 @@
-from django.test import TestCase
+import json
+import tempfile
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from inventory.models import (
+    Category,
+    Counter,
+    DailyItemSummary,
+    InventoryAdjustment,
+    Item,
+    UnitOfMeasure,
+)
+from inventory.stock import get_low_stock_count
+from purchases.models import Purchase, Supplier
+from sales.models import Customer, Sale
+from stockflow.instrumentation import RequestStats
+
+from . import dashboard, search
+from .models import SearchEntry
+from .views import SEARCH_RESULTS_PER_PAGE
+
+
+class HomeDashboardTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        unit = UnitOfMeasure.objects.create(name="Pieces")
+        self.item = Item.objects.create(
+            name="Widget",
+            sku="SKU-001",
+            unit=unit,
+            selling_price=10,
+            purchase_price=6,
+            current_stock=1000,
+        )
+        self.customer = Customer.objects.create(name="Walk-in")
+        self.supplier = Supplier.objects.create(name="Acme")
+        self.user = User.objects.create_user("owner", password="secret")
+        self.client.force_login(self.user)
+        # Creates the low-stock count the navigation reads and the version
+        get_low_stock_count()
+        dashboard.get_dashboard_version()
+
+    def add_history(self, days):
+        today = timezone.localdate()
+        for offset in range(days):
+            Sale.objects.create(
+                item=self.item,
+                customer=self.customer,
+                quantity=2,
+                unit_price=10,
+                date=today - timedelta(days=offset),
+            )
+            Purchase.objects.create(
+                item=self.item,
+                supplier=self.supplier,
+                quantity=3,
+                unit_cost=6,
+                date=today - timedelta(days=offset),
+            )
+
+    def dashboard_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("home"))
+        return response, len(queries)
+
+    def test_kpis_come_from_rollup(self):
+        self.add_history(3)
+        response, _ = self.dashboard_queries()
+
+        self.assertEqual(response.context["total_quantity_sold"], 6)
+        self.assertEqual(response.context["total_sales_value"], 60)
+        self.assertEqual(response.context["total_quantity_purchased"], 9)
+        self.assertEqual(response.context["total_purchase_cost"], 54)
+        self.assertEqual(response.context["top_selling_items"][0]["total_quantity"], 6)
+
+    def test_query_count_does_not_grow_with_history(self):
+        self.add_history(2)
+        cache.clear()
+        _, few = self.dashboard_queries()
+        self.add_history(40)
+        cache.clear()
+        _, many = self.dashboard_queries()
+        self.assertEqual(few, many)
+
+    def dashboard_tables_queried(self):
+        _, queries = self.dashboard_queries_captured()
+        tables = ("inventory_", "sales_", "purchases_")
+        return [
+            q["sql"]
+            for q in queries
+            # The dashboard version and the navigation's low-stock count are
+            # read on every load
+            if any(t in q["sql"] for t in tables)
+            and "inventory_counter" not in q["sql"]
+        ]
+
+    def dashboard_queries_captured(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("home"))
+        return response, queries.captured_queries
+
+    def test_repeat_loads_are_served_from_cache(self):
+        self.add_history(3)
+        self.assertTrue(self.dashboard_tables_queried())
+        self.assertEqual(self.dashboard_tables_queried(), [])
+
+    def test_writes_invalidate_cached_blocks(self):
+        self.add_history(1)
+        response, _ = self.dashboard_queries()
+        self.assertEqual(response.context["total_quantity_sold"], 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Sale.objects.create(
+                item=self.item, customer=self.customer, quantity=5, unit_price=10
+            )
+        response, _ = self.dashboard_queries()
+        self.assertEqual(response.context["total_quantity_sold"], 7)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Item.objects.filter(pk=self.item.pk).get().delete()
+        response, _ = self.dashboard_queries()
+        self.assertEqual(response.context["num_items"], 0)
+        self.assertEqual(response.context["total_quantity_sold"], 0)
+
+    def test_adjustments_invalidate_stock_counts(self):
+        self.item.reorder_point = 995
+        self.item.save()
+        response, _ = self.dashboard_queries()
+        self.assertEqual(response.context["low_stock_count"], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            InventoryAdjustment.objects.create(
+                item=self.item,
+                adjustment_type=InventoryAdjustment.DECREASE,
+                quantity_adjusted=10,
+                reason="DAMAGED",
+            )
+        response, _ = self.dashboard_queries()
+        self.assertEqual(response.context["low_stock_count"], 1)
+
+    def test_version_is_shared_through_the_database(self):
+        self.add_history(1)
+        self.dashboard_queries()
+        # A write seen by this process's cache only through the database, as
+        # from a Celery import or another web process
+        Sale.objects.filter(item=self.item).update(quantity=4)
+        DailyItemSummary.objects.filter(item=self.item).update(quantity_sold=4)
+        Counter.objects.filter(name=dashboard.VERSION_KEY).update(value=F("value") + 1)
+        response, _ = self.dashboard_queries()
+        self.assertEqual(response.context["total_quantity_sold"], 4)
+
+
+@override_settings(
+    CACHES={
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": tempfile.gettempdir() + "/stockflow-test-cache",
+        }
+    }
+)
+class HomeDashboardFileCacheTests(HomeDashboardTests):
+    """Runs the dashboard tests against the file-based cache backend."""
+
+
+@override_settings(
+    MIDDLEWARE=[
+        "stockflow.instrumentation.RequestInstrumentationMiddleware",
+        *settings.MIDDLEWARE,
+    ],
+    REQUEST_INSTRUMENTATION=True,
+)
+class RequestInstrumentationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = User.objects.create_superuser("admin", password="secret")
+        self.client.force_login(self.user)
+
+    def test_response_carries_server_timing_and_log_line(self):
+        with self.assertLogs("stockflow.requests", "INFO") as logs:
+            response = self.client.get(reverse("home"))
+
+        self.assertRegex(
+            response["Server-Timing"],
+            r'^db;dur=[\d.]+;desc="\d+ queries", tpl;dur=[\d.]+, total;dur=[\d.]+$',
+        )
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual(line["endpoint"], "GET home")
+        self.assertEqual(line["status"], 200)
+        self.assertGreater(line["queries"], 0)
+        self.assertGreater(line["template_ms"], 0)
+        self.assertEqual(line["response_bytes"], len(response.content))
+
+    def test_repeated_statements_are_counted_as_duplicates(self):
+        stats = RequestStats()
+        with connection.execute_wrapper(stats):
+            for pk in (1, 2, 3):
+                list(Item.objects.filter(pk=pk))
+            list(Item.objects.filter(pk__in=[1, 2]))
+            list(Item.objects.filter(pk__in=[1, 2, 3]))
+
+        self.assertEqual(stats.queries, 5)
+        self.assertEqual(stats.duplicates, 3)
+        self.assertEqual(stats.worst_duplicate[1], 3)
+
+    def test_performance_page_lists_recorded_endpoints(self):
+        with self.assertLogs("stockflow.requests", "INFO"):
+            self.client.get(reverse("home"))
+            response = self.client.get(reverse("performance"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            "GET home", [row["endpoint"] for row in response.context["slowest"]]
+        )
+
+    def test_performance_page_is_for_superusers(self):
+        self.client.force_login(User.objects.create_user("clerk"))
+        with self.assertLogs("stockflow.requests", "INFO"):
+            response = self.client.get(reverse("performance"))
+        self.assertEqual(response.status_code, 302)
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        unit = UnitOfMeasure.objects.create(name="Pieces")
+        self.tools = Category.objects.create(name="Tools", description="Hand tools")
+        self.hammer = Item.objects.create(
+            name="Claw Hammer",
+            sku="HAM-123",
+            unit=unit,
+            category=self.tools,
+            selling_price=10,
+            purchase_price=6,
+            current_stock=100,
+        )
+        self.customer = Customer.objects.create(
+            name="Hamid Traders", email="orders@hamid.example"
+        )
+        self.supplier = Supplier.objects.create(name="Acme", phone="0700123456")
+        self.user = User.objects.create_user("owner", password="secret")
+        self.client.force_login(self.user)
+
+    def titles(self, query, kinds=None):
+        return [hit.title for hit in search.search(query, kinds)[:50]]
+
+    def test_prefix_matches_across_kinds(self):
+        self.assertCountEqual(self.titles("ham"), ["Claw Hammer", "Hamid Traders"])
+        self.assertEqual(self.titles("ham-12"), ["Claw Hammer"])
+        self.assertEqual(self.titles("claw ham"), ["Claw Hammer"])
+        self.assertEqual(self.titles("hand"), ["Tools"])
+        self.assertEqual(self.titles("0700"), ["Acme"])
+        self.assertEqual(self.titles("hammer saw"), [])
+        self.assertEqual(self.titles("%*\\"), [])
+
+    def test_title_matches_rank_first(self):
+        Customer.objects.create(name="Jane", email="jane@acme.example")
+        self.assertEqual(self.titles("acme"), ["Acme", "Jane"])
+
+    def test_items_are_found_by_category(self):
+        self.assertEqual(self.titles("tools", ["item"]), ["Claw Hammer"])
+
+        self.tools.name = "Hardware"
+        self.tools.save()
+        self.assertEqual(self.titles("tools", ["item"]), [])
+        self.assertEqual(self.titles("hardware", ["item"]), ["Claw Hammer"])
+
+        search.rebuild_index(kinds=["item"])
+        self.assertEqual(self.titles("hardware", ["item"]), ["Claw Hammer"])
+
+        self.tools.delete()
+        self.assertEqual(self.titles("hardware", ["item"]), [])
+
+    def test_scope_limits_kinds(self):
+        self.assertEqual(self.titles("ham", ["customer"]), ["Hamid Traders"])
+
+    def test_sales_numbers_are_searchable(self):
+        sale = Sale.objects.create(item=self.hammer, customer=self.customer, quantity=1)
+        self.assertEqual(self.titles(sale.sales_number, ["sale"]), [sale.sales_number])
+
+    def test_index_follows_saves_and_deletes(self):
+        self.hammer.name = "Sledge"
+        self.hammer.save()
+        self.assertEqual(self.titles("claw"), [])
+        self.assertEqual(self.titles("sledge"), ["Sledge"])
+
+        self.customer.delete()
+        self.assertEqual(self.titles("hamid"), [])
+
+    def test_rebuild_restores_entries(self):
+        SearchEntry.objects.all().delete()
+        self.assertEqual(self.titles("ham"), [])
+
+        self.assertEqual(search.rebuild_index(), 4)
+        self.assertCountEqual(self.titles("ham"), ["Claw Hammer", "Hamid Traders"])
+
+    def test_broad_queries_are_capped(self):
+        Customer.objects.bulk_create(Customer(name=f"Hamlet {n}") for n in range(5))
+        search.rebuild_index(kinds=["customer"])
+
+        with mock.patch.object(search, "MAX_RESULTS", 3):
+            results = search.search("hamlet")
+            self.assertEqual(results.count(), 3)
+            self.assertTrue(results.truncated)
+            self.assertEqual(len(results[0:10]), 3)
+
+    def test_cap_keeps_best_ranked_matches(self):
+        Customer.objects.create(name="Hamlet")
+        Customer.objects.bulk_create(
+            Customer(name=f"Jane {n}", email=f"jane{n}@hamlet.example")
+            for n in range(5)
+        )
+        search.rebuild_index(kinds=["customer"])
+
+        with mock.patch.object(search, "MAX_RESULTS", 3):
+            results = search.search("hamlet")
+            self.assertEqual(results[0].title, "Hamlet")
+            self.assertEqual(len(results[0:10]), 3)
+
+    def test_results_page_is_paginated(self):
+        Customer.objects.bulk_create(
+            Customer(name=f"Hamlet {n}") for n in range(SEARCH_RESULTS_PER_PAGE + 5)
+        )
+        search.rebuild_index(kinds=["customer"])
+
+        response = self.client.get(reverse("search_results"), {"q": "hamlet"})
+        page = response.context["page_obj"]
+        self.assertEqual(page.paginator.count, SEARCH_RESULTS_PER_PAGE + 5)
+        self.assertEqual(len(page.object_list), SEARCH_RESULTS_PER_PAGE)
+
+        with self.assertNumQueries(7):
+            # Session, user and profile, the count and the page, one query
+            # per kind shown, then the low-stock count
+            response = self.client.get(
+                reverse("search_results"), {"q": "hamlet", "page": 2}
+            )
+        self.assertEqual(len(response.context["page_obj"].object_list), 5)
+        self.assertContains(response, "Hamlet 9")
@@ -6,4 +6,5 @@ urlpatterns = [
     path("home/", views.home, name="home"),
     path("search/", views.search_results_view, name="search_results"),
     path("settings/", views.settings_view, name="settings"),
+    path("settings/performance/", views.performance_view, name="performance"),
 ]
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Purchase, Supplier
+from .models import Purchase, PurchaseOrder, Supplier
 
 
 @admin.register(Supplier)
@@ -31,3 +31,28 @@ class PurchaseAdmin(admin.ModelAdmin):
     @admin.display(description="Total Cost")
     def total_cost_display(self, obj):
         return f"KES {obj.total_cost:.2f}"
+
+
+class PurchaseLineInline(admin.TabularInline):
+    model = Purchase
+    fields = ("purchase_number", "item", "quantity", "unit_cost")
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+    show_change_link = True
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(PurchaseOrder)
+class PurchaseOrderAdmin(admin.ModelAdmin):
+    list_display = ("order_number", "supplier", "date", "created_at")
+    search_fields = ("order_number", "supplier__name")
+    list_filter = ("date",)
+    readonly_fields = ("order_number", "created_at")
+    inlines = [PurchaseLineInline]
+
+    def has_add_permission(self, request):
+        # Orders are written with their lines by purchases.orders.commit_purchase_order
+        return False
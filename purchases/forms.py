@@ -1,10 +1,19 @@
+from decimal import Decimal
+
 from crispy_bootstrap5.bootstrap5 import FloatingField
 from crispy_forms.helper import FormHelper
 from crispy_forms.layout import HTML, Column, Field, Layout, Row
 from django import forms
 from django.core.exceptions import ValidationError
 
-from .models import Purchase, Supplier
+from inventory.models import Item
+from stockflow.autocomplete import (
+    AutocompleteSelect,
+    PrefetchedFormSet,
+    PrefetchedModelChoiceField,
+)
+
+from .models import Purchase, PurchaseOrder, Supplier
 
 
 class PurchaseForm(forms.ModelForm):
@@ -19,6 +28,8 @@ class PurchaseForm(forms.ModelForm):
             "date",
         ]
         widgets = {
+            "item": AutocompleteSelect("item_autocomplete"),
+            "supplier": AutocompleteSelect("supplier_autocomplete"),
             "description": forms.Textarea(attrs={"style": "height: 100px"}),
             "date": forms.DateInput(attrs={"type": "date"}),
         }
@@ -119,6 +130,84 @@ class PurchaseForm(forms.ModelForm):
         return instance
 
 
+class PurchaseOrderForm(forms.ModelForm):
+    """The header of a purchase order; its lines are entered with PurchaseLineFormSet."""
+
+    class Meta:
+        model = PurchaseOrder
+        fields = ["supplier", "date", "description"]
+        widgets = {
+            "supplier": AutocompleteSelect("supplier_autocomplete"),
+            "description": forms.Textarea(attrs={"style": "height: 100px"}),
+            "date": forms.DateInput(attrs={"type": "date"}),
+        }
+        labels = {"date": "Date of Purchase"}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["supplier"].widget.attrs.update(
+            {
+                "class": "select2-supplier",
+                "data-placeholder": "Select a supplier",
+            }
+        )
+
+        self.helper = FormHelper()
+        # Rendered inside the order form together with the lines
+        self.helper.form_tag = False
+        self.helper.layout = Layout(
+            Row(
+                Column(Field("supplier"), css_class="col-md-6"),
+                Column(FloatingField("date"), css_class="col-md-6"),
+                css_class="g-4 mb-4",
+            ),
+            Row(
+                Column(FloatingField("description"), css_class="col-md-12"),
+                css_class="g-4 mb-4",
+            ),
+        )
+
+
+class PurchaseLineForm(forms.Form):
+    item = PrefetchedModelChoiceField(
+        queryset=Item.objects.all(),
+        widget=AutocompleteSelect(
+            "item_autocomplete",
+            attrs={"class": "select2-item", "data-placeholder": "Select an item"},
+        ),
+    )
+    quantity = forms.IntegerField(
+        min_value=1, widget=forms.NumberInput(attrs={"class": "form-control", "min": 1})
+    )
+    unit_cost = forms.DecimalField(
+        required=False,
+        max_digits=10,
+        decimal_places=2,
+        min_value=Decimal("0.01"),
+        label="Unit Cost",
+        widget=forms.NumberInput(
+            attrs={
+                "class": "form-control",
+                "step": "0.01",
+                "placeholder": "Item cost",
+            }
+        ),
+    )
+
+
+class BasePurchaseLineFormSet(PrefetchedFormSet):
+    prefetched = ("item",)
+
+
+PurchaseLineFormSet = forms.formset_factory(
+    PurchaseLineForm,
+    formset=BasePurchaseLineFormSet,
+    extra=0,
+    min_num=1,
+    validate_min=True,
+)
+
+
 class SupplierForm(forms.ModelForm):
     """Form for creating and updating suppliers, styled with Crispy Forms."""
 
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0031_inventoryadjustment_adjustment_date_id_idx_and_more'),
+        ('purchases', '0002_alter_purchase_unit_cost'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='purchase',
+            index=models.Index(fields=['date', 'id'], name='purchase_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchase',
+            index=models.Index(fields=['item', 'date', 'id'], name='purchase_item_date_id_idx'),
+        ),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:23
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def create_orders(apps, schema_editor):
+    """
+    Give every existing purchase an order of its own, numbered after it
+    (PUR-20250101-001 becomes PO-20250101-001), and start the PO counters
+    where the PUR ones are.
+    """
+    Purchase = apps.get_model('purchases', 'Purchase')
+    PurchaseOrder = apps.get_model('purchases', 'PurchaseOrder')
+    DocumentSequence = apps.get_model('inventory', 'DocumentSequence')
+    lines = Purchase.objects.filter(order__isnull=True).order_by('pk')
+    while batch := list(lines[:2000]):
+        orders = PurchaseOrder.objects.bulk_create(
+            [
+                PurchaseOrder(
+                    order_number=(
+                        'PO' + line.purchase_number[len('PUR'):]
+                        if line.purchase_number.startswith('PUR-')
+                        else f'PO-{line.pk}'
+                    ),
+                    supplier_id=line.supplier_id,
+                    description=line.description,
+                    date=line.date,
+                    user_id=line.user_id,
+                )
+                for line in batch
+            ]
+        )
+        for line, order in zip(batch, orders):
+            line.order = order
+        Purchase.objects.bulk_update(batch, ['order'])
+    DocumentSequence.objects.bulk_create(
+        [
+            DocumentSequence(prefix='PO', day=sequence.day, last_value=sequence.last_value)
+            for sequence in DocumentSequence.objects.filter(prefix='PUR')
+        ],
+        batch_size=2000,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('purchases', '0005_supplier_supplier_name_idx'),
+        ('inventory', '0035_documentsequence'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PurchaseOrder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('order_number', models.CharField(editable=False, max_length=30, unique=True)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('date', models.DateField(default=django.utils.timezone.now)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('supplier', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to='purchases.supplier')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='purchase',
+            name='order',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='purchases.purchaseorder'),
+        ),
+        migrations.RunPython(create_orders, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,9 @@
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
 from django.utils.timezone import now
 
-from inventory.models import Item
+from inventory.models import Item, StockMovement
 
 
 class Supplier(models.Model):
@@ -14,11 +14,41 @@ class Supplier(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Default ordering of the supplier list
+            models.Index(fields=["created_at"], name="supplier_created_at_idx"),
+            # Alphabetical listing of the supplier pickers
+            models.Index(fields=["name"], name="supplier_name_idx"),
+        ]
+
     def __str__(self):
         return self.name
 
 
+class PurchaseOrder(models.Model):
+    """
+    An order of one or more items from a supplier; its lines are Purchases.
+    Orders are written by purchases.orders.commit_purchase_order().
+    """
+
+    NUMBER_PREFIX = "PO"
+
+    order_number = models.CharField(max_length=30, unique=True, editable=False)
+    supplier = models.ForeignKey("Supplier", on_delete=models.SET_NULL, null=True)
+    description = models.TextField(blank=True, null=True)
+    date = models.DateField(default=now)
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.order_number} - {self.supplier or 'Unknown Supplier'}"
+
+
 class Purchase(models.Model):
+    NUMBER_PREFIX = "PUR"
+
     purchase_number = models.CharField(max_length=30, unique=True, editable=False)
     item = models.ForeignKey(Item, on_delete=models.CASCADE)
     supplier = models.ForeignKey("Supplier", on_delete=models.SET_NULL, null=True)
@@ -29,9 +59,30 @@ class Purchase(models.Model):
     description = models.TextField(blank=True, null=True)
     date = models.DateField(default=now)
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    # Null only for rows bulk-loaded without going through an order
+    order = models.ForeignKey(
+        PurchaseOrder,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name="lines",
+    )
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Keyset pagination of all purchases and of each item's purchases
+            models.Index(fields=["date", "id"], name="purchase_date_id_idx"),
+            models.Index(
+                fields=["item", "date", "id"], name="purchase_item_date_id_idx"
+            ),
+            models.Index(
+                fields=["date", "created_at"], name="purchase_date_created_idx"
+            ),
+        ]
+
     def __str__(self):
         return f"{self.purchase_number} - {self.supplier or 'Unknown Supplier'}"
 
@@ -42,12 +93,17 @@ class Purchase(models.Model):
             raise ValidationError("Unit cost must be a positive number.")
 
     def save(self, *args, **kwargs):
-        from .utils import generate_purchase_number
+        from inventory.costing import recost_from
+        from inventory.rollups import record_purchase
+        from inventory.stock import apply_stock_delta
+        from inventory.utils import evaluate_low_stock_alerts
 
-        is_new = self.pk is None
+        from .orders import commit_purchase
 
-        if not self.purchase_number:
-            self.purchase_number = generate_purchase_number()
+        if self.pk is None:
+            # A new purchase is an order of one line
+            commit_purchase(self)
+            return
 
         if self.unit_cost is None:
             if not self.item.purchase_price:
@@ -56,21 +112,45 @@ class Purchase(models.Model):
 
         self.full_clean()
 
-        # Adjust stock
-        if is_new:
-            self.item.current_stock += self.quantity
-        else:
-            original = Purchase.objects.get(pk=self.pk)
-            if self.item == original.item:
-                self.item.current_stock -= original.quantity
-                self.item.current_stock += self.quantity
+        # Adjust stock atomically in the database
+        with transaction.atomic():
+            original = Purchase.objects.only(
+                "item_id", "quantity", "unit_cost", "date"
+            ).get(pk=self.pk)
+            record_purchase(original, sign=-1)
+            if self.item_id == original.item_id:  # type: ignore
+                apply_stock_delta(
+                    self.item,
+                    self.quantity - original.quantity,
+                    source=StockMovement.PURCHASE,
+                    reference=self.purchase_number,
+                    allow_negative=True,
+                )
             else:
-                original.item.current_stock -= original.quantity
-                original.item.save()
-                self.item.current_stock += self.quantity
-
-        self.item.save()
-        super().save(*args, **kwargs)
+                apply_stock_delta(
+                    original.item_id,  # type: ignore
+                    -original.quantity,
+                    source=StockMovement.PURCHASE,
+                    reference=self.purchase_number,
+                    allow_negative=True,
+                )
+                apply_stock_delta(
+                    self.item,
+                    self.quantity,
+                    source=StockMovement.PURCHASE,
+                    reference=self.purchase_number,
+                )
+
+            super().save(*args, **kwargs)
+            record_purchase(self)
+
+            # Re-cost the item from the earliest day this change affects
+            if original.item_id == self.item_id:  # type: ignore
+                recost_from(self.item_id, self.date, original.date)  # type: ignore
+            else:
+                recost_from(original.item_id, original.date)  # type: ignore
+                recost_from(self.item_id, self.date)  # type: ignore
+            evaluate_low_stock_alerts({original.item_id, self.item_id})  # type: ignore
 
     @property
     def total_cost(self):
@@ -0,0 +1,121 @@
+"""
+Committing purchase orders.
+
+A PurchaseOrder is a header (number, supplier, date) whose lines are
+Purchase rows. commit_purchase_order() writes a whole order with a number
+of queries that grows with the distinct items it holds, not with its lines:
+one read loads every item, one UPDATE applies every stock change,
+bulk_create writes the lines and their ledger entries, and the low-stock
+alerts of the items involved are evaluated as a set. The rollup and cost
+layer upkeep runs once per distinct item.
+
+A purchase saved on its own is committed the same way, as an order of one
+line.
+"""
+
+from collections import Counter
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from inventory.models import Item, StockMovement
+
+from .models import Purchase, PurchaseOrder
+
+
+def commit_purchase_order(order, lines):
+    """
+    Saves `order` with `lines`, unsaved Purchases giving an item, a quantity
+    and optionally a unit cost (the item's purchase price otherwise). The
+    lines take the order's supplier, date and user. `order` may be unsaved
+    or an existing order the lines are added to.
+
+    Raises:
+        ValidationError: If a line is invalid; nothing is saved.
+    """
+    from inventory.costing import recost_from
+    from inventory.rollups import record_item_activity
+    from inventory.sequences import next_number, next_numbers
+    from inventory.signals import order_lines_created
+    from inventory.stock import apply_stock_deltas
+    from inventory.utils import evaluate_low_stock_alerts
+
+    lines = list(lines)
+    if not lines:
+        raise ValidationError("An order needs at least one line.")
+    for line in lines:
+        if not line.quantity or line.quantity <= 0:
+            raise ValidationError("Quantity must be greater than zero.")
+        if line.unit_cost is not None and line.unit_cost <= 0:
+            raise ValidationError("Unit cost must be a positive number.")
+    order.full_clean(exclude=["order_number"])
+
+    # Numbers are taken before the transaction so block reservations apply
+    # (see inventory.sequences)
+    if not order.order_number:
+        order.order_number = next_number(order.NUMBER_PREFIX)
+    unnumbered = [line for line in lines if not line.purchase_number]
+    if unnumbered:
+        numbers = next_numbers(Purchase.NUMBER_PREFIX, len(unnumbered))
+        for line, number in zip(unnumbered, numbers):
+            line.purchase_number = number
+
+    received = Counter()
+    for line in lines:
+        received[line.item_id] += line.quantity
+
+    with transaction.atomic():
+        items = Item.objects.in_bulk(list(received))
+        missing = [item_id for item_id in received if item_id not in items]
+        if missing:
+            raise ValidationError(f"Item {missing[0]} does not exist.")
+
+        for line in lines:
+            line.item = items[line.item_id]
+            if line.unit_cost is None:
+                if not line.item.purchase_price:
+                    raise ValidationError(
+                        f"No purchasing price set for '{line.item.name}'."
+                    )
+                line.unit_cost = line.item.purchase_price
+            line.supplier = order.supplier
+            line.date = order.date
+            line.user = order.user
+            line.clean_fields(exclude=["item", "supplier", "user", "order"])
+
+        order.save()
+        levels = apply_stock_deltas(
+            [(line.item_id, line.quantity, line.purchase_number) for line in lines],
+            source=StockMovement.PURCHASE,
+        )
+        for line in lines:
+            line.order = order
+            line.item.current_stock = levels[line.item_id]
+        Purchase.objects.bulk_create(lines)
+
+        for item_id in received:
+            item_lines = [line for line in lines if line.item_id == item_id]
+            record_item_activity(
+                item_id,
+                order.date,
+                quantity_bought=received[item_id],
+                cost=sum(line.quantity * line.unit_cost for line in item_lines),
+            )
+            recost_from(item_id, order.date)
+        evaluate_low_stock_alerts(received)
+        order_lines_created.send(sender=Purchase, order=order, lines=lines)
+    return order
+
+
+def commit_purchase(purchase):
+    """Commits a single new purchase as an order of one line."""
+    commit_purchase_order(
+        purchase.order
+        or PurchaseOrder(
+            supplier=purchase.supplier,
+            date=purchase.date,
+            description=purchase.description,
+            user=purchase.user,
+        ),
+        [purchase],
+    )
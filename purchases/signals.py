@@ -1,11 +1,41 @@
+from django.db.models import QuerySet
 from django.db.models.signals import post_delete
 from django.dispatch import receiver
 
-from .models import Purchase
+from inventory.costing import recost_from
+from inventory.models import StockMovement
+from inventory.rollups import record_purchase
+from inventory.stock import InsufficientStockError, apply_stock_delta, deleted_with_item
+from inventory.utils import evaluate_low_stock_alerts
+
+from .models import Purchase, PurchaseOrder
+
+
+@receiver(post_delete, sender=Purchase)
+def deduct_stock_on_purchase_delete(sender, instance, origin=None, **kwargs):
+    if deleted_with_item(origin):
+        return
+    try:
+        apply_stock_delta(
+            instance.item_id,
+            -instance.quantity,
+            source=StockMovement.PURCHASE,
+            reference=instance.purchase_number,
+        )
+    except InsufficientStockError:
+        # Purchased stock has already been sold; leave the level untouched
+        pass
+    record_purchase(instance, sign=-1)
+    recost_from(instance.item_id, instance.date)
+    evaluate_low_stock_alerts([instance.item_id])
 
 
 @receiver(post_delete, sender=Purchase)
-def deduct_stock_on_purchase_delete(sender, instance, **kwargs):
-    if instance.item and instance.item.current_stock >= instance.quantity:
-        instance.item.current_stock -= instance.quantity
-        instance.item.save()
+def delete_empty_order(sender, instance, origin=None, **kwargs):
+    # Every purchase belongs to an order, a standalone one to an order of its
+    # own; an order goes with its last line
+    if instance.order_id is None or isinstance(origin, PurchaseOrder):
+        return
+    if isinstance(origin, QuerySet) and origin.model is PurchaseOrder:
+        return
+    PurchaseOrder.objects.filter(pk=instance.order_id, lines__isnull=True).delete()
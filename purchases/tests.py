@@ -1,3 +1,131 @@
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
 from django.test import TestCase
+from django.urls import reverse
+
+from inventory.models import Item, StockAlert, StockMovement, UnitOfMeasure
+
+from .models import Purchase, PurchaseOrder, Supplier
+from .orders import commit_purchase_order
+
+
+class PurchaseOrderTests(TestCase):
+    def setUp(self):
+        unit = UnitOfMeasure.objects.create(name="Pieces")
+        self.items = [
+            Item.objects.create(
+                name=f"Widget {n}",
+                sku=f"SKU-{n}",
+                unit=unit,
+                selling_price=10,
+                purchase_price=6,
+                current_stock=5,
+                reorder_point=10,
+            )
+            for n in range(2)
+        ]
+        self.supplier = Supplier.objects.create(name="Acme")
+        self.user = User.objects.create_user("owner", password="secret")
+
+    def test_commits_every_line_and_resolves_alerts(self):
+        alert = StockAlert.objects.create(
+            item=self.items[0], alert_type="low_stock", message="low"
+        )
+        order = commit_purchase_order(
+            PurchaseOrder(supplier=self.supplier, user=self.user),
+            [
+                Purchase(item=self.items[0], quantity=10),
+                Purchase(item=self.items[1], quantity=2, unit_cost=Decimal("5.50")),
+                Purchase(item=self.items[0], quantity=1),
+            ],
+        )
+        self.assertTrue(order.order_number.startswith("PO-"))
+        self.assertEqual(
+            list(order.lines.order_by("pk").values_list("unit_cost", flat=True)),  # type: ignore
+            [Decimal("6.00"), Decimal("5.50"), Decimal("6.00")],
+        )
+        stock = dict(Item.objects.values_list("pk", "current_stock"))
+        self.assertEqual([stock[item.pk] for item in self.items], [16, 7])
+        self.assertEqual(
+            StockMovement.objects.filter(source=StockMovement.PURCHASE).count(), 3
+        )
+        alert.refresh_from_db()
+        self.assertTrue(alert.is_resolved)
+        # The item still below its reorder point gets one
+        self.assertTrue(
+            StockAlert.objects.filter(item=self.items[1], is_resolved=False).exists()
+        )
+
+    def test_invalid_line_saves_nothing(self):
+        with self.assertRaises(ValidationError):
+            commit_purchase_order(
+                PurchaseOrder(supplier=self.supplier),
+                [
+                    Purchase(item=self.items[0], quantity=3),
+                    Purchase(item=self.items[1], quantity=0),
+                ],
+            )
+        self.assertFalse(Purchase.objects.exists())
+        self.assertEqual(set(Item.objects.values_list("current_stock", flat=True)), {5})
+
+    def test_single_purchase_is_an_order_of_one_line(self):
+        purchase = Purchase.objects.create(
+            item=self.items[0], supplier=self.supplier, quantity=4, unit_cost=6
+        )
+        self.assertEqual(list(purchase.order.lines.all()), [purchase])  # type: ignore
+        self.assertEqual(purchase.order.supplier, self.supplier)  # type: ignore
+
+    def test_order_is_deleted_with_its_last_line(self):
+        purchase = Purchase.objects.create(
+            item=self.items[0], supplier=self.supplier, quantity=4, unit_cost=6
+        )
+        self.client.force_login(self.user)
+        self.client.post(reverse("delete_purchase", args=[purchase.pk]))
+        self.assertFalse(PurchaseOrder.objects.exists())
+
+        order = commit_purchase_order(
+            PurchaseOrder(supplier=self.supplier, user=self.user),
+            [
+                Purchase(item=self.items[0], quantity=1),
+                Purchase(item=self.items[1], quantity=2),
+            ],
+        )
+        first, second = order.lines.order_by("pk")  # type: ignore
+        first.delete()
+        self.assertTrue(PurchaseOrder.objects.filter(pk=order.pk).exists())
+        second.delete()
+        self.assertFalse(PurchaseOrder.objects.exists())
+
+    def test_delete_all_purchases_removes_orders(self):
+        commit_purchase_order(
+            PurchaseOrder(supplier=self.supplier, user=self.user),
+            [Purchase(item=self.items[0], quantity=3)],
+        )
+        self.client.force_login(self.user)
+        self.client.post(reverse("delete_all_purchases"))
+        self.assertFalse(PurchaseOrder.objects.exists())
+        self.assertFalse(Purchase.objects.exists())
+        self.assertEqual(set(Item.objects.values_list("current_stock", flat=True)), {5})
 
-# Create your tests here.
+    def test_add_purchase_order_view(self):
+        self.client.force_login(self.user)
+        response = self.client.post(
+            reverse("add_purchase_order"),
+            {
+                "supplier": self.supplier.pk,
+                "date": "2025-01-15",
+                "lines-TOTAL_FORMS": 2,
+                "lines-INITIAL_FORMS": 0,
+                "lines-0-item": self.items[0].pk,
+                "lines-0-quantity": 4,
+                "lines-1-item": self.items[1].pk,
+                "lines-1-quantity": 2,
+            },
+        )
+        order = PurchaseOrder.objects.get()
+        self.assertRedirects(response, reverse("view_purchase_order", args=[order.pk]))
+        self.assertEqual(order.lines.count(), 2)  # type: ignore
+        response = self.client.get(reverse("view_purchase_order", args=[order.pk]))
+        self.assertContains(response, "KES 36.00")
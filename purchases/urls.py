@@ -4,7 +4,14 @@ from . import views
 
 urlpatterns = [
     path("purchases", views.purchases_view, name="purchases"),
+    path("purchases/data/", views.purchases_data, name="purchases_data"),
     path("purchases/add-purchase/", views.add_purchase, name="add_purchase"),
+    path("purchases/add-order/", views.add_purchase_order, name="add_purchase_order"),
+    path(
+        "purchases/view-order/<int:pk>/",
+        views.view_purchase_order,
+        name="view_purchase_order",
+    ),
     path(
         "purchases/view-purchase/<int:pk>/", views.view_purchase, name="view_purchase"
     ),
@@ -22,6 +29,12 @@ urlpatterns = [
         name="delete_all_purchases",
     ),
     path("purchases/suppliers/", views.supplier_view, name="suppliers"),
+    path("purchases/suppliers/data/", views.suppliers_data, name="suppliers_data"),
+    path(
+        "purchases/suppliers/autocomplete/",
+        views.supplier_autocomplete,
+        name="supplier_autocomplete",
+    ),
     path("suppliers/<int:pk>/", views.view_supplier, name="view_supplier"),
     path("suppliers/add/", views.add_supplier, name="add_supplier"),
     path("suppliers/<int:pk>/edit/", views.edit_supplier, name="edit_supplier"),
@@ -1,27 +1,65 @@
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.core.exceptions import ValidationError
 from django.shortcuts import get_object_or_404, redirect, render
+from django.template.defaultfilters import date as date_filter
+from django.urls import reverse
+from django.utils.formats import localize
+from django.utils.html import escape, format_html
 
 from authentication.models import UserProfile
-from inventory.utils import check_and_create_low_stock_alert
-from purchases.models import Purchase, Supplier
+from purchases.models import Purchase, PurchaseOrder, Supplier
+from stockflow.autocomplete import autocomplete_response
+from stockflow.datatables import clickable_row, currency, datatable_response
 
-from .forms import PurchaseForm, SupplierForm
-from .utils import generate_purchase_number
+from .forms import PurchaseForm, PurchaseLineFormSet, PurchaseOrderForm, SupplierForm
+from .orders import commit_purchase_order
 
 
 @login_required
 def purchases_view(request):
-    purchases = Purchase.objects.select_related("item").order_by("-created_at")
-    total_purchases = purchases.count()
-
+    # Rows are fetched page by page from purchases_data
     return render(
+        request, "purchases.html", {"total_purchases": Purchase.objects.count()}
+    )
+
+
+def _purchase_row(purchase):
+    return clickable_row(
+        reverse("view_purchase", args=[purchase.pk]),
+        purchase_number=escape(purchase.purchase_number),
+        item=escape(purchase.item.name),
+        quantity=purchase.quantity,
+        unit_cost=currency(purchase.unit_cost),
+        total_cost=currency(purchase.total_cost),
+        supplier=escape(purchase.supplier.name if purchase.supplier else ""),
+        date=format_html(
+            '{}<small class="text-muted d-block">({})</small>',
+            date_filter(purchase.date, "Y-m-d"),
+            localize(purchase.date),
+        ),
+    )
+
+
+@login_required
+def purchases_data(request):
+    """DataTables server-side endpoint for the purchases table."""
+    return datatable_response(
         request,
-        "purchases.html",
-        {
-            "purchases": purchases,
-            "total_purchases": total_purchases,
-        },
+        Purchase.objects.select_related("item", "supplier"),
+        columns=[
+            "purchase_number",
+            "item__name",
+            "quantity",
+            "unit_cost",
+            None,
+            "supplier__name",
+            "date",
+        ],
+        render_row=_purchase_row,
+        search_fields=["purchase_number", "item__name", "supplier__name"],
+        default_order=["-date"],
+        keyset=True,
     )
 
 
@@ -32,14 +70,7 @@ def add_purchase(request):
         if form.is_valid():
             purchase = form.save(commit=False)
             purchase.user = request.user
-            # Generate purchase number *after* counting existing purchases
-            purchase_number = generate_purchase_number()
-            purchase.purchase_number = (
-                purchase_number  # assuming you have a purchase_number field
-            )
             purchase.save()
-            # Check and create low stock alert if necessary
-            check_and_create_low_stock_alert(purchase.item)
 
             messages.success(
                 request, f"Purchase recorded successfully for {purchase.item.name}."
@@ -49,45 +80,70 @@ def add_purchase(request):
             messages.error(request, "Please correct the errors below.")
     else:
         form = PurchaseForm()
-        purchase_number_preview = generate_purchase_number()
+
+    return render(request, "forms/add/add_purchase.html", {"form": form})
+
+
+@login_required
+def add_purchase_order(request):
+    if request.method == "POST":
+        form = PurchaseOrderForm(request.POST)
+        formset = PurchaseLineFormSet(request.POST, prefix="lines")
+        if form.is_valid() and formset.is_valid():
+            order = form.save(commit=False)
+            order.user = request.user
+            lines = [
+                Purchase(
+                    item=line["item"],
+                    quantity=line["quantity"],
+                    unit_cost=line["unit_cost"],
+                )
+                for line in formset.cleaned_data
+            ]
+            try:
+                commit_purchase_order(order, lines)
+            except ValidationError as e:
+                form.add_error(None, e)
+            else:
+                messages.success(
+                    request,
+                    f"Purchase order {order.order_number} recorded with "
+                    f"{len(lines)} line(s).",
+                )
+                return redirect("view_purchase_order", pk=order.pk)
+        messages.error(request, "Please correct the errors below.")
+    else:
+        form = PurchaseOrderForm()
+        formset = PurchaseLineFormSet(prefix="lines")
 
     return render(
         request,
-        "forms/add/add_purchase.html",
-        {
-            "form": form,
-            "purchase_number": purchase_number_preview if request.method != "POST" else None,  # type: ignore
-        },
+        "forms/add/add_purchase_order.html",
+        {"form": form, "formset": formset},
+    )
+
+
+@login_required
+def view_purchase_order(request, pk):
+    order = get_object_or_404(PurchaseOrder.objects.select_related("supplier"), pk=pk)
+    lines = list(order.lines.select_related("item").order_by("pk"))  # type: ignore
+    total = sum(line.total_cost for line in lines)
+    return render(
+        request,
+        "view/view_purchase_order.html",
+        {"order": order, "lines": lines, "total": total},
     )
 
 
 @login_required
 def edit_purchase(request, pk):
     purchase = get_object_or_404(Purchase, id=pk)
-    old_item = purchase.item
-    old_quantity = purchase.quantity
 
     if request.method == "POST":
         form = PurchaseForm(request.POST, instance=purchase)
         if form.is_valid():
-            updated_purchase = form.save(commit=False)
-
-            if updated_purchase.item != old_item:
-                # Remove quantity from old item
-                if old_item:
-                    old_item.current_stock -= old_quantity
-                    old_item.save()
-                # Add quantity to new item
-                if updated_purchase.item:
-                    updated_purchase.item.current_stock += updated_purchase.quantity
-                    updated_purchase.item.save()
-            else:
-                # Same item, adjust stock difference
-                quantity_diff = updated_purchase.quantity - old_quantity
-                updated_purchase.item.current_stock += quantity_diff
-                updated_purchase.item.save()
-
-            updated_purchase.save()
+            # Purchase.save() moves stock between the old and new item/quantity
+            updated_purchase = form.save()
             messages.success(request, "Purchase updated successfully.")
             return redirect("view_purchase", pk=updated_purchase.pk)
         else:
@@ -141,18 +197,52 @@ def delete_all_purchases(request):
     if request.method == "POST":
         for purchase in Purchase.objects.all():
             purchase.delete()  # Triggers signal
+        PurchaseOrder.objects.all().delete()
         messages.success(request, "All purchases deleted and stock levels updated.")
     return redirect("purchases")
 
 
 @login_required
 def supplier_view(request):
-    suppliers = Supplier.objects.all().order_by("-created_at")
-    total_suppliers = suppliers.count()
+    # Rows are fetched page by page from suppliers_data
     return render(
+        request, "suppliers.html", {"total_suppliers": Supplier.objects.count()}
+    )
+
+
+def _supplier_row(supplier):
+    return clickable_row(
+        reverse("view_supplier", args=[supplier.pk]),
+        name=escape(supplier.name),
+        email=escape(supplier.email or "—"),
+        phone=escape(supplier.phone or "—"),
+        address=escape(supplier.address or "—"),
+        created_at=date_filter(supplier.created_at, "Y-m-d"),
+    )
+
+
+@login_required
+def suppliers_data(request):
+    """DataTables server-side endpoint for the suppliers table."""
+    return datatable_response(
         request,
-        "suppliers.html",
-        {"suppliers": suppliers, "total_suppliers": total_suppliers},
+        Supplier.objects.all(),
+        columns=["name", "email", "phone", "address", "created_at"],
+        render_row=_supplier_row,
+        search_fields=["name", "email", "phone", "address"],
+        default_order=["-created_at"],
+    )
+
+
+def _supplier_result(supplier):
+    return {"id": supplier.pk, "text": str(supplier)}
+
+
+@login_required
+def supplier_autocomplete(request):
+    """select2 options for the supplier pickers of the entry forms."""
+    return autocomplete_response(
+        request, Supplier.objects.all(), "supplier", _supplier_result
     )
 
 
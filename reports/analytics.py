@@ -0,0 +1,105 @@
+"""
+Aggregate queries shared by the dashboard and the reports.
+
+Every total a page shows for one model comes from a single aggregate() over
+it; figures that only count some rows (low-stock items, say) are conditional
+aggregates with filter=Q(...) in that same query. Time series come from one
+grouped query each, over the DailyItemSummary rollup.
+"""
+
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Q, Sum
+from django.db.models.functions import Coalesce, TruncMonth
+
+from inventory.models import DailyItemSummary, Item
+
+MONEY = DecimalField(max_digits=14, decimal_places=2)
+
+
+def _money(expression):
+    return ExpressionWrapper(expression, output_field=MONEY)
+
+
+def _totals(queryset, **aggregates):
+    """aggregate() with every NULL (no rows) total reported as zero."""
+    totals = queryset.aggregate(**aggregates)
+    return {name: value or 0 for name, value in totals.items()}
+
+
+def item_counts():
+    """Number of items, and of those at or below their reorder point."""
+    return _totals(
+        Item.objects.all(),
+        num_items=Count("pk"),
+        low_stock_count=Count("pk", filter=Q(current_stock__lte=F("reorder_point"))),
+    )
+
+
+def sales_totals(sales):
+    """Quantity, value and discount of a Sale queryset."""
+    return _totals(
+        sales,
+        total_quantity=Sum("quantity"),
+        total_sales=Sum(_money(F("unit_price") * F("quantity"))),
+        total_discount=Sum(
+            _money((F("item__selling_price") - F("unit_price")) * F("quantity")),
+            filter=Q(item__selling_price__isnull=False),
+        ),
+    )
+
+
+def purchase_totals(purchases):
+    """Quantity and cost of a Purchase queryset."""
+    return _totals(
+        purchases,
+        total_quantity=Sum("quantity"),
+        total_purchases=Sum(_money(F("unit_cost") * F("quantity"))),
+    )
+
+
+def ledger_totals(start=None, end=None):
+    """
+    Sales and purchase totals from the rollup, over the days between `start`
+    and `end` (inclusive; either may be None for an open end).
+    """
+    days = Q()
+    if start:
+        days &= Q(day__gte=start)
+    if end:
+        days &= Q(day__lte=end)
+    return _totals(
+        DailyItemSummary.objects.filter(days),
+        total_quantity_sold=Sum("quantity_sold"),
+        total_sales_value=Sum("revenue"),
+        total_quantity_purchased=Sum("quantity_bought"),
+        total_purchase_cost=Sum("cost"),
+    )
+
+
+def _series(queryset, period):
+    totals = (
+        queryset.values(period)
+        .annotate(
+            sales=Coalesce(Sum("revenue"), 0, output_field=MONEY),
+            purchases=Coalesce(Sum("cost"), 0, output_field=MONEY),
+        )
+        .order_by(period)
+    )
+    return {row[period]: (row["sales"], row["purchases"]) for row in totals}
+
+
+def daily_series(start, end):
+    """{day: (sales, purchases)} for the days from `start` to `end` with activity."""
+    return _series(DailyItemSummary.objects.filter(day__range=(start, end)), "day")
+
+
+def monthly_series(start, end):
+    """
+    {first day of month: (sales, purchases)} for the months from `start` to
+    `end` with activity.
+    """
+    return _series(
+        DailyItemSummary.objects.filter(day__range=(start, end)).annotate(
+            month=TruncMonth("day")
+        ),
+        "month",
+    )
@@ -0,0 +1,154 @@
+"""
+Profit report queries.
+
+Line profit and margin are computed by the database as annotations on the
+Sale queryset, so the report never loads sale objects to total them in
+Python. Sales whose cost cannot be determined are costed at zero and
+counted separately, instead of breaking the report.
+"""
+
+from decimal import Decimal
+
+from django.db.models import (
+    Count,
+    DecimalField,
+    ExpressionWrapper,
+    F,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+    Value,
+)
+from django.db.models.functions import Coalesce, NullIf, TruncMonth
+
+from purchases.models import Purchase
+
+MONEY = DecimalField(max_digits=14, decimal_places=2)
+
+COST_BASES = {
+    "recorded": "Recorded cost of sales",
+    "item": "Item purchase price",
+    "average": "Average purchase cost",
+}
+
+GROUPINGS = {
+    "day": "Day",
+    "month": "Month",
+    "item": "Item",
+    "category": "Category",
+}
+
+
+def _average_purchase_cost():
+    """Quantity-weighted average unit cost of the sale's item across purchases."""
+    purchases = (
+        Purchase.objects.filter(item=OuterRef("item"), unit_cost__isnull=False)
+        .order_by()
+        .values("item")
+        .annotate(
+            average=ExpressionWrapper(
+                Sum(F("unit_cost") * F("quantity")) / Sum("quantity"),
+                output_field=MONEY,
+            )
+        )
+        .values("average")
+    )
+    return Subquery(purchases, output_field=MONEY)
+
+
+def _margin(profit, revenue):
+    """Profit as a percentage of revenue; NULL when there was no revenue."""
+    return ExpressionWrapper(
+        profit * Value(Decimal("100")) / NullIf(revenue, Value(Decimal("0"))),
+        output_field=MONEY,
+    )
+
+
+def profit_lines(sales, cost_basis="item"):
+    """
+    Annotates a Sale queryset with unit_cost (NULL when unknown), revenue,
+    cost, profit and margin for each line.
+    """
+    if cost_basis == "recorded":
+        # COGS stored on the sale by inventory.costing
+        unit_cost = ExpressionWrapper(
+            F("cogs") / NullIf(F("quantity"), Value(0)), output_field=MONEY
+        )
+    elif cost_basis == "average":
+        unit_cost = _average_purchase_cost()
+    else:
+        unit_cost = F("item__purchase_price")
+
+    revenue = ExpressionWrapper(F("unit_price") * F("quantity"), output_field=MONEY)
+    cost = ExpressionWrapper(
+        Coalesce(F("unit_cost"), Value(Decimal("0"))) * F("quantity"),
+        output_field=MONEY,
+    )
+    return (
+        sales.annotate(unit_cost=ExpressionWrapper(unit_cost, output_field=MONEY))
+        .annotate(revenue=revenue, cost=cost)
+        .annotate(
+            profit=ExpressionWrapper(F("revenue") - F("cost"), output_field=MONEY)
+        )
+        .annotate(margin=_margin(F("profit"), F("revenue")))
+    )
+
+
+def profit_totals(lines):
+    """
+    Report totals from one aggregate query over annotated `lines`.
+
+    Returns:
+        dict: total_quantity, total_revenue, total_cost, total_profit,
+        total_margin and uncosted (the number of lines whose cost was
+        unknown and counted as zero).
+    """
+    totals = lines.aggregate(
+        total_quantity=Coalesce(Sum("quantity"), 0),
+        total_revenue=Coalesce(Sum("revenue"), Value(Decimal("0")), output_field=MONEY),
+        total_cost=Coalesce(Sum("cost"), Value(Decimal("0")), output_field=MONEY),
+        uncosted=Count("pk", filter=Q(unit_cost__isnull=True)),
+    )
+    revenue = totals["total_revenue"]
+    totals["total_profit"] = revenue - totals["total_cost"]
+    totals["total_margin"] = totals["total_profit"] * 100 / revenue if revenue else None
+    return totals
+
+
+def profit_groups(lines, group_by):
+    """
+    Sums annotated `lines` per day, month, item or category, in that order.
+    Each row has `period` or `label` plus the same total_* keys and
+    uncosted count as profit_totals().
+    """
+    if group_by == "day":
+        grouped = lines.values(period=F("date"))
+        ordering = "-period"
+    elif group_by == "month":
+        grouped = lines.values(period=TruncMonth("date"))
+        ordering = "-period"
+    elif group_by == "item":
+        grouped = lines.values("item_id", label=F("item__name"))
+        ordering = "label"
+    elif group_by == "category":
+        grouped = lines.values(label=F("item__category__name"))
+        ordering = "label"
+    else:
+        raise ValueError(f"Unknown grouping: {group_by}")
+
+    return (
+        grouped.annotate(
+            total_quantity=Sum("quantity"),
+            total_revenue=Sum("revenue", output_field=MONEY),
+            total_cost=Sum("cost", output_field=MONEY),
+            uncosted=Count("pk", filter=Q(unit_cost__isnull=True)),
+        )
+        .annotate(
+            total_profit=ExpressionWrapper(
+                F("total_revenue") - F("total_cost"), output_field=MONEY
+            )
+        )
+        .annotate(total_margin=_margin(F("total_profit"), F("total_revenue")))
+        .order_by(ordering)
+    )
@@ -1,3 +1,270 @@
+import csv
+from datetime import date
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.http import StreamingHttpResponse
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from inventory.models import Category, Item, UnitOfMeasure
+from inventory.stock import get_low_stock_count
+from purchases.models import Purchase, Supplier
+from sales.models import Customer, Sale
+
+from . import analytics
+
+
+def read_csv(response):
+    content = b"".join(response.streaming_content).decode("utf-8-sig")
+    return list(csv.reader(StringIO(content)))
+
+
+class ReportExportTests(TestCase):
+    def setUp(self):
+        unit = UnitOfMeasure.objects.create(name="Pieces")
+        self.item = Item.objects.create(
+            name="Widget",
+            sku="SKU-001",
+            unit=unit,
+            selling_price=10,
+            purchase_price=6,
+            current_stock=100,
+        )
+        customer = Customer.objects.create(name="Walk-in")
+        for day in (1, 2, 3):
+            Sale.objects.create(
+                item=self.item,
+                customer=customer,
+                quantity=day,
+                unit_price=10,
+                date=date(2024, 1, day),
+            )
+        Purchase.objects.create(
+            item=self.item,
+            supplier=Supplier.objects.create(name="Acme"),
+            quantity=4,
+            unit_cost=6,
+            date=date(2024, 1, 2),
+        )
+        self.user = User.objects.create_user("owner", password="secret")
+        self.client.force_login(self.user)
+
+    def test_sales_export_streams_filtered_rows(self):
+        response = self.client.get(
+            reverse("sales_report_export"), {"start": "2024-01-02", "end": "2024-01-03"}
+        )
+        self.assertIsInstance(response, StreamingHttpResponse)
+        self.assertIn("2024-01-02_to_2024-01-03", response["Content-Disposition"])
+        rows = read_csv(response)
+        self.assertEqual(rows[0][0], "Sales Number")
+        self.assertEqual(
+            [row[1:] for row in rows[1:]],
+            [
+                ["Widget", "Walk-in", "3", "10.00", "30.00", "2024-01-03"],
+                ["Widget", "Walk-in", "2", "10.00", "20.00", "2024-01-02"],
+            ],
+        )
+
+    def test_purchases_export(self):
+        rows = read_csv(self.client.get(reverse("purchases_report_export")))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(
+            rows[1][1:], ["Widget", "Acme", "4", "6.00", "24.00", "2024-01-02"]
+        )
+
+    def test_profit_export(self):
+        rows = read_csv(self.client.get(reverse("profit_report_export")))
+        self.assertEqual(
+            rows[1],
+            [
+                "2024-01-03",
+                "Widget",
+                "3",
+                "10.00",
+                "30.00",
+                "6.00",
+                "18.00",
+                "12.00",
+                "40.00",
+            ],
+        )
+
+    def test_items_export(self):
+        rows = read_csv(self.client.get(reverse("export_items")))
+        self.assertEqual(rows[0][:2], ["Name", "SKU"])
+        self.assertEqual(rows[1][:2], ["Widget", "SKU-001"])
+
+
+class ReportTotalsTests(TestCase):
+    def setUp(self):
+        unit = UnitOfMeasure.objects.create(name="Pieces")
+        self.item = Item.objects.create(
+            name="Widget",
+            sku="SKU-001",
+            unit=unit,
+            selling_price=10,
+            purchase_price=6,
+            current_stock=1000,
+            reorder_point=5,
+        )
+        self.customer = Customer.objects.create(name="Walk-in")
+        self.supplier = Supplier.objects.create(name="Acme")
+        self.user = User.objects.create_user("owner", password="secret")
+        self.client.force_login(self.user)
+        # Creates the low-stock count row the navigation reads
+        get_low_stock_count()
+
+    def add_history(self, days):
+        for day in range(1, days + 1):
+            Sale.objects.create(
+                item=self.item,
+                customer=self.customer,
+                quantity=2,
+                unit_price=8,
+                date=date(2024, 1, day),
+            )
+            Purchase.objects.create(
+                item=self.item,
+                supplier=self.supplier,
+                quantity=3,
+                unit_cost=6,
+                date=date(2024, 1, day),
+            )
+
+    def test_each_model_is_totalled_in_one_query(self):
+        self.add_history(3)
+        with self.assertNumQueries(1):
+            totals = analytics.sales_totals(Sale.objects.all())
+        self.assertEqual(
+            totals, {"total_quantity": 6, "total_sales": 48, "total_discount": 12}
+        )
+        with self.assertNumQueries(1):
+            totals = analytics.purchase_totals(Purchase.objects.all())
+        self.assertEqual(totals, {"total_quantity": 9, "total_purchases": 54})
+        with self.assertNumQueries(1):
+            counts = analytics.item_counts()
+        self.assertEqual(counts, {"num_items": 1, "low_stock_count": 0})
+
+    def test_series_are_one_grouped_query_each(self):
+        self.add_history(3)
+        with self.assertNumQueries(1):
+            days = analytics.daily_series(date(2024, 1, 1), date(2024, 1, 31))
+        self.assertEqual(days[date(2024, 1, 2)], (16, 18))
+        with self.assertNumQueries(1):
+            months = analytics.monthly_series(date(2024, 1, 1), date(2024, 12, 31))
+        self.assertEqual(months, {date(2024, 1, 1): (48, 54)})
+
+    def test_report_query_count_is_fixed(self):
+        for name in ("sales_report", "purchases_report"):
+            with self.subTest(name), self.assertNumQueries(6):
+                self.client.get(reverse(name))
+        self.add_history(5)
+        for name in ("sales_report", "purchases_report"):
+            with self.subTest(name), self.assertNumQueries(6):
+                response = self.client.get(reverse(name))
+            self.assertEqual(
+                response.context["total_quantity"], 10 if "sales" in name else 15
+            )
+
+
+class ProfitReportTests(TestCase):
+    def setUp(self):
+        unit = UnitOfMeasure.objects.create(name="Pieces")
+        self.category = Category.objects.create(name="Tools")
+        self.widget = Item.objects.create(
+            name="Widget",
+            sku="SKU-001",
+            unit=unit,
+            category=self.category,
+            selling_price=10,
+            purchase_price=6,
+            current_stock=100,
+        )
+        self.gadget = Item.objects.create(
+            name="Gadget",
+            sku="SKU-002",
+            unit=unit,
+            selling_price=20,
+            purchase_price=5,
+            current_stock=100,
+        )
+        self.customer = Customer.objects.create(name="Walk-in")
+        self.sell(self.widget, 2, 10, date(2024, 1, 5))
+        self.sell(self.widget, 1, 10, date(2024, 2, 1))
+        self.sell(self.gadget, 1, 20, date(2024, 2, 3))
+        self.user = User.objects.create_user("owner", password="secret")
+        self.client.force_login(self.user)
+        # Creates the low-stock count row the navigation reads
+        get_low_stock_count()
+
+    def sell(self, item, quantity, price, day):
+        Sale.objects.create(
+            item=item,
+            customer=self.customer,
+            quantity=quantity,
+            unit_price=price,
+            date=day,
+        )
+
+    def test_totals_and_lines(self):
+        response = self.client.get(reverse("profit_report"))
+        context = response.context
+        self.assertEqual(context["total_quantity"], 4)
+        self.assertEqual(context["total_revenue"], 50)
+        self.assertEqual(context["total_cost"], 23)
+        self.assertEqual(context["total_profit"], 27)
+        self.assertEqual(round(context["total_margin"]), 54)
+        lines = list(context["page_obj"])
+        self.assertEqual(
+            [line.item.name for line in lines], ["Gadget", "Widget", "Widget"]
+        )
+        self.assertEqual(lines[0].profit, 15)
+        self.assertEqual(lines[0].margin, 75)
+
+    def test_missing_purchase_price_is_costed_at_zero(self):
+        Item.objects.filter(pk=self.gadget.pk).update(purchase_price=None)
+        response = self.client.get(reverse("profit_report"))
+        self.assertEqual(response.context["total_cost"], 18)
+        self.assertEqual(response.context["uncosted"], 1)
+        self.assertContains(response, "had no known cost")
+
+    def test_grouping(self):
+        response = self.client.get(reverse("profit_report"), {"group": "month"})
+        groups = list(response.context["groups"])
+        self.assertEqual([group["period"].month for group in groups], [2, 1])
+        self.assertEqual(groups[0]["total_revenue"], 30)
+        self.assertEqual(groups[0]["total_profit"], 19)
+
+        response = self.client.get(reverse("profit_report"), {"group": "category"})
+        by_category = {
+            group["label"]: group["total_quantity"]
+            for group in response.context["groups"]
+        }
+        self.assertEqual(by_category, {None: 1, "Tools": 3})
+
+    def test_average_purchase_cost_basis(self):
+        supplier = Supplier.objects.create(name="Acme")
+        for quantity, cost in ((1, 4), (3, 8)):
+            Purchase.objects.create(
+                item=self.widget, supplier=supplier, quantity=quantity, unit_cost=cost
+            )
+        response = self.client.get(
+            reverse("profit_report"), {"cost": "average", "group": "item"}
+        )
+        by_item = {group["label"]: group for group in response.context["groups"]}
+        # (1 * 4 + 3 * 8) / 4 = 7 per widget
+        self.assertEqual(by_item["Widget"]["total_cost"], 21)
+        # No purchases recorded for the gadget
+        self.assertEqual(by_item["Gadget"]["uncosted"], 1)
 
-# Create your tests here.
+    def test_query_count_does_not_grow_with_sales(self):
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(reverse("profit_report"))
+        for day in range(1, 20):
+            self.sell(self.gadget, 1, 20, date(2024, 3, day))
+        with CaptureQueriesContext(connection) as many:
+            self.client.get(reverse("profit_report"))
+        self.assertEqual(len(few), len(many))
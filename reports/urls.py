@@ -6,4 +6,15 @@ urlpatterns = [
     path("sales-report/", views.sales_report_view, name="sales_report"),
     path("purchases-report/", views.purchases_report_view, name="purchases_report"),
     path("profit-loss-report/", views.profit_report_view, name="profit_report"),
+    path("sales-report/export/", views.sales_report_export, name="sales_report_export"),
+    path(
+        "purchases-report/export/",
+        views.purchases_report_export,
+        name="purchases_report_export",
+    ),
+    path(
+        "profit-loss-report/export/",
+        views.profit_report_export,
+        name="profit_report_export",
+    ),
 ]
@@ -1,9 +1,37 @@
 from django.contrib.auth.decorators import login_required
-from django.db.models import DecimalField, ExpressionWrapper, F, Sum
+from django.core.paginator import Paginator
+from django.db.models import DecimalField, ExpressionWrapper, F
 from django.shortcuts import render
 
 from purchases.models import Purchase
 from sales.models import Sale
+from stockflow.exports import csv_export_response, export_rows
+
+from . import analytics
+from .profit import COST_BASES, GROUPINGS, profit_groups, profit_lines, profit_totals
+
+# Sales per page of the ungrouped profit report
+PROFIT_LINES_PER_PAGE = 50
+
+
+def _filter_by_date(queryset, request):
+    """Applies the report's optional ?start=&end= date range."""
+    start_date = request.GET.get("start")
+    end_date = request.GET.get("end")
+    if start_date and end_date:
+        queryset = queryset.filter(date__range=[start_date, end_date])
+    return queryset, start_date, end_date
+
+
+def _cost_basis(request):
+    cost_basis = request.GET.get("cost")
+    return cost_basis if cost_basis in COST_BASES else "item"
+
+
+def _export_filename(name, start_date, end_date):
+    if start_date and end_date:
+        return f"{name}_{start_date}_to_{end_date}.csv"
+    return f"{name}.csv"
 
 
 @login_required
@@ -11,10 +39,7 @@ def sales_report_view(request):
     sales = Sale.objects.select_related("item", "customer", "user").order_by("-date")
 
     # Optional: filter by date range
-    start_date = request.GET.get("start")
-    end_date = request.GET.get("end")
-    if start_date and end_date:
-        sales = sales.filter(date__range=[start_date, end_date])
+    sales, start_date, end_date = _filter_by_date(sales, request)
 
     # Annotate for display
     sales = sales.annotate(
@@ -32,42 +57,13 @@ def sales_report_view(request):
         ),
     )
 
-    # Use raw expressions in aggregation
-    total_sales = (
-        sales.aggregate(
-            total=Sum(
-                ExpressionWrapper(
-                    F("unit_price") * F("quantity"),
-                    output_field=DecimalField(max_digits=10, decimal_places=2),
-                )
-            )
-        )["total"]
-        or 0
-    )
-
-    total_discount = (
-        sales.aggregate(
-            total=Sum(
-                ExpressionWrapper(
-                    F("item__selling_price") * F("quantity")
-                    - F("unit_price") * F("quantity"),
-                    output_field=DecimalField(max_digits=10, decimal_places=2),
-                )
-            )
-        )["total"]
-        or 0
-    )
-
-    total_quantity = sales.aggregate(total=Sum("quantity"))["total"] or 0
-
     return render(
         request,
         "sales_report.html",
         {
             "sales": sales,
-            "total_sales": total_sales,
-            "total_discount": total_discount,
-            "total_quantity": total_quantity,
+            # One aggregate() for every total
+            **analytics.sales_totals(sales),
             "start_date": start_date,
             "end_date": end_date,
         },
@@ -81,10 +77,7 @@ def purchases_report_view(request):
     )
 
     # Optional: filter by date range
-    start_date = request.GET.get("start")
-    end_date = request.GET.get("end")
-    if start_date and end_date:
-        purchases = purchases.filter(date__range=[start_date, end_date])
+    purchases, start_date, end_date = _filter_by_date(purchases, request)
 
     # Annotate with total cost
     purchases = purchases.annotate(
@@ -94,28 +87,12 @@ def purchases_report_view(request):
         )
     )
 
-    # Aggregated totals
-    total_purchases = (
-        purchases.aggregate(
-            total=Sum(
-                ExpressionWrapper(
-                    F("unit_cost") * F("quantity"),
-                    output_field=DecimalField(max_digits=10, decimal_places=2),
-                )
-            )
-        )["total"]
-        or 0
-    )
-
-    total_quantity = purchases.aggregate(total=Sum("quantity"))["total"] or 0
-
     return render(
         request,
         "purchases_report.html",  # use your actual template name
         {
             "purchases": purchases,
-            "total_purchases": total_purchases,
-            "total_quantity": total_quantity,
+            **analytics.purchase_totals(purchases),
             "start_date": start_date,
             "end_date": end_date,
         },
@@ -124,49 +101,130 @@ def purchases_report_view(request):
 
 @login_required
 def profit_report_view(request):
-    start_date = request.GET.get("start")
-    end_date = request.GET.get("end")
-
-    sales_qs = Sale.objects.select_related("item")
-    if start_date and end_date:
-        sales_qs = sales_qs.filter(date__range=[start_date, end_date])
-
-    profit_data = []
-    total_sales = 0
-    total_cost = 0
-    total_profit = 0
-
-    for sale in sales_qs:
-        item = sale.item
-        unit_cost = item.purchase_price
-        total_sale = sale.unit_price * sale.quantity
-        total_c = unit_cost * sale.quantity
-        profit = total_sale - total_c
-
-        profit_data.append(
-            {
-                "date": sale.date,
-                "item": item,
-                "quantity": sale.quantity,
-                "unit_price": sale.unit_price,
-                "total_sales": total_sale,
-                "unit_cost": unit_cost,
-                "total_cost": total_c,
-                "profit": profit,
-            }
-        )
-
-        total_sales += total_sale
-        total_cost += total_c
-        total_profit += profit
-
+    sales, start_date, end_date = _filter_by_date(Sale.objects.all(), request)
+    cost_basis = _cost_basis(request)
+    group_by = request.GET.get("group", "")
+    if group_by not in GROUPINGS:
+        group_by = ""
+
+    # Everything below is computed by the database; no Sale is loaded just
+    # to be added up
+    lines = profit_lines(sales, cost_basis)
     context = {
-        "profit_data": profit_data,
-        "total_sales": total_sales,
-        "total_cost": total_cost,
-        "total_profit": total_profit,
+        **profit_totals(lines),
+        "group_by": group_by,
+        "group_label": GROUPINGS.get(group_by),
+        "groupings": GROUPINGS,
+        "cost_basis": cost_basis,
+        "cost_bases": COST_BASES,
         "start_date": start_date,
         "end_date": end_date,
     }
+    if group_by:
+        context["groups"] = profit_groups(lines, group_by)
+    else:
+        paginator = Paginator(
+            lines.select_related("item").order_by("-date", "-pk"),
+            PROFIT_LINES_PER_PAGE,
+        )
+        context["page_obj"] = paginator.get_page(request.GET.get("page"))
 
     return render(request, "profit_report.html", context)
+
+
+@login_required
+def sales_report_export(request):
+    sales, start_date, end_date = _filter_by_date(Sale.objects.all(), request)
+    sales = sales.annotate(
+        total=ExpressionWrapper(
+            F("unit_price") * F("quantity"),
+            output_field=DecimalField(max_digits=10, decimal_places=2),
+        )
+    ).order_by("-date", "-pk")
+    return csv_export_response(
+        _export_filename("sales_report", start_date, end_date),
+        [
+            "Sales Number",
+            "Item",
+            "Customer",
+            "Quantity",
+            "Unit Price",
+            "Total",
+            "Date",
+        ],
+        export_rows(
+            sales,
+            "sales_number",
+            "item__name",
+            "customer__name",
+            "quantity",
+            "unit_price",
+            "total",
+            "date",
+        ),
+    )
+
+
+@login_required
+def purchases_report_export(request):
+    purchases, start_date, end_date = _filter_by_date(Purchase.objects.all(), request)
+    purchases = purchases.annotate(
+        total=ExpressionWrapper(
+            F("unit_cost") * F("quantity"),
+            output_field=DecimalField(max_digits=10, decimal_places=2),
+        )
+    ).order_by("-date", "-pk")
+    return csv_export_response(
+        _export_filename("purchases_report", start_date, end_date),
+        [
+            "Purchase Number",
+            "Item",
+            "Supplier",
+            "Quantity",
+            "Unit Cost",
+            "Total",
+            "Date",
+        ],
+        export_rows(
+            purchases,
+            "purchase_number",
+            "item__name",
+            "supplier__name",
+            "quantity",
+            "unit_cost",
+            "total",
+            "date",
+        ),
+    )
+
+
+@login_required
+def profit_report_export(request):
+    sales, start_date, end_date = _filter_by_date(Sale.objects.all(), request)
+    lines = profit_lines(sales, _cost_basis(request)).order_by("-date", "-pk")
+    return csv_export_response(
+        _export_filename("profit_report", start_date, end_date),
+        [
+            "Date",
+            "Item",
+            "Qty Sold",
+            "Sale Price",
+            "Total Sales",
+            "Unit Cost",
+            "Total Cost",
+            "Profit",
+            "Margin %",
+        ],
+        export_rows(
+            lines,
+            "date",
+            "item__name",
+            "quantity",
+            "unit_price",
+            "revenue",
+            "unit_cost",
+            "cost",
+            "profit",
+            "margin",
+        ),
+    )
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Customer, Sale
+from .models import Customer, Sale, SalesOrder
 
 
 @admin.register(Customer)
@@ -33,3 +33,28 @@ class SaleAdmin(admin.ModelAdmin):
         if obj.discount > 0:
             return f"KES {obj.discount:.2f} ({obj.discount}%)"
         return "–"
+
+
+class SaleLineInline(admin.TabularInline):
+    model = Sale
+    fields = ("sales_number", "item", "quantity", "unit_price")
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+    show_change_link = True
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(SalesOrder)
+class SalesOrderAdmin(admin.ModelAdmin):
+    list_display = ("order_number", "customer", "date", "created_at")
+    search_fields = ("order_number", "customer__name")
+    list_filter = ("date",)
+    readonly_fields = ("order_number", "created_at")
+    inlines = [SaleLineInline]
+
+    def has_add_permission(self, request):
+        # Orders are written with their lines by sales.orders.commit_sales_order
+        return False
@@ -1,10 +1,19 @@
+from decimal import Decimal
+
 from crispy_bootstrap5.bootstrap5 import FloatingField
 from crispy_forms.helper import FormHelper
 from crispy_forms.layout import HTML, Column, Field, Layout, Row
 from django import forms
 from django.core.exceptions import ValidationError
 
-from .models import Customer, Sale
+from inventory.models import Item
+from stockflow.autocomplete import (
+    AutocompleteSelect,
+    PrefetchedFormSet,
+    PrefetchedModelChoiceField,
+)
+
+from .models import Customer, Sale, SalesOrder
 
 
 class SaleForm(forms.ModelForm):
@@ -19,6 +28,8 @@ class SaleForm(forms.ModelForm):
             "date",
         ]
         widgets = {
+            "item": AutocompleteSelect("item_autocomplete"),
+            "customer": AutocompleteSelect("customer_autocomplete"),
             "description": forms.Textarea(attrs={"style": "height: 100px"}),
             "date": forms.DateInput(attrs={"type": "date"}),
         }
@@ -133,6 +144,80 @@ class SaleForm(forms.ModelForm):
         return instance
 
 
+class SalesOrderForm(forms.ModelForm):
+    """The header of a sales order; its lines are entered with SaleLineFormSet."""
+
+    class Meta:
+        model = SalesOrder
+        fields = ["customer", "date", "description"]
+        widgets = {
+            "customer": AutocompleteSelect("customer_autocomplete"),
+            "description": forms.Textarea(attrs={"style": "height: 100px"}),
+            "date": forms.DateInput(attrs={"type": "date"}),
+        }
+        labels = {"date": "Date of Sale"}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["customer"].widget.attrs.update(
+            {
+                "class": "select2-customer",
+                "data-placeholder": "Select a customer",
+            }
+        )
+
+        self.helper = FormHelper()
+        # Rendered inside the order form together with the lines
+        self.helper.form_tag = False
+        self.helper.layout = Layout(
+            Row(
+                Column(Field("customer"), css_class="col-md-6"),
+                Column(FloatingField("date"), css_class="col-md-6"),
+                css_class="g-4 mb-4",
+            ),
+            Row(
+                Column(FloatingField("description"), css_class="col-md-12"),
+                css_class="g-4 mb-4",
+            ),
+        )
+
+
+class SaleLineForm(forms.Form):
+    item = PrefetchedModelChoiceField(
+        queryset=Item.objects.all(),
+        widget=AutocompleteSelect(
+            "item_autocomplete",
+            attrs={"class": "select2-item", "data-placeholder": "Select an item"},
+        ),
+    )
+    quantity = forms.IntegerField(
+        min_value=1, widget=forms.NumberInput(attrs={"class": "form-control", "min": 1})
+    )
+    unit_price = forms.DecimalField(
+        required=False,
+        max_digits=10,
+        decimal_places=2,
+        min_value=Decimal("0.01"),
+        label="Unit Price",
+        widget=forms.NumberInput(
+            attrs={
+                "class": "form-control",
+                "step": "0.01",
+                "placeholder": "Item price",
+            }
+        ),
+    )
+
+
+class BaseSaleLineFormSet(PrefetchedFormSet):
+    prefetched = ("item",)
+
+
+SaleLineFormSet = forms.formset_factory(
+    SaleLineForm, formset=BaseSaleLineFormSet, extra=0, min_num=1, validate_min=True
+)
+
+
 class CustomerForm(forms.ModelForm):
     """Form for creating and updating customers, styled with Crispy Forms."""
 
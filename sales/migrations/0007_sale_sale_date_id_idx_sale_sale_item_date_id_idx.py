@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0031_inventoryadjustment_adjustment_date_id_idx_and_more'),
+        ('sales', '0006_alter_sale_customer'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['date', 'id'], name='sale_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['item', 'date', 'id'], name='sale_item_date_id_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0007_sale_sale_date_id_idx_sale_sale_item_date_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sale',
+            name='cogs',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=14, null=True),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:22
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0033_category_category_name_upper_idx_and_more'),
+        ('sales', '0008_sale_cogs'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['created_at'], name='customer_created_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['date', 'created_at'], name='sale_date_created_idx'),
+        ),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:23
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def create_orders(apps, schema_editor):
+    """
+    Give every existing sale an order of its own, numbered after it
+    (SALE-20250101-001 becomes SO-20250101-001), and start the SO counters
+    where the SALE ones are.
+    """
+    Sale = apps.get_model('sales', 'Sale')
+    SalesOrder = apps.get_model('sales', 'SalesOrder')
+    DocumentSequence = apps.get_model('inventory', 'DocumentSequence')
+    lines = Sale.objects.filter(order__isnull=True).order_by('pk')
+    while batch := list(lines[:2000]):
+        orders = SalesOrder.objects.bulk_create(
+            [
+                SalesOrder(
+                    order_number=(
+                        'SO' + line.sales_number[len('SALE'):]
+                        if line.sales_number.startswith('SALE-')
+                        else f'SO-{line.pk}'
+                    ),
+                    customer_id=line.customer_id,
+                    description=line.description,
+                    date=line.date,
+                    user_id=line.user_id,
+                )
+                for line in batch
+            ]
+        )
+        for line, order in zip(batch, orders):
+            line.order = order
+        Sale.objects.bulk_update(batch, ['order'])
+    DocumentSequence.objects.bulk_create(
+        [
+            DocumentSequence(prefix='SO', day=sequence.day, last_value=sequence.last_value)
+            for sequence in DocumentSequence.objects.filter(prefix='SALE')
+        ],
+        batch_size=2000,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0010_customer_customer_name_idx'),
+        ('inventory', '0035_documentsequence'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SalesOrder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('order_number', models.CharField(editable=False, max_length=30, unique=True)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('date', models.DateField(default=django.utils.timezone.now)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('customer', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to='sales.customer')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='sale',
+            name='order',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='sales.salesorder'),
+        ),
+        migrations.RunPython(create_orders, migrations.RunPython.noop),
+    ]
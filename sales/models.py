@@ -2,10 +2,10 @@ from decimal import Decimal
 
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
 from django.utils.timezone import now
 
-from inventory.models import Item
+from inventory.models import Item, StockMovement
 
 
 class Customer(models.Model):
@@ -16,11 +16,41 @@ class Customer(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Default ordering of the customer list
+            models.Index(fields=["created_at"], name="customer_created_at_idx"),
+            # Alphabetical listing of the customer pickers
+            models.Index(fields=["name"], name="customer_name_idx"),
+        ]
+
     def __str__(self):
         return self.name
 
 
+class SalesOrder(models.Model):
+    """
+    A customer's order of one or more items; its lines are Sales. Orders
+    are written by sales.orders.commit_sales_order().
+    """
+
+    NUMBER_PREFIX = "SO"
+
+    order_number = models.CharField(max_length=30, unique=True, editable=False)
+    customer = models.ForeignKey("Customer", on_delete=models.SET_NULL, null=True)
+    description = models.TextField(blank=True, null=True)
+    date = models.DateField(default=now)
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.order_number} - {self.customer or 'Walk-in'}"
+
+
 class Sale(models.Model):
+    NUMBER_PREFIX = "SALE"
+
     sales_number = models.CharField(max_length=30, unique=True, editable=False)
     item = models.ForeignKey(Item, on_delete=models.CASCADE)
     customer = models.ForeignKey("Customer", on_delete=models.SET_NULL, null=True)
@@ -29,8 +59,31 @@ class Sale(models.Model):
     description = models.TextField(blank=True, null=True)
     date = models.DateField(default=now)
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    # Null only for rows bulk-loaded without going through an order
+    order = models.ForeignKey(
+        SalesOrder,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name="lines",
+    )
 
     created_at = models.DateTimeField(auto_now_add=True)
+    # Cost of goods sold, computed from the item's cost layers (see
+    # inventory.costing)
+    cogs = models.DecimalField(
+        max_digits=14, decimal_places=2, null=True, blank=True, editable=False
+    )
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of all sales and of each item's sales
+            models.Index(fields=["date", "id"], name="sale_date_id_idx"),
+            models.Index(fields=["item", "date", "id"], name="sale_item_date_id_idx"),
+            # Most recent transactions on the dashboard
+            models.Index(fields=["date", "created_at"], name="sale_date_created_idx"),
+        ]
 
     def __str__(self):
         return f"{self.sales_number} - {self.customer or 'Walk-in'}"
@@ -50,12 +103,17 @@ class Sale(models.Model):
                 raise ValidationError("Not enough stock available for this sale.")
 
     def save(self, *args, **kwargs):
-        from .utils import generate_sales_number
+        from inventory.costing import recost_from
+        from inventory.rollups import record_sale
+        from inventory.stock import apply_stock_delta
+        from inventory.utils import evaluate_low_stock_alerts
 
-        is_new = self.pk is None
+        from .orders import commit_sale
 
-        if not self.sales_number:
-            self.sales_number = generate_sales_number()
+        if self.pk is None:
+            # A new sale is an order of one line
+            commit_sale(self)
+            return
 
         # Use fallback if unit_price is missing
         if self.unit_price is None:
@@ -66,32 +124,53 @@ class Sale(models.Model):
         # Run validation *before* changing stock
         self.full_clean()
 
-        # Adjust stock
-        if is_new:
-            self.item.current_stock -= self.quantity
-        else:
-            original = Sale.objects.get(pk=self.pk)
-            if self.item == original.item:
-                # Same item: restore then deduct
-                self.item.current_stock += original.quantity
-                self.item.current_stock -= self.quantity
+        # Adjust stock atomically in the database
+        with transaction.atomic():
+            original = Sale.objects.only(
+                "item_id", "quantity", "unit_price", "date"
+            ).get(pk=self.pk)
+            record_sale(original, sign=-1)
+            if self.item_id == original.item_id:  # type: ignore
+                # Same item: restore then deduct in one step
+                apply_stock_delta(
+                    self.item,
+                    original.quantity - self.quantity,
+                    source=StockMovement.SALE,
+                    reference=self.sales_number,
+                )
             else:
                 # Different item: restore original, deduct from new
-                original.item.current_stock += original.quantity
-                original.item.save()
-                self.item.current_stock -= self.quantity
-
-        self.item.save()
+                apply_stock_delta(
+                    original.item_id,  # type: ignore
+                    original.quantity,
+                    source=StockMovement.SALE,
+                    reference=self.sales_number,
+                )
+                apply_stock_delta(
+                    self.item,
+                    -self.quantity,
+                    source=StockMovement.SALE,
+                    reference=self.sales_number,
+                )
+
+            # Compute discount
+            if self.item.selling_price:
+                expected_price = Decimal(self.item.selling_price) * self.quantity
+                actual_price = self.unit_price * self.quantity
+                self._discount = max(expected_price - actual_price, Decimal("0.00"))
+            else:
+                self._discount = Decimal("0.00")
 
-        # Compute discount
-        if self.item.selling_price:
-            expected_price = Decimal(self.item.selling_price) * self.quantity
-            actual_price = self.unit_price * self.quantity
-            self._discount = max(expected_price - actual_price, Decimal("0.00"))
-        else:
-            self._discount = Decimal("0.00")
+            super().save(*args, **kwargs)
+            record_sale(self)
 
-        super().save(*args, **kwargs)
+            # Re-cost the item from the earliest day this change affects
+            if original.item_id == self.item_id:  # type: ignore
+                recost_from(self.item_id, self.date, original.date)  # type: ignore
+            else:
+                recost_from(original.item_id, original.date)  # type: ignore
+                recost_from(self.item_id, self.date)  # type: ignore
+            evaluate_low_stock_alerts({original.item_id, self.item_id})  # type: ignore
 
     @property
     def selling_price(self):
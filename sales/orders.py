@@ -0,0 +1,141 @@
+"""
+Committing sales orders.
+
+A SalesOrder is a header (number, customer, date) whose lines are Sale
+rows. commit_sales_order() writes a whole order with a number of queries
+that grows with the distinct items it holds, not with its lines: one read
+validates stock for every line, one UPDATE applies every stock change,
+bulk_create writes the lines and their ledger entries, and the low-stock
+alerts of the items involved are evaluated as a set. The rollup and cost
+layer upkeep runs once per distinct item.
+
+A sale saved on its own is committed the same way, as an order of one line.
+"""
+
+from collections import Counter
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from inventory.models import Item, StockMovement
+
+from .models import Sale, SalesOrder
+
+
+def _stock_errors(needed, items):
+    errors = []
+    for item_id, quantity in needed.items():
+        item = items.get(item_id)
+        if item is None:
+            errors.append(ValidationError(f"Item {item_id} does not exist."))
+        elif quantity > item.current_stock:
+            errors.append(
+                ValidationError(
+                    f"Not enough stock of '{item.name}'. Only "
+                    f"{item.current_stock} unit(s) available."
+                )
+            )
+    return errors
+
+
+def commit_sales_order(order, lines):
+    """
+    Saves `order` with `lines`, unsaved Sales giving an item, a quantity and
+    optionally a unit price (the item's selling price otherwise). The lines
+    take the order's customer, date and user. `order` may be unsaved or an
+    existing order the lines are added to.
+
+    Raises:
+        ValidationError: If a line is invalid or an item lacks the stock for
+              all of its lines; nothing is saved.
+    """
+    from inventory.costing import recost_from
+    from inventory.rollups import record_item_activity
+    from inventory.sequences import next_number, next_numbers
+    from inventory.signals import order_lines_created
+    from inventory.stock import apply_stock_deltas
+    from inventory.utils import evaluate_low_stock_alerts
+
+    lines = list(lines)
+    if not lines:
+        raise ValidationError("An order needs at least one line.")
+    for line in lines:
+        if not line.quantity or line.quantity <= 0:
+            raise ValidationError("Quantity must be a positive number.")
+    order.full_clean(exclude=["order_number"])
+
+    # Numbers are taken before the transaction so block reservations apply
+    # (see inventory.sequences)
+    if not order.order_number:
+        order.order_number = next_number(order.NUMBER_PREFIX)
+    unnumbered = [line for line in lines if not line.sales_number]
+    if unnumbered:
+        numbers = next_numbers(Sale.NUMBER_PREFIX, len(unnumbered))
+        for line, number in zip(unnumbered, numbers):
+            line.sales_number = number
+
+    needed = Counter()
+    for line in lines:
+        needed[line.item_id] += line.quantity
+
+    with transaction.atomic():
+        # One query validates the stock of every line
+        items = Item.objects.select_for_update().in_bulk(list(needed))
+        errors = _stock_errors(needed, items)
+        if errors:
+            raise ValidationError(errors)
+
+        for line in lines:
+            line.item = items[line.item_id]
+            if line.unit_price is None:
+                if not line.item.selling_price:
+                    raise ValidationError(
+                        f"No selling price set for '{line.item.name}'."
+                    )
+                line.unit_price = line.item.selling_price
+            line.customer = order.customer
+            line.date = order.date
+            line.user = order.user
+            line.clean_fields(exclude=["item", "customer", "user", "order"])
+            expected = Decimal(line.item.selling_price or 0) * line.quantity
+            line._discount = max(
+                expected - line.unit_price * line.quantity, Decimal("0.00")
+            )
+
+        order.save()
+        levels = apply_stock_deltas(
+            [(line.item_id, -line.quantity, line.sales_number) for line in lines],
+            source=StockMovement.SALE,
+        )
+        for line in lines:
+            line.order = order
+            line.item.current_stock = levels[line.item_id]
+        Sale.objects.bulk_create(lines)
+
+        for item_id in needed:
+            item_lines = [line for line in lines if line.item_id == item_id]
+            record_item_activity(
+                item_id,
+                order.date,
+                quantity_sold=needed[item_id],
+                revenue=sum(line.quantity * line.unit_price for line in item_lines),
+            )
+            recost_from(item_id, order.date)
+        evaluate_low_stock_alerts(needed)
+        order_lines_created.send(sender=Sale, order=order, lines=lines)
+    return order
+
+
+def commit_sale(sale):
+    """Commits a single new sale as an order of one line."""
+    commit_sales_order(
+        sale.order
+        or SalesOrder(
+            customer=sale.customer,
+            date=sale.date,
+            description=sale.description,
+            user=sale.user,
+        ),
+        [sale],
+    )
@@ -1,11 +1,37 @@
+from django.db.models import QuerySet
 from django.db.models.signals import post_delete
 from django.dispatch import receiver
 
-from .models import Sale
+from inventory.costing import recost_from
+from inventory.models import StockMovement
+from inventory.rollups import record_sale
+from inventory.stock import apply_stock_delta, deleted_with_item
+from inventory.utils import evaluate_low_stock_alerts
+
+from .models import Sale, SalesOrder
+
+
+@receiver(post_delete, sender=Sale)
+def restore_stock_on_sale_delete(sender, instance, origin=None, **kwargs):
+    if deleted_with_item(origin):
+        return
+    apply_stock_delta(
+        instance.item_id,
+        instance.quantity,
+        source=StockMovement.SALE,
+        reference=instance.sales_number,
+    )
+    record_sale(instance, sign=-1)
+    recost_from(instance.item_id, instance.date)
+    evaluate_low_stock_alerts([instance.item_id])
 
 
 @receiver(post_delete, sender=Sale)
-def restore_stock_on_sale_delete(sender, instance, **kwargs):
-    if instance.item:
-        instance.item.current_stock += instance.quantity
-        instance.item.save()
+def delete_empty_order(sender, instance, origin=None, **kwargs):
+    # Every sale belongs to an order, a standalone one to an order of its
+    # own; an order goes with its last line
+    if instance.order_id is None or isinstance(origin, SalesOrder):
+        return
+    if isinstance(origin, QuerySet) and origin.model is SalesOrder:
+        return
+    SalesOrder.objects.filter(pk=instance.order_id, lines__isnull=True).delete()
@@ -1,3 +1,360 @@
+import base64
+import json
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from inventory.models import (
+    DailyItemSummary,
+    Item,
+    StockAlert,
+    StockMovement,
+    UnitOfMeasure,
+)
+from stockflow.pagination import InvalidCursor, KeysetPaginator
+
+from .models import Customer, Sale, SalesOrder
+from .orders import commit_sales_order
+
+
+class SalesDataTableTests(TestCase):
+    def setUp(self):
+        unit = UnitOfMeasure.objects.create(name="Pieces")
+        self.item = Item.objects.create(
+            name="Widget",
+            sku="SKU-001",
+            unit=unit,
+            selling_price=10,
+            purchase_price=6,
+            current_stock=1000,
+        )
+        self.customer = Customer.objects.create(name="Walk-in")
+        self.user = User.objects.create_user("owner", password="secret")
+        self.client.force_login(self.user)
+
+    def add_sales(self, count, customer=None):
+        for day in range(1, count + 1):
+            Sale.objects.create(
+                item=self.item,
+                customer=customer or self.customer,
+                quantity=day,
+                unit_price=10,
+                date=date(2024, 1, day),
+            )
+
+    def fetch(self, **params):
+        defaults = {"draw": 1, "start": 0, "length": 10}
+        defaults.update(params)
+        response = self.client.get(reverse("sales_data"), defaults)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_pages_newest_first_by_default(self):
+        self.add_sales(12)
+        first = self.fetch(draw=3)
+        self.assertEqual(first["draw"], 3)
+        self.assertEqual(first["recordsTotal"], 12)
+        self.assertEqual(first["recordsFiltered"], 12)
+        self.assertEqual(len(first["data"]), 10)
+        self.assertEqual(first["data"][0]["quantity"], 12)
+
+        second = self.fetch(start=10)
+        self.assertEqual([row["quantity"] for row in second["data"]], [2, 1])
+
+    def test_orders_by_requested_column(self):
+        self.add_sales(3)
+        payload = self.fetch(**{"order[0][column]": 2, "order[0][dir]": "asc"})
+        self.assertEqual([row["quantity"] for row in payload["data"]], [1, 2, 3])
+
+    def test_search_filters_rows(self):
+        self.add_sales(2)
+        Sale.objects.create(
+            item=self.item,
+            customer=Customer.objects.create(name="Jane <Doe>"),
+            quantity=1,
+            unit_price=10,
+        )
+        payload = self.fetch(**{"search[value]": "jane"})
+        self.assertEqual(payload["recordsTotal"], 3)
+        self.assertEqual(payload["recordsFiltered"], 1)
+        row = payload["data"][0]
+        self.assertEqual(row["customer"], "Jane &lt;Doe&gt;")
+        self.assertEqual(row["DT_RowClass"], "clickable-row")
+        self.assertTrue(row["DT_RowAttr"]["data-href"].startswith("/"))
+
+    def test_length_is_capped(self):
+        self.add_sales(3)
+        payload = self.fetch(length=-1)
+        self.assertEqual(len(payload["data"]), 3)
+
+    def test_cursor_moves_one_page(self):
+        self.add_sales(12)
+        first = self.fetch(length=5, **{"order[0][column]": 7, "order[0][dir]": "desc"})
+        self.assertIsNone(first["cursors"]["previous"])
+        second = self.fetch(
+            length=5,
+            cursor=first["cursors"]["next"],
+            **{"order[0][column]": 7, "order[0][dir]": "desc"},
+        )
+        self.assertEqual([row["quantity"] for row in second["data"]], [7, 6, 5, 4, 3])
+        back = self.fetch(length=5, cursor=second["cursors"]["previous"])
+        self.assertEqual(back["data"], first["data"])
+
+    def test_cursor_with_invalid_value_returns_first_page(self):
+        self.add_sales(12)
+        cursor = base64.urlsafe_b64encode(
+            json.dumps({"k": ["notadate", 1], "b": False}).encode()
+        ).decode()
+        payload = self.fetch(length=5, cursor=cursor)
+        self.assertEqual(payload["data"], self.fetch(length=5)["data"])
+
+    def test_searching_falls_back_to_offset_paging(self):
+        self.add_sales(3)
+        payload = self.fetch(**{"search[value]": "SALE"})
+        self.assertNotIn("cursors", payload)
+        self.assertEqual(payload["recordsFiltered"], 3)
+
+    def test_query_count_does_not_grow_with_page_size(self):
+        self.add_sales(2)
+        with CaptureQueriesContext(connection) as small:
+            self.fetch()
+        self.add_sales(10, customer=Customer.objects.create(name="Other"))
+        with CaptureQueriesContext(connection) as large:
+            self.fetch()
+        self.assertEqual(len(small), len(large))
+
+    def test_list_page_no_longer_renders_rows(self):
+        self.add_sales(2)
+        response = self.client.get(reverse("sales"))
+        self.assertContains(response, reverse("sales_data"))
+        self.assertNotContains(response, Sale.objects.first().sales_number)
+
+
+class SalesOrderTests(TestCase):
+    def setUp(self):
+        unit = UnitOfMeasure.objects.create(name="Pieces")
+        self.items = [
+            Item.objects.create(
+                name=f"Widget {n}",
+                sku=f"SKU-{n}",
+                unit=unit,
+                selling_price=10,
+                purchase_price=6,
+                current_stock=100,
+                reorder_point=20,
+            )
+            for n in range(3)
+        ]
+        self.customer = Customer.objects.create(name="Walk-in")
+        self.user = User.objects.create_user("owner", password="secret")
+
+    def commit(self, quantities, **line_kwargs):
+        order = SalesOrder(customer=self.customer, user=self.user)
+        lines = [
+            Sale(item=self.items[n % len(self.items)], quantity=quantity, **line_kwargs)
+            for n, quantity in enumerate(quantities)
+        ]
+        return commit_sales_order(order, lines)
+
+    def test_commits_every_line(self):
+        order = self.commit([5, 10, 85, 5], unit_price=Decimal("9.00"))
+        self.assertTrue(order.order_number.startswith("SO-"))
+        lines = list(order.lines.order_by("pk"))  # type: ignore
+        self.assertEqual(len(lines), 4)
+        self.assertEqual(len({line.sales_number for line in lines}), 4)
+        self.assertTrue(all(line.customer == self.customer for line in lines))
+
+        stock = dict(Item.objects.values_list("pk", "current_stock"))
+        self.assertEqual([stock[item.pk] for item in self.items], [90, 90, 15])
+        self.assertEqual(
+            StockMovement.objects.filter(source=StockMovement.SALE).count(), 4
+        )
+        summary = DailyItemSummary.objects.get(item=self.items[0])
+        self.assertEqual(summary.quantity_sold, 10)
+        self.assertEqual(summary.revenue, Decimal("90.00"))
+        # Only the item taken below its reorder point is alerted
+        self.assertEqual(
+            list(StockAlert.objects.values_list("item", flat=True)),
+            [self.items[2].pk],
+        )
+
+    def test_query_count_does_not_grow_with_lines(self):
+        # The first order of the day creates the number counters and the
+        # items' rollup rows
+        self.commit([1, 1, 1])
+        with CaptureQueriesContext(connection) as short:
+            self.commit([1, 1, 1])
+        with CaptureQueriesContext(connection) as long:
+            self.commit([1] * 30)
+        self.assertEqual(len(short), len(long))
+
+    def test_shortage_on_any_line_saves_nothing(self):
+        with self.assertRaises(ValidationError) as ctx:
+            self.commit([60, 5, 5, 50])
+        self.assertIn("Widget 0", str(ctx.exception))
+        self.assertFalse(SalesOrder.objects.exists())
+        self.assertFalse(Sale.objects.exists())
+        self.assertFalse(
+            StockMovement.objects.filter(source=StockMovement.SALE).exists()
+        )
+        self.assertEqual(
+            set(Item.objects.values_list("current_stock", flat=True)), {100}
+        )
+
+    def test_single_sale_is_an_order_of_one_line(self):
+        sale = Sale.objects.create(
+            item=self.items[0], customer=self.customer, quantity=3, unit_price=10
+        )
+        self.assertIsNotNone(sale.order)
+        self.assertEqual(list(sale.order.lines.all()), [sale])  # type: ignore
+        self.assertEqual(sale.order.customer, self.customer)  # type: ignore
+        self.items[0].refresh_from_db()
+        self.assertEqual(self.items[0].current_stock, 97)
+
+    def test_order_is_deleted_with_its_last_line(self):
+        sale = Sale.objects.create(
+            item=self.items[0], customer=self.customer, quantity=3, unit_price=10
+        )
+        self.client.force_login(self.user)
+        self.client.post(reverse("delete_sale", args=[sale.pk]))
+        self.assertFalse(SalesOrder.objects.exists())
+
+        order = self.commit([1, 2])
+        first, second = order.lines.order_by("pk")  # type: ignore
+        first.delete()
+        self.assertTrue(SalesOrder.objects.filter(pk=order.pk).exists())
+        second.delete()
+        self.assertFalse(SalesOrder.objects.exists())
+
+    def test_delete_all_sales_removes_orders(self):
+        self.commit([5, 10])
+        self.client.force_login(self.user)
+        self.client.post(reverse("delete_all_sales"))
+        self.assertFalse(SalesOrder.objects.exists())
+        self.assertFalse(Sale.objects.exists())
+        self.assertEqual(
+            set(Item.objects.values_list("current_stock", flat=True)), {100}
+        )
+
+    def test_add_sales_order_view(self):
+        self.client.force_login(self.user)
+        data = {
+            "customer": self.customer.pk,
+            "date": "2025-01-15",
+            "lines-TOTAL_FORMS": 2,
+            "lines-INITIAL_FORMS": 0,
+            "lines-0-item": self.items[0].pk,
+            "lines-0-quantity": 4,
+            "lines-1-item": self.items[1].pk,
+            "lines-1-quantity": 2,
+            "lines-1-unit_price": "8.50",
+        }
+        response = self.client.post(reverse("add_sales_order"), data)
+        order = SalesOrder.objects.get()
+        self.assertRedirects(response, reverse("view_sales_order", args=[order.pk]))
+        self.assertEqual(
+            list(order.lines.order_by("pk").values_list("quantity", "unit_price")),  # type: ignore
+            [(4, Decimal("10.00")), (2, Decimal("8.50"))],
+        )
+
+        response = self.client.get(reverse("view_sales_order", args=[order.pk]))
+        self.assertContains(response, order.order_number)
+        self.assertContains(response, "KES 57.00")
+
+    def test_add_sales_order_view_reports_shortage(self):
+        self.client.force_login(self.user)
+        response = self.client.post(
+            reverse("add_sales_order"),
+            {
+                "customer": self.customer.pk,
+                "date": "2025-01-15",
+                "lines-TOTAL_FORMS": 1,
+                "lines-INITIAL_FORMS": 0,
+                "lines-0-item": self.items[0].pk,
+                "lines-0-quantity": 500,
+            },
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Not enough stock")
+        self.assertFalse(Sale.objects.exists())
+
+
+class KeysetPaginatorTests(TestCase):
+    def setUp(self):
+        unit = UnitOfMeasure.objects.create(name="Pieces")
+        item = Item.objects.create(
+            name="Widget",
+            sku="SKU-001",
+            unit=unit,
+            selling_price=10,
+            purchase_price=6,
+            current_stock=100,
+        )
+        customer = Customer.objects.create(name="Walk-in")
+        # Several sales share a date, so the id must break ties
+        for day in (1, 1, 1, 2, 2, 3, 4):
+            Sale.objects.create(
+                item=item,
+                customer=customer,
+                quantity=1,
+                unit_price=10,
+                date=date(2024, 1, day),
+            )
+        self.paginator = KeysetPaginator(Sale.objects.all(), ("-date", "-pk"), 3)
+        self.expected = list(Sale.objects.order_by("-date", "-pk"))
+
+    def test_walks_forward_and_back_without_gaps(self):
+        pages = [self.paginator.page()]
+        while pages[-1].has_next():
+            pages.append(self.paginator.page(pages[-1].next_cursor))
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertEqual([sale for page in pages for sale in page], self.expected)
+        self.assertFalse(pages[0].has_previous())
+
+        previous = self.paginator.page(pages[2].previous_cursor)
+        self.assertEqual(previous.object_list, pages[1].object_list)
+        self.assertTrue(previous.has_previous())
+        self.assertEqual(
+            self.paginator.page(previous.previous_cursor).object_list,
+            pages[0].object_list,
+        )
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(InvalidCursor):
+            self.paginator.page("not-a-cursor")
+        self.assertEqual(
+            self.paginator.get_page("not-a-cursor").object_list, self.expected[:3]
+        )
+
+    def test_deep_pages_run_the_same_queries(self):
+        first = self.paginator.page()
+        with CaptureQueriesContext(connection) as shallow:
+            second = self.paginator.page(first.next_cursor)
+        with CaptureQueriesContext(connection) as deep:
+            self.paginator.page(second.next_cursor)
+        self.assertEqual(len(shallow), len(deep))
+        self.assertNotIn("OFFSET", deep[0]["sql"])
+
+    def test_datetime_keys_keep_microseconds(self):
+        # Every row within the same millisecond
+        start = datetime(2024, 1, 1, 12, 0, 0, 100, tzinfo=timezone.utc)
+        for n, sale in enumerate(Sale.objects.order_by("pk")):
+            Sale.objects.filter(pk=sale.pk).update(
+                created_at=start + timedelta(microseconds=n * 50)
+            )
+        paginator = KeysetPaginator(Sale.objects.all(), ("-created_at", "-pk"), 3)
+        expected = list(Sale.objects.order_by("-created_at", "-pk"))
+
+        pages = [paginator.page()]
+        while pages[-1].has_next():
+            pages.append(paginator.page(pages[-1].next_cursor))
+        self.assertEqual([sale for page in pages for sale in page], expected)
 
-# Create your tests here.
+        previous = paginator.page(pages[2].previous_cursor)
+        self.assertEqual(previous.object_list, pages[1].object_list)
@@ -4,12 +4,21 @@ from . import views
 
 urlpatterns = [
     path("sales/sales-records/", views.sales_view, name="sales"),
+    path("sales/sales-records/data/", views.sales_data, name="sales_data"),
     path("sales/add-sale/", views.add_sale, name="add_sale"),
+    path("sales/add-order/", views.add_sales_order, name="add_sales_order"),
+    path("sales/view-order/<int:pk>/", views.view_sales_order, name="view_sales_order"),
     path("sales/view-sale/<int:pk>/", views.view_sale, name="view_sale"),
     path("sales/edit-sale/<int:pk>/", views.edit_sale, name="edit_sale"),
     path("sales/delete-sale/<int:pk>/", views.delete_sale, name="delete_sale"),
     path("sales/delete-all-sales/", views.delete_all_sales, name="delete_all_sales"),
     path("sales/customers/", views.customers_view, name="customers"),
+    path("sales/customers/data/", views.customers_data, name="customers_data"),
+    path(
+        "sales/customers/autocomplete/",
+        views.customer_autocomplete,
+        name="customer_autocomplete",
+    ),
     path("sales/add-customer/", views.add_customer, name="add_customer"),
     path("sales/edit-customer/<int:pk>/", views.edit_customer, name="edit_customer"),
     path("sales/view-customer/<int:pk>/", views.view_customer, name="view_customer"),
@@ -1,27 +1,69 @@
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.core.exceptions import ValidationError
 from django.shortcuts import get_object_or_404, redirect, render
+from django.template.defaultfilters import date as date_filter
+from django.urls import reverse
+from django.utils.formats import localize
+from django.utils.html import escape, format_html
 
 from authentication.models import UserProfile
-from inventory.utils import check_and_create_low_stock_alert
-from sales.models import Customer, Sale
+from sales.models import Customer, Sale, SalesOrder
+from stockflow.autocomplete import autocomplete_response
+from stockflow.datatables import clickable_row, currency, datatable_response
 
-from .forms import CustomerForm, SaleForm
-from .utils import generate_sales_number
+from .forms import CustomerForm, SaleForm, SaleLineFormSet, SalesOrderForm
+from .orders import commit_sales_order
 
 
 @login_required
 def sales_view(request):
-    sales = Sale.objects.select_related("item").order_by("-created_at")
-    total_sales = sales.count()
-
-    context = {
-        "sales": sales,
-        "total_sales": total_sales,
-    }
+    # Rows are fetched page by page from sales_data
+    context = {"total_sales": Sale.objects.count()}
     return render(request, "sales.html", context)
 
 
+def _sale_row(sale):
+    return clickable_row(
+        reverse("view_sale", args=[sale.pk]),
+        sales_number=escape(sale.sales_number),
+        item=escape(sale.item.name),
+        quantity=sale.quantity,
+        unit_price=currency(sale.unit_price),
+        total=currency(sale.selling_price),
+        discount=currency(sale.discount),
+        customer=escape(sale.customer.name if sale.customer else ""),
+        date=format_html(
+            '{}<small class="text-muted d-block">({})</small>',
+            date_filter(sale.date, "Y-m-d"),
+            localize(sale.date),
+        ),
+    )
+
+
+@login_required
+def sales_data(request):
+    """DataTables server-side endpoint for the sales table."""
+    return datatable_response(
+        request,
+        Sale.objects.select_related("item", "customer"),
+        columns=[
+            "sales_number",
+            "item__name",
+            "quantity",
+            "unit_price",
+            None,
+            None,
+            "customer__name",
+            "date",
+        ],
+        render_row=_sale_row,
+        search_fields=["sales_number", "item__name", "customer__name"],
+        default_order=["-date"],
+        keyset=True,
+    )
+
+
 @login_required
 def add_sale(request):
     if request.method == "POST":
@@ -29,12 +71,7 @@ def add_sale(request):
         if form.is_valid():
             sale = form.save(commit=False)
             sale.user = request.user
-            # Generate sales number *after* counting existing sales
-            sale_number = generate_sales_number()
-            sale.sales_number = sale_number  # assuming you have a sales_number field
             sale.save()
-            # Check and create low stock alert if necessary
-            check_and_create_low_stock_alert(sale.item)
 
             messages.success(
                 request, f"Sale recorded successfully for {sale.item.name}."
@@ -44,16 +81,58 @@ def add_sale(request):
             messages.error(request, "Please correct the errors below.")
     else:
         form = SaleForm()
-        # Only for preview (optional; can remove this if not displaying it in form)
-        sales_number_preview = generate_sales_number()
+
+    return render(request, "forms/add/add_sale.html", {"form": form})
+
+
+@login_required
+def add_sales_order(request):
+    if request.method == "POST":
+        form = SalesOrderForm(request.POST)
+        formset = SaleLineFormSet(request.POST, prefix="lines")
+        if form.is_valid() and formset.is_valid():
+            order = form.save(commit=False)
+            order.user = request.user
+            lines = [
+                Sale(
+                    item=line["item"],
+                    quantity=line["quantity"],
+                    unit_price=line["unit_price"],
+                )
+                for line in formset.cleaned_data
+            ]
+            try:
+                commit_sales_order(order, lines)
+            except ValidationError as e:
+                form.add_error(None, e)
+            else:
+                messages.success(
+                    request,
+                    f"Sales order {order.order_number} recorded with "
+                    f"{len(lines)} line(s).",
+                )
+                return redirect("view_sales_order", pk=order.pk)
+        messages.error(request, "Please correct the errors below.")
+    else:
+        form = SalesOrderForm()
+        formset = SaleLineFormSet(prefix="lines")
 
     return render(
         request,
-        "forms/add/add_sale.html",
-        {
-            "form": form,
-            "sales_number": sales_number_preview if request.method != "POST" else None,  # type: ignore
-        },
+        "forms/add/add_sales_order.html",
+        {"form": form, "formset": formset},
+    )
+
+
+@login_required
+def view_sales_order(request, pk):
+    order = get_object_or_404(SalesOrder.objects.select_related("customer"), pk=pk)
+    lines = list(order.lines.select_related("item").order_by("pk"))  # type: ignore
+    total = sum(line.selling_price for line in lines)
+    return render(
+        request,
+        "view/view_sales_order.html",
+        {"order": order, "lines": lines, "total": total},
     )
 
 
@@ -110,19 +189,52 @@ def delete_sale(request, pk):
 def delete_all_sales(request):
     if request.method == "POST":
         Sale.objects.all().delete()
+        SalesOrder.objects.all().delete()
         messages.success(request, "All sales records deleted and stock levels reset.")
     return redirect("sales")
 
 
 @login_required
 def customers_view(request):
-    customers = Customer.objects.all().order_by("-created_at")
-    total_customers = customers.count()
-
+    # Rows are fetched page by page from customers_data
     return render(
+        request, "customers.html", {"total_customers": Customer.objects.count()}
+    )
+
+
+def _customer_row(customer):
+    return clickable_row(
+        reverse("view_customer", args=[customer.pk]),
+        name=escape(customer.name),
+        email=escape(customer.email or "—"),
+        phone=escape(customer.phone or "—"),
+        address=escape(customer.address or "—"),
+        created_at=date_filter(customer.created_at, "Y-m-d"),
+    )
+
+
+@login_required
+def customers_data(request):
+    """DataTables server-side endpoint for the customers table."""
+    return datatable_response(
         request,
-        "customers.html",
-        {"customers": customers, "total_customers": total_customers},
+        Customer.objects.all(),
+        columns=["name", "email", "phone", "address", "created_at"],
+        render_row=_customer_row,
+        search_fields=["name", "email", "phone", "address"],
+        default_order=["-created_at"],
+    )
+
+
+def _customer_result(customer):
+    return {"id": customer.pk, "text": str(customer)}
+
+
+@login_required
+def customer_autocomplete(request):
+    """select2 options for the customer pickers of the entry forms."""
+    return autocomplete_response(
+        request, Customer.objects.all(), "customer", _customer_result
     )
 
 
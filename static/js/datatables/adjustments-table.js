@@ -1,11 +1,25 @@
 document.addEventListener("DOMContentLoaded", function () {
   const table = $("#adjustmentsTable").DataTable({
+    // Rows are paged, sorted and searched on the server
+    processing: true,
+    serverSide: true,
+    ajax: keysetAjax($("#adjustmentsTable").data("source")),
+    columns: [
+      { data: "item" },
+      { data: "adjustment_type" },
+      { data: "quantity" },
+      { data: "reason" },
+      { data: "description" },
+      { data: "user" },
+      { data: "date" },
+    ],
     paging: true,
+    pagingType: "simple",
     pageLength: 10,
     lengthChange: true,
     searching: true,
     ordering: true,
-    order: [[0, "desc"]], // Default order by date (column index 0)
+    order: [[6, "desc"]], // Default order by date (column index 6)
     info: true,
     responsive: true,
     autoWidth: false,
@@ -1,5 +1,20 @@
 document.addEventListener("DOMContentLoaded", function () {
   const table = $("#itemsTable").DataTable({
+    // Rows are paged, sorted and searched on the server
+    processing: true,
+    serverSide: true,
+    ajax: $("#itemsTable").data("source"),
+    columns: [
+      { data: "name" },
+      { data: "sku" },
+      { data: "category" },
+      { data: "unit" },
+      { data: "purchase_price" },
+      { data: "selling_price" },
+      { data: "opening_stock" },
+      { data: "current_stock" },
+      { data: "created_at" },
+    ],
     paging: true,
     pageLength: 10,
     lengthChange: true,
@@ -18,8 +33,14 @@ document.addEventListener("DOMContentLoaded", function () {
         className: "btn btn-secondary",
         text: '<i class="bi bi-download me-1"></i> Export',
         buttons: [
-          { extend: "excel", className: "dropdown-item" },
-          { extend: "csv", className: "dropdown-item" },
+          {
+            // Streamed by the server, so it covers every item
+            text: "CSV",
+            className: "dropdown-item",
+            action: function () {
+              window.location = $("#itemsTable").data("export");
+            },
+          },
           { extend: "pdf", className: "dropdown-item" },
           { extend: "print", className: "dropdown-item" },
         ],
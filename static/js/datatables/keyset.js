@@ -0,0 +1,37 @@
+// Ajax settings for tables whose endpoint pages by keyset (seek) cursors.
+// The server returns next/previous cursors with each page; they are sent
+// back when the table moves one page forward or back, so deep pages cost
+// the same as the first one. Use with pagingType "simple".
+function keysetAjax(url) {
+  let cursors = {};
+  let signature = null;
+  let start = 0;
+  let length = 0;
+
+  return {
+    url: url,
+    data: function (d) {
+      // Cursors are only valid for the ordering, search and page length
+      // they were issued for
+      const current = JSON.stringify([d.order, d.search, d.length]);
+      if (current !== signature) {
+        cursors = {};
+        signature = current;
+      }
+      start = d.start;
+      length = d.length;
+      if (cursors[start]) {
+        d.cursor = cursors[start];
+      }
+    },
+    dataSrc: function (json) {
+      if (json.cursors) {
+        if (json.cursors.next) cursors[start + length] = json.cursors.next;
+        if (json.cursors.previous) {
+          cursors[start - length] = json.cursors.previous;
+        }
+      }
+      return json.data;
+    },
+  };
+}
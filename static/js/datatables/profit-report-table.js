@@ -1,15 +1,14 @@
 document.addEventListener("DOMContentLoaded", function () {
   const table = $("#profitReportTable").DataTable({
-    paging: true,
-    pageLength: 10,
-    lengthChange: true,
+    // Pages come from the server; searching and sorting apply to the page
+    paging: false,
     searching: true,
     ordering: true,
-    info: true,
+    info: false,
     responsive: true,
     autoWidth: false,
     dom: "lBfrtip",
-    order: [[5, "desc"]],
+    order: [],
     buttons: [
       {
         extend: "collection",
@@ -17,14 +16,12 @@ document.addEventListener("DOMContentLoaded", function () {
         text: '<i class="bi bi-download me-1"></i> Export',
         buttons: [
           {
-            extend: "excelHtml5",
-            title: "Profit Report",
-            className: "dropdown-item",
-          },
-          {
-            extend: "csvHtml5",
-            title: "Profit Report",
+            // Streamed by the server, so it covers every row in the range
+            text: "CSV",
             className: "dropdown-item",
+            action: function () {
+              window.location = $("#profitReportTable").data("export");
+            },
           },
           {
             extend: "pdfHtml5",
@@ -1,6 +1,20 @@
 document.addEventListener("DOMContentLoaded", function () {
   const table = $("#purchasesTable").DataTable({
+    // Rows are paged, sorted and searched on the server
+    processing: true,
+    serverSide: true,
+    ajax: keysetAjax($("#purchasesTable").data("source")),
+    columns: [
+      { data: "purchase_number" },
+      { data: "item" },
+      { data: "quantity" },
+      { data: "unit_cost" },
+      { data: "total_cost" },
+      { data: "supplier" },
+      { data: "date" },
+    ],
     paging: true,
+    pagingType: "simple",
     pageLength: 10,
     lengthChange: true,
     searching: true,
@@ -17,14 +17,12 @@ document.addEventListener("DOMContentLoaded", function () {
         text: '<i class="bi bi-download me-1"></i> Export',
         buttons: [
           {
-            extend: "excelHtml5",
-            title: "Sales Report",
-            className: "dropdown-item",
-          },
-          {
-            extend: "csvHtml5",
-            title: "Sales Report",
+            // Streamed by the server, so it covers every row in the range
+            text: "CSV",
             className: "dropdown-item",
+            action: function () {
+              window.location = $("#salesReportTable").data("export");
+            },
           },
           {
             extend: "pdfHtml5",
@@ -1,6 +1,21 @@
 document.addEventListener("DOMContentLoaded", function () {
   const table = $("#salesTable").DataTable({
+    // Rows are paged, sorted and searched on the server
+    processing: true,
+    serverSide: true,
+    ajax: keysetAjax($("#salesTable").data("source")),
+    columns: [
+      { data: "sales_number" },
+      { data: "item" },
+      { data: "quantity" },
+      { data: "unit_price" },
+      { data: "total" },
+      { data: "discount" },
+      { data: "customer" },
+      { data: "date" },
+    ],
     paging: true,
+    pagingType: "simple",
     pageLength: 10,
     lengthChange: true,
     searching: true,
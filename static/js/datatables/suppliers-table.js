@@ -1,5 +1,16 @@
 document.addEventListener("DOMContentLoaded", function () {
   const table = $("#suppliersTable").DataTable({
+    // Rows are paged, sorted and searched on the server
+    processing: true,
+    serverSide: true,
+    ajax: $("#suppliersTable").data("source"),
+    columns: [
+      { data: "name" },
+      { data: "email" },
+      { data: "phone" },
+      { data: "address" },
+      { data: "created_at" },
+    ],
     paging: true,
     pageLength: 10,
     lengthChange: true,
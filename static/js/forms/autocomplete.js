@@ -0,0 +1,40 @@
+// select2 options for the pickers rendered by
+// stockflow.autocomplete.AutocompleteSelect: the <select> only holds the
+// selected option and the rest are fetched page by page from its
+// data-autocomplete-url as the user types.
+function autocompleteOptions(select) {
+  const options = {
+    theme: "bootstrap-5",
+    placeholder: $(select).data("placeholder") || "Select an option",
+    width: "100%",
+    allowClear: true,
+  };
+  const url = select.dataset.autocompleteUrl;
+  if (url) {
+    options.ajax = {
+      url: url,
+      dataType: "json",
+      delay: 250,
+      data: (params) => ({ q: params.term || "", page: params.page || 1 }),
+    };
+    options.templateResult = function (result) {
+      // Items are listed with their SKU and stock on hand
+      if (result.loading || result.sku === undefined) {
+        return result.text;
+      }
+      return $("<div>").append(
+        $("<div>").text(result.text),
+        $("<small class='text-body-secondary'>").text(
+          `${result.sku} · ${result.current_stock} in stock`,
+        ),
+      );
+    };
+  }
+  return options;
+}
+
+function initAutocompleteSelects(selector) {
+  $(selector).each(function () {
+    $(this).select2(autocompleteOptions(this));
+  });
+}
@@ -29,14 +29,7 @@ document.addEventListener("DOMContentLoaded", function () {
   }
 
   if (typeof jQuery !== "undefined" && $.fn.select2) {
-    // Assuming you might use select2 for item and supplier fields
-    $(".select2-item, .select2-supplier").select2({
-      // Changed .select2-customer to .select2-supplier
-      theme: "bootstrap-5",
-      placeholder: $(this).data("placeholder") || "Select an option",
-      width: "100%",
-      allowClear: true,
-    });
+    initAutocompleteSelects(".select2-item, .select2-supplier");
   }
 
   form.addEventListener("submit", function (e) {
@@ -29,12 +29,7 @@ document.addEventListener("DOMContentLoaded", function () {
   }
 
   if (typeof jQuery !== "undefined" && $.fn.select2) {
-    $(".select2-item, .select2-customer").select2({
-      theme: "bootstrap-5",
-      placeholder: $(this).data("placeholder") || "Select an option",
-      width: "100%",
-      allowClear: true,
-    });
+    initAutocompleteSelects(".select2-item, .select2-customer");
   }
 
   form.addEventListener("submit", function (e) {
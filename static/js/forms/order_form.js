@@ -0,0 +1,61 @@
+// Order entry: adds and removes line rows of the "lines" formset.
+document.addEventListener("DOMContentLoaded", function () {
+  const form = document.querySelector(".order-form");
+  if (!form) {
+    return;
+  }
+  const lines = form.querySelector(".order-lines");
+  const template = form.querySelector(".order-line-template");
+  const totalForms = form.querySelector('input[name="lines-TOTAL_FORMS"]');
+  const pickers = ".select2-item, .select2-customer, .select2-supplier";
+
+  function initPickers(root) {
+    if (typeof jQuery !== "undefined" && $.fn.select2) {
+      $(root)
+        .find(pickers)
+        .addBack(pickers)
+        .each(function () {
+          initAutocompleteSelects(this);
+        });
+    }
+  }
+
+  // Keeps the form indexes contiguous after a row is removed
+  function renumber() {
+    const rows = lines.querySelectorAll(".order-line");
+    rows.forEach(function (row, index) {
+      row.querySelectorAll("[name], [id], label[for]").forEach(function (el) {
+        ["name", "id", "for"].forEach(function (attr) {
+          const value = el.getAttribute(attr);
+          if (value) {
+            el.setAttribute(attr, value.replace(/lines-\d+-/, `lines-${index}-`));
+          }
+        });
+      });
+    });
+    totalForms.value = rows.length;
+  }
+
+  form.querySelector(".add-line").addEventListener("click", function () {
+    const index = parseInt(totalForms.value, 10);
+    const html = template.innerHTML.replace(/__prefix__/g, index);
+    lines.insertAdjacentHTML("beforeend", html);
+    totalForms.value = index + 1;
+    initPickers(lines.lastElementChild);
+  });
+
+  lines.addEventListener("click", function (e) {
+    const button = e.target.closest(".remove-line");
+    if (!button || lines.querySelectorAll(".order-line").length <= 1) {
+      return;
+    }
+    const row = button.closest(".order-line");
+    if (typeof jQuery !== "undefined" && $.fn.select2) {
+      $(row).find("select.select2-hidden-accessible").select2("destroy");
+    }
+    row.remove();
+    renumber();
+  });
+
+  initPickers(form);
+});
@@ -0,0 +1,47 @@
+document.addEventListener("DOMContentLoaded", function () {
+  // Poll the progress endpoint of the import job shown on the page
+  const panel = document.getElementById("importProgress");
+  if (!panel) return;
+
+  const statusBadge = document.getElementById("importStatus");
+  const progressBar = document.getElementById("importProgressBar");
+  const summary = document.getElementById("importSummary");
+  const errorMessage = document.getElementById("importErrorMessage");
+  const errorReport = document.getElementById("importErrorReport");
+
+  function render(job) {
+    const percent = job.total_rows
+      ? Math.round((job.rows_done / job.total_rows) * 100)
+      : job.is_finished
+        ? 100
+        : 0;
+    progressBar.style.width = percent + "%";
+    statusBadge.textContent = job.status_display;
+
+    let text = `${job.rows_done} of ${job.total_rows} rows processed, ${job.rows_failed} failed.`;
+    if (job.rows_per_second) {
+      text += ` ${Math.round(job.rows_per_second)} rows/s.`;
+    }
+    summary.textContent = text;
+    errorMessage.textContent = job.error_message || "";
+
+    if (job.error_report_url) {
+      errorReport.href = job.error_report_url;
+      errorReport.classList.remove("d-none");
+    }
+  }
+
+  function poll() {
+    fetch(panel.dataset.progressUrl, { credentials: "same-origin" })
+      .then((response) => response.json())
+      .then((job) => {
+        render(job);
+        if (!job.is_finished) {
+          setTimeout(poll, 1000);
+        }
+      })
+      .catch(() => setTimeout(poll, 5000));
+  }
+
+  poll();
+});
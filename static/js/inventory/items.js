@@ -1,12 +1,14 @@
 document.addEventListener("DOMContentLoaded", function () {
-  // Existing clickable row logic
-  document.querySelectorAll(".clickable-row").forEach((row) => {
-    row.addEventListener("click", (event) => {
-      // Ignore clicks on any element inside a cell marked no-click
-      if (event.target.closest(".no-click")) return;
+  // Rows are drawn by DataTables after page load, so listen on the document
+  document.addEventListener("click", (event) => {
+    const row = event.target.closest(".clickable-row");
+    // Ignore clicks on any element marked no-click
+    if (!row || event.target.closest(".no-click")) return;
 
-      window.location = row.dataset.href;
-    });
+    const href = row.dataset.href;
+    if (href) {
+      window.location = href;
+    }
   });
 
   // Logic for Delete All Confirmation Modal
@@ -5,6 +5,14 @@ document.addEventListener("DOMContentLoaded", function () {
     "#searchDropdownButton + .dropdown-menu .dropdown-item",
   );
   const searchQueryInput = document.getElementById("searchQueryInput");
+  const placeholders = {
+    all: "Perform a global search",
+    items: "Search in Items (Name or SKU)",
+    categories: "Search in Categories (Name)",
+    customers: "Search in Customers (Name, email or phone)",
+    suppliers: "Search in Suppliers (Name, email or phone)",
+    sales: "Search in Sales (Sales number)",
+  };
 
   dropdownItems.forEach((item) => {
     item.addEventListener("click", function (e) {
@@ -16,13 +24,7 @@ document.addEventListener("DOMContentLoaded", function () {
       hiddenSearchScope.value = scope;
 
       // Adjust placeholder based on selection for better UX
-      if (scope === "all") {
-        searchQueryInput.placeholder = "Perform a global search";
-      } else if (scope === "items") {
-        searchQueryInput.placeholder = "Search in Items (Name or SKU)";
-      } else if (scope === "categories") {
-        searchQueryInput.placeholder = "Search in Categories (Name)";
-      }
+      searchQueryInput.placeholder = placeholders[scope] || placeholders.all;
 
       searchQueryInput.focus(); // Keep focus on the input field
     });
@@ -39,13 +41,8 @@ document.addEventListener("DOMContentLoaded", function () {
         selectedSearchOption.textContent = item.textContent;
         hiddenSearchScope.value = currentScope;
         // Update placeholder based on restored scope
-        if (currentScope === "all") {
-          searchQueryInput.placeholder = "Perform a global search";
-        } else if (currentScope === "items") {
-          searchQueryInput.placeholder = "Search in Items (Name or SKU)";
-        } else if (currentScope === "categories") {
-          searchQueryInput.placeholder = "Search in Categories (Name)";
-        }
+        searchQueryInput.placeholder =
+          placeholders[currentScope] || placeholders.all;
       }
     });
   } else {
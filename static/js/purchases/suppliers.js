@@ -1,12 +1,14 @@
 document.addEventListener("DOMContentLoaded", function () {
-  document.querySelectorAll(".clickable-row").forEach((row) => {
-    row.addEventListener("click", (event) => {
-      if (event.target.closest(".no-click")) return;
-      const href = row.dataset.href;
-      if (href) {
-        window.location = href;
-      }
-    });
+  // Rows are drawn by DataTables after page load, so listen on the document
+  document.addEventListener("click", (event) => {
+    const row = event.target.closest(".clickable-row");
+    // Ignore clicks on any element marked no-click
+    if (!row || event.target.closest(".no-click")) return;
+
+    const href = row.dataset.href;
+    if (href) {
+      window.location = href;
+    }
   });
 
   const confirmDeleteAllBtn = document.getElementById(
@@ -1,15 +1,14 @@
 document.addEventListener("DOMContentLoaded", function () {
-  // Handle row click navigation
-  document.querySelectorAll(".clickable-row").forEach((row) => {
-    row.addEventListener("click", (event) => {
-      // Prevent navigation if clicked element or parent has class 'no-click'
-      if (event.target.closest(".no-click")) return;
+  // Rows are drawn by DataTables after page load, so listen on the document
+  document.addEventListener("click", (event) => {
+    const row = event.target.closest(".clickable-row");
+    // Ignore clicks on any element marked no-click
+    if (!row || event.target.closest(".no-click")) return;
 
-      const href = row.dataset.href;
-      if (href) {
-        window.location = href;
-      }
-    });
+    const href = row.dataset.href;
+    if (href) {
+      window.location = href;
+    }
   });
 
   // Handle "Delete All" confirmation modal action
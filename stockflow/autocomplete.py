@@ -0,0 +1,135 @@
+"""
+Server-side option lists for the select2 pickers of the entry forms.
+
+Forms render their item, customer and supplier fields with
+AutocompleteSelect, which outputs only the selected option instead of one
+<option> per row. select2 fetches the rest page by page from an
+autocomplete endpoint as the user types. Typed text is matched as word
+prefixes through the full-text index (main.search); an empty query lists
+the table alphabetically from an index on name. Either way a page costs the
+same however many rows the table holds.
+
+Order forms repeat a picker on every line; their PrefetchedFormSet loads the
+objects chosen on all lines with one query instead of one per line.
+"""
+
+from django import forms
+from django.core.exceptions import ValidationError
+from django.http import JsonResponse
+from django.urls import reverse
+
+# Options per autocomplete page
+AUTOCOMPLETE_PAGE_SIZE = 20
+
+
+class AutocompleteSelect(forms.Select):
+    """
+    A <select> for a ModelChoiceField that contains only the selected object
+    (and an empty option); select2 loads the others from the URL named
+    `url_name`.
+    """
+
+    def __init__(self, url_name, attrs=None):
+        super().__init__(attrs)
+        self.url_name = url_name
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context["widget"]["attrs"]["data-autocomplete-url"] = reverse(self.url_name)
+        return context
+
+    def optgroups(self, name, value, attrs=None):
+        groups = [(None, [self.create_option(name, "", "", False, 0)], 0)]
+        selected = [v for v in value if v not in (None, "")]
+        if not selected:
+            return groups
+        field = self.choices.field
+        try:
+            objects = list(self.choices.queryset.filter(pk__in=selected))
+        except (ValueError, TypeError, ValidationError):
+            # An invalid submitted value is reported by the field
+            return groups
+        for index, obj in enumerate(objects, start=1):
+            option = self.create_option(
+                name, obj.pk, field.label_from_instance(obj), True, index, attrs=attrs
+            )
+            groups.append((None, [option], index))
+        return groups
+
+
+def _page(request):
+    try:
+        return max(int(request.GET.get("page", 1)), 1)
+    except (TypeError, ValueError):
+        return 1
+
+
+def autocomplete_response(request, queryset, kind, render_result):
+    """
+    A select2 AJAX response over `queryset` for the `q` and `page`
+    parameters: {"results": [...], "pagination": {"more": bool}}.
+
+    Typed text is looked up under the main.search `kind` of the model;
+    without it `queryset` is listed by name. `render_result` turns an object
+    into its result dict, which must hold "id" and "text".
+    """
+    from main import search
+
+    query = request.GET.get("q", "").strip()
+    start = (_page(request) - 1) * AUTOCOMPLETE_PAGE_SIZE
+    # One row past the page tells whether there is a next one
+    stop = start + AUTOCOMPLETE_PAGE_SIZE + 1
+    if query:
+        objects = [hit.object for hit in search.search(query, [kind])[start:stop]]
+    else:
+        objects = list(queryset.order_by("name", "pk")[start:stop])
+    return JsonResponse(
+        {
+            "results": [render_result(obj) for obj in objects[:AUTOCOMPLETE_PAGE_SIZE]],
+            "pagination": {"more": len(objects) > AUTOCOMPLETE_PAGE_SIZE},
+        }
+    )
+
+
+class PrefetchedModelChoiceField(forms.ModelChoiceField):
+    """
+    A ModelChoiceField that looks submitted values up in `objects` (a dict of
+    objects by primary key) when it is set, so a formset can load the chosen
+    objects of all its forms with one query.
+    """
+
+    objects = None
+
+    def to_python(self, value):
+        if self.objects is None or value in self.empty_values:
+            return super().to_python(value)
+        try:
+            return self.objects[int(value)]
+        except (KeyError, TypeError, ValueError):
+            raise ValidationError(
+                self.error_messages["invalid_choice"],
+                code="invalid_choice",
+                params={"value": value},
+            )
+
+
+class PrefetchedFormSet(forms.BaseFormSet):
+    """
+    A formset whose PrefetchedModelChoiceFields named in `prefetched` load
+    the objects chosen in all its forms with one query per field.
+    """
+
+    prefetched = ()
+
+    def full_clean(self):
+        if self.is_bound:
+            for name in self.prefetched:
+                values = {
+                    int(value)
+                    for form in self.forms
+                    if str(value := form.data.get(form.add_prefix(name), "")).isdigit()
+                }
+                objects = self.empty_form.fields[name].queryset.in_bulk(values)
+                for form in self.forms:
+                    form.fields[name].objects = objects
+        super().full_clean()
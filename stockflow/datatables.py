@@ -0,0 +1,156 @@
+"""
+Server-side processing for DataTables list views.
+
+Implements the DataTables request protocol (draw, start, length, order and
+search) over a Django queryset, so list pages only ever fetch the rows on
+screen instead of rendering whole tables into HTML.
+"""
+
+from functools import reduce
+from operator import or_
+
+from django.contrib.humanize.templatetags.humanize import intcomma
+from django.db.models import Q
+from django.http import JsonResponse
+from django.template.defaultfilters import floatformat
+
+from .pagination import KeysetPaginator, approximate_count
+
+# Upper bound for the page length a client may ask for ("All" is -1)
+MAX_PAGE_LENGTH = 100
+
+
+def _int_param(params, name, default):
+    try:
+        return int(params.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _ordering(params, columns):
+    """
+    Translates order[i][column] / order[i][dir] into order_by() arguments.
+    Columns whose entry in `columns` is None cannot be sorted on.
+    """
+    ordering = []
+    i = 0
+    while f"order[{i}][column]" in params:
+        index = _int_param(params, f"order[{i}][column]", -1)
+        descending = params.get(f"order[{i}][dir]") == "desc"
+        if 0 <= index < len(columns) and columns[index]:
+            fields = columns[index]
+            if isinstance(fields, str):
+                fields = (fields,)
+            ordering.extend(f"-{field}" if descending else field for field in fields)
+        i += 1
+    return ordering
+
+
+def _search_filter(value, search_fields):
+    """Every whitespace-separated term must match at least one field."""
+    query = Q()
+    for term in value.split():
+        query &= reduce(
+            or_, (Q(**{f"{field}__icontains": term}) for field in search_fields)
+        )
+    return query
+
+
+def datatable_response(
+    request,
+    queryset,
+    columns,
+    render_row,
+    search_fields=(),
+    default_order=(),
+    keyset=False,
+):
+    """
+    Answers a DataTables server-side processing request.
+
+    Args:
+        request: The GET request sent by DataTables.
+        queryset: All rows of the table, with any select_related() needed by
+              render_row already applied.
+        columns (list): One entry per table column, in table order: the field
+              name (or tuple of names) to order by, or None if not sortable.
+        render_row (callable): Turns one object into the row dict sent to the
+              table. Values are inserted as HTML, so text must be escaped.
+        search_fields (iterable): Fields matched by the global search box.
+        default_order (iterable): Ordering used when the request has none.
+        keyset (bool): Page the default ordering by keyset instead of OFFSET.
+              The response then carries next/previous cursors, which the
+              client sends back as `cursor` to move one page, and
+              recordsTotal is only approximate for large tables.
+
+    Returns:
+        JsonResponse: {'draw', 'recordsTotal', 'recordsFiltered', 'data'}.
+    """
+    params = request.GET
+    start = max(_int_param(params, "start", 0), 0)
+    length = _int_param(params, "length", 10)
+    if length < 1 or length > MAX_PAGE_LENGTH:
+        length = MAX_PAGE_LENGTH
+
+    records_total = approximate_count(queryset) if keyset else queryset.count()
+    filtered = queryset
+    search = params.get("search[value]", "").strip()
+    if search and search_fields:
+        filtered = queryset.filter(_search_filter(search, search_fields))
+        records_filtered = filtered.count()
+    else:
+        records_filtered = records_total
+
+    # The primary key breaks ties so pages never overlap or skip rows
+    ordering = _ordering(params, columns) or list(default_order)
+    descending = bool(ordering) and ordering[0].startswith("-")
+    ordering.append("-pk" if descending else "pk")
+
+    payload = {
+        "draw": _int_param(params, "draw", 0),
+        "recordsTotal": records_total,
+        "recordsFiltered": records_filtered,
+    }
+    if keyset and filtered is queryset and ordering[:-1] == list(default_order):
+        paginator = KeysetPaginator(queryset, ordering, length)
+        cursor = params.get("cursor")
+        if cursor:
+            page = paginator.get_page(cursor)
+            rows = page.object_list
+            has_next, has_previous = page.has_next(), page.has_previous()
+        else:
+            rows = list(queryset.order_by(*ordering)[start : start + length + 1])
+            has_next, has_previous = len(rows) > length, start > 0
+            rows = rows[:length]
+        payload["cursors"] = {
+            "next": paginator.encode_cursor(rows[-1]) if has_next else None,
+            "previous": (
+                paginator.encode_cursor(rows[0], backwards=True)
+                if has_previous and rows
+                else None
+            ),
+        }
+    else:
+        rows = filtered.order_by(*ordering)[start : start + length]
+
+    payload["data"] = [render_row(obj) for obj in rows]
+    return JsonResponse(payload)
+
+
+def clickable_row(href, **cells):
+    """
+    Builds a row dict whose <tr> gets the clickable-row class and data-href
+    attribute that the list pages' click handlers navigate to.
+    """
+    return {
+        "DT_RowClass": "clickable-row",
+        "DT_RowAttr": {"data-href": href, "style": "cursor: pointer"},
+        **cells,
+    }
+
+
+def currency(value):
+    """Formats an amount the way the list templates do: KES 1,234.50."""
+    if value is None:
+        return ""
+    return f"KES {intcomma(floatformat(value, 2))}"
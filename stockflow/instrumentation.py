@@ -0,0 +1,243 @@
+"""
+Opt-in per-request cost instrumentation.
+
+RequestInstrumentationMiddleware (enabled with REQUEST_INSTRUMENTATION)
+measures, for every request, the SQL queries and the time spent running
+them, repeated statements (the same SQL with different parameters, the mark
+of an N+1 loop), the time spent rendering templates and the response size.
+Each request gets a Server-Timing header and one JSON line on the
+"stockflow.requests" logger.
+
+Totals per endpoint are also added to per-minute buckets in Django's cache,
+so the Performance page under Settings can list the slowest endpoints and
+the worst N+1 offenders over the last REQUEST_INSTRUMENTATION_WINDOW
+minutes. With the default LocMemCache each worker process only sees its own
+requests; point CACHES at a shared backend to see them all.
+"""
+
+import contextvars
+import functools
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.template.backends.django import Template
+
+logger = logging.getLogger("stockflow.requests")
+
+# Minutes of requests the Performance page covers
+WINDOW_MINUTES = getattr(settings, "REQUEST_INSTRUMENTATION_WINDOW", 60)
+
+BUCKET_KEY = "requests:{minute}"
+
+_current = contextvars.ContextVar("request_stats", default=None)
+
+_WHITESPACE = re.compile(r"\s+")
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PARAMETER_LISTS = re.compile(r"\((?:\s*(?:%s|\?)\s*,)*\s*(?:%s|\?)\s*\)")
+
+
+def normalize_sql(sql):
+    """
+    `sql` with literals and parameter lists of any length replaced by
+    placeholders, so queries that only differ in their values compare equal.
+    """
+    sql = _LITERALS.sub("?", sql)
+    sql = _PARAMETER_LISTS.sub("(...)", sql.replace("%s", "?"))
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+class RequestStats:
+    """The cost of one request; also the execute_wrapper that measures it."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.rendering = False
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+            self.statements[normalize_sql(sql)] += 1
+
+    @property
+    def duplicates(self):
+        """Queries that repeated a statement already run by this request."""
+        return sum(count - 1 for count in self.statements.values())
+
+    @property
+    def worst_duplicate(self):
+        """(statement, times run) of the most repeated statement, or None."""
+        if not self.statements:
+            return None
+        statement, count = self.statements.most_common(1)[0]
+        return (statement, count) if count > 1 else None
+
+
+def _timed_render(render):
+    @functools.wraps(render)
+    def wrapper(self, context=None, request=None):
+        stats = _current.get()
+        if stats is None or stats.rendering:
+            return render(self, context, request)
+        stats.rendering = True
+        started = time.perf_counter()
+        try:
+            return render(self, context, request)
+        finally:
+            stats.template_time += time.perf_counter() - started
+            stats.rendering = False
+
+    wrapper.instrumented = True
+    return wrapper
+
+
+def _endpoint(request):
+    match = request.resolver_match
+    return f"{request.method} {match.view_name if match else '<unresolved>'}"
+
+
+def _milliseconds(seconds):
+    return round(seconds * 1000, 2)
+
+
+def _empty_totals():
+    return {
+        "requests": 0,
+        "time": 0.0,
+        "max_time": 0.0,
+        "queries": 0,
+        "db_time": 0.0,
+        "duplicates": 0,
+        "worst_duplicate": None,
+    }
+
+
+def _add_totals(totals, other):
+    for name in ("requests", "time", "queries", "db_time", "duplicates"):
+        totals[name] += other[name]
+    totals["max_time"] = max(totals["max_time"], other["max_time"])
+    worst = other["worst_duplicate"]
+    if worst and (
+        totals["worst_duplicate"] is None or worst[1] > totals["worst_duplicate"][1]
+    ):
+        totals["worst_duplicate"] = worst
+
+
+def record(endpoint, stats, duration, minute=None):
+    """Adds one request to the cache bucket of the current minute."""
+    minute = int(time.time() // 60) if minute is None else minute
+    key = BUCKET_KEY.format(minute=minute)
+    bucket = cache.get(key) or {}
+    _add_totals(
+        bucket.setdefault(endpoint, _empty_totals()),
+        {
+            "requests": 1,
+            "time": duration,
+            "max_time": duration,
+            "queries": stats.queries,
+            "db_time": stats.db_time,
+            "duplicates": stats.duplicates,
+            "worst_duplicate": stats.worst_duplicate,
+        },
+    )
+    # Buckets expire once they fall out of the window
+    cache.set(key, bucket, timeout=(WINDOW_MINUTES + 1) * 60)
+
+
+def endpoint_stats(window=WINDOW_MINUTES, now=None):
+    """
+    Per endpoint totals over the last `window` minutes, as a list of dicts
+    with averages per request.
+    """
+    minute = int((time.time() if now is None else now) // 60)
+    buckets = cache.get_many(
+        [BUCKET_KEY.format(minute=minute - n) for n in range(window)]
+    )
+    merged = {}
+    for bucket in buckets.values():
+        for endpoint, totals in bucket.items():
+            _add_totals(merged.setdefault(endpoint, _empty_totals()), totals)
+
+    stats = []
+    for endpoint, entry in merged.items():
+        requests = entry["requests"]
+        stats.append(
+            {
+                "endpoint": endpoint,
+                "requests": requests,
+                "avg_ms": _milliseconds(entry["time"] / requests),
+                "max_ms": _milliseconds(entry["max_time"]),
+                "avg_queries": round(entry["queries"] / requests, 1),
+                "avg_db_ms": _milliseconds(entry["db_time"] / requests),
+                "avg_duplicates": round(entry["duplicates"] / requests, 1),
+                "worst_duplicate": entry["worst_duplicate"],
+            }
+        )
+    return stats
+
+
+class RequestInstrumentationMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        # Template time is measured around the outermost render() of the
+        # template backend; templates rendered from inside it (crispy forms,
+        # inclusion tags) are part of that time
+        if not getattr(Template.render, "instrumented", False):
+            Template.render = _timed_render(Template.render)
+
+    def __call__(self, request):
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(stats))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        duration = time.perf_counter() - started
+
+        size = None if response.streaming else len(response.content)
+        timings = ", ".join(
+            [
+                f'db;dur={_milliseconds(stats.db_time)};desc="{stats.queries} queries"',
+                f"tpl;dur={_milliseconds(stats.template_time)}",
+                f"total;dur={_milliseconds(duration)}",
+            ]
+        )
+        if response.has_header("Server-Timing"):
+            timings = f"{response['Server-Timing']}, {timings}"
+        response["Server-Timing"] = timings
+
+        endpoint = _endpoint(request)
+        logger.info(
+            json.dumps(
+                {
+                    "endpoint": endpoint,
+                    "path": request.path,
+                    "status": response.status_code,
+                    "duration_ms": _milliseconds(duration),
+                    "queries": stats.queries,
+                    "db_ms": _milliseconds(stats.db_time),
+                    "duplicate_queries": stats.duplicates,
+                    "template_ms": _milliseconds(stats.template_time),
+                    "response_bytes": size,
+                }
+            )
+        )
+        record(endpoint, stats, duration)
+        return response
@@ -0,0 +1,187 @@
+"""
+Keyset (seek) pagination for long, append-mostly histories.
+
+Instead of OFFSET, each page filters on the sort key of the last row the
+client saw, e.g. ``WHERE (date, id) < (:date, :id) ORDER BY date DESC, id
+DESC LIMIT n``. With an index on the key columns every page costs the same,
+however deep the client has scrolled. Positions are handed out as opaque
+cursors, so clients can only move to the previous or next page.
+"""
+
+import base64
+import binascii
+import datetime
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import Q
+
+# Querysets up to this size are counted exactly
+APPROXIMATE_COUNT_THRESHOLD = 10000
+
+
+class InvalidCursor(InvalidPage):
+    pass
+
+
+class _CursorEncoder(DjangoJSONEncoder):
+    """
+    DjangoJSONEncoder keeps only milliseconds of datetimes and times; cursor
+    keys must match the row exactly, so they keep every microsecond.
+    """
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+class KeysetPage:
+    def __init__(self, object_list, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """
+    Pages through `queryset` in `ordering`, e.g. ("-date", "-pk").
+
+    The ordering must be unique (end with the primary key), use only
+    non-nullable fields and sort every field in the same direction.
+    """
+
+    def __init__(self, queryset, ordering, per_page):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.descending = ordering[0].startswith("-")
+        self.fields = [name.lstrip("-") for name in ordering]
+        if any(name.startswith("-") != self.descending for name in ordering):
+            raise ValueError("Keyset ordering must use a single direction.")
+        opts = queryset.model._meta
+        self.model_fields = [
+            opts.pk if name == "pk" else opts.get_field(name) for name in self.fields
+        ]
+
+    def _order_by(self, backwards):
+        descending = self.descending != backwards
+        return [f"-{name}" if descending else name for name in self.fields]
+
+    def _seek(self, values, backwards):
+        """Rows strictly after `values` in the (possibly reversed) ordering."""
+        lookup = "lt" if self.descending != backwards else "gt"
+        condition = Q()
+        for i, name in enumerate(self.fields):
+            equal = {field: values[j] for j, field in enumerate(self.fields[:i])}
+            condition |= Q(**equal, **{f"{name}__{lookup}": values[i]})
+        return condition
+
+    def _key(self, obj):
+        return [getattr(obj, field.attname) for field in self.model_fields]
+
+    def encode_cursor(self, obj, backwards=False):
+        payload = json.dumps(
+            {"k": self._key(obj), "b": backwards},
+            cls=_CursorEncoder,
+            separators=(",", ":"),
+        )
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            values = [
+                field.to_python(value)
+                for field, value in zip(self.model_fields, payload["k"], strict=True)
+            ]
+            return values, bool(payload["b"])
+        except (
+            binascii.Error,
+            ValueError,
+            TypeError,
+            KeyError,
+            UnicodeError,
+            ValidationError,
+        ) as e:
+            raise InvalidCursor("Invalid page cursor.") from e
+
+    def page(self, cursor=None):
+        """
+        Returns the page following (or, for a previous cursor, preceding) the
+        row encoded in `cursor`, or the first page when no cursor is given.
+        Raises InvalidCursor if the cursor cannot be decoded.
+        """
+        backwards = False
+        queryset = self.queryset
+        if cursor:
+            values, backwards = self.decode_cursor(cursor)
+            queryset = queryset.filter(self._seek(values, backwards))
+
+        rows = list(queryset.order_by(*self._order_by(backwards))[: self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+
+        if backwards:
+            if not has_more:
+                # Walked back to the start; show a full first page
+                return self.page()
+            rows.reverse()
+            has_next, has_previous = True, True
+        else:
+            has_next, has_previous = has_more, bool(cursor)
+
+        return KeysetPage(
+            rows,
+            next_cursor=self.encode_cursor(rows[-1]) if has_next and rows else None,
+            previous_cursor=(
+                self.encode_cursor(rows[0], backwards=True)
+                if has_previous and rows
+                else None
+            ),
+        )
+
+    def get_page(self, cursor=None):
+        """Like page(), but falls back to the first page on a bad cursor."""
+        try:
+            return self.page(cursor)
+        except InvalidCursor:
+            return self.page()
+
+
+def approximate_count(queryset, threshold=APPROXIMATE_COUNT_THRESHOLD):
+    """
+    Counts `queryset` exactly while it is small. Past `threshold` rows, the
+    PostgreSQL planner's row estimate is used instead of a full count; other
+    databases fall back to counting.
+    """
+    bounded = queryset.order_by()[: threshold + 1].count()
+    if bounded <= threshold:
+        return bounded
+    if connections[queryset.db].vendor == "postgresql":
+        plan = json.loads(queryset.order_by().explain(format="json"))
+        if isinstance(plan, list):
+            plan = plan[0]
+        return max(int(plan["Plan"]["Plan Rows"]), bounded)
+    return queryset.count()
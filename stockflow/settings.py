@@ -181,12 +181,74 @@ DEFAULT_FROM_EMAIL = f"Stockflow <{EMAIL_HOST_USER}>"
 
 SITE_DOMAIN = "http://localhost:8000"  # deployed URL
 
+# Cache
+# The dashboard KPIs are cached here (main.dashboard). Their version and the
+# low-stock count are kept in the database, so a per-process LocMemCache stays
+# correct; a shared backend such as Redis lets workers share computed blocks.
+CACHES = {
+    "default": {
+        "BACKEND": config(
+            "CACHE_BACKEND", default="django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": config("CACHE_LOCATION", default="stockflow"),
+    }
+}
+
+# Inventory costing
+# How sales are costed from purchase layers: "fifo" or "average" (moving
+# weighted average). Run `manage.py recost_inventory` after changing it.
+INVENTORY_COSTING_METHOD = config("INVENTORY_COSTING_METHOD", default="fifo")
+
+# Document numbers each process reserves at a time (see inventory.sequences);
+# 1 takes every number from the database as it is needed
+DOCUMENT_NUMBER_BLOCK_SIZE = config("DOCUMENT_NUMBER_BLOCK_SIZE", default=1, cast=int)
+
+# Items read per chunk by the low-stock alert reconciliation scan
+ALERT_SCAN_CHUNK_SIZE = config("ALERT_SCAN_CHUNK_SIZE", default=2000, cast=int)
+
 # Celery
 CELERY_BROKER_URL = "redis://localhost:6379/0"
 CELERY_RESULT_BACKEND = "redis://localhost:6379/0"
+# Run tasks inline (no worker/broker), e.g. for tests and local development
+CELERY_TASK_ALWAYS_EAGER = config("CELERY_TASK_ALWAYS_EAGER", default=False, cast=bool)
 
 # Optional: timezone support
 CELERY_TIMEZONE = "Africa/Nairobi"
 CELERY_ENABLE_UTC = False
 # Load periodic tasks from the DB
 CELERY_BEAT_SCHEDULER = "django_celery_beat.schedulers:DatabaseScheduler"
+# Static entries, synced into the database schedule when beat starts
+CELERY_BEAT_SCHEDULE = {
+    "reconcile-low-stock-count": {
+        "task": "inventory.tasks.reconcile_low_stock_count_task",
+        "schedule": 15 * 60,
+    },
+    "reconcile-low-stock-alerts": {
+        "task": "inventory.tasks.reconcile_low_stock_alerts_task",
+        "schedule": 60,
+        # Runs queued behind a slow scan are dropped rather than piled up
+        "options": {"expires": 60},
+    },
+}
+
+# Request instrumentation
+# Opt-in: stockflow.instrumentation records the queries, database and template
+# time and response size of every request, adds Server-Timing headers, logs a
+# JSON line per request to "stockflow.requests" and feeds the Performance page
+# under Settings, which covers the last REQUEST_INSTRUMENTATION_WINDOW minutes.
+REQUEST_INSTRUMENTATION = config("REQUEST_INSTRUMENTATION", default=False, cast=bool)
+REQUEST_INSTRUMENTATION_WINDOW = config(
+    "REQUEST_INSTRUMENTATION_WINDOW", default=60, cast=int
+)
+if REQUEST_INSTRUMENTATION:
+    MIDDLEWARE.insert(0, "stockflow.instrumentation.RequestInstrumentationMiddleware")
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {
+        "stockflow.requests": {"handlers": ["console"], "level": "INFO"},
+        "stockflow.tasks": {"handlers": ["console"], "level": "INFO"},
+    },
+}